@@ -0,0 +1,220 @@
+"""
+Capture dropouts under full decode load, with and without the CPU partition.
+
+An ``AudioRecorder`` records from a stand-in input stream that keeps device
+time: it wakes once per block, and when its thread was kept off the CPU
+for longer than ``--buffer-blocks`` blocks the oldest audio is lost and the
+callback gets an ``input_overflow`` status, as PortAudio reports it.  The
+blocks also feed a ``LiveFeatureSession``, the thread that drains capture
+while recording.  Meanwhile every CPU is kept busy decoding:
+
+* without ``--model``, one GIL-releasing matrix-multiply thread per logical
+  CPU stands in for the ctranslate2 workers;
+* with ``--model``, the model decodes ``--audio`` (or noise) in a loop.
+
+Each mode runs for ``--seconds``: ``off`` (no partition, decode threads on
+every core) and ``on`` (``cpu_partition`` with ``--reserved`` cores kept
+for capture; the stand-in stream's thread is claimed through the same
+callback probe as PortAudio's).  Reported: overflows, callback wake-up
+lateness, live feature backlog and decode throughput, so the cost of the
+reserved core is visible too.  SCHED_RR needs root or CAP_SYS_NICE,
+otherwise the capture thread gets a raised nice value, or none.
+
+Exits 1 if ``on`` had any overflow, and 2 without measuring if the
+partition cannot be applied here (not Linux, or fewer than ``--reserved``
++ 2 physical cores), since ``on`` would then just repeat ``off``.
+
+    python -m benchmarks.capture_stress --seconds 30
+    sudo python -m benchmarks.capture_stress --model small --seconds 30
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from faster_whisper.feature_extractor import FeatureExtractor
+
+from core.audio.recording import AudioRecorder, drain
+from core.cpu import cpu_partition
+from core.transcription.live import LiveFeatureSession
+
+BLOCK = 512
+SAMPLERATE = 48_000
+
+
+class _DeviceStream:
+    """Delivers blocks on the device clock; audio older than the buffer is dropped."""
+
+    def __init__(self, samplerate, channels, dtype, callback, device=None, buffer_blocks=4):
+        self.samplerate = samplerate
+        self.callback = callback
+        self.buffer_blocks = buffer_blocks
+        self.lateness_ms: list[float] = []
+        self.lost_blocks = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="device", daemon=True)
+
+    def _run(self) -> None:
+        period = BLOCK / self.samplerate
+        block = np.zeros((BLOCK, 1), dtype=np.int16)
+        started = time.perf_counter()
+        delivered = 0
+        while not self._stop.is_set():
+            due = delivered + 1
+            time.sleep(max(0.0, started + due * period - time.perf_counter()))
+            now = time.perf_counter()
+            self.lateness_ms.append((now - started - due * period) * 1000)
+            available = int((now - started) / period)
+            overflow = available - delivered > self.buffer_blocks
+            if overflow:
+                self.lost_blocks += available - delivered - self.buffer_blocks
+                delivered = available - self.buffer_blocks
+            for i in range(available - delivered):
+                status = SimpleNamespace(input_overflow=overflow and i == 0)
+                self.callback(block, BLOCK, None, status if status.input_overflow else None)
+            delivered = available
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def close(self) -> None:
+        pass
+
+
+def _matmul_load(threads: int, stop: threading.Event, done: list) -> list[threading.Thread]:
+    def run(slot: int) -> None:
+        a = np.random.default_rng(slot).random((384, 384), dtype=np.float32)
+        while not stop.is_set():
+            a = np.tanh(a @ a)
+            done[slot] += 1
+
+    return [threading.Thread(target=run, args=(i,), daemon=True) for i in range(threads)]
+
+
+def _model_load(model, audio, stop: threading.Event, done: list) -> list[threading.Thread]:
+    def run() -> None:
+        while not stop.is_set():
+            segments, _ = model.transcribe(audio, beam_size=5, vad_filter=False)
+            for _segment in segments:
+                pass
+            done[0] += 1
+
+    return [threading.Thread(target=run, daemon=True)]
+
+
+def _run(mode: str, args, model, audio) -> dict:
+    cpu_partition.configure(mode == "on", args.reserved)
+    stop = threading.Event()
+    done = [0] * max(1, os.cpu_count() or 1)
+    if model is not None:
+        cpu_partition.isolate()
+        workers = _model_load(model, audio, stop, done)
+    else:
+        logical = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+        workers = _matmul_load(logical, stop, done)
+    for worker in workers:
+        worker.start()
+    time.sleep(1.0)  # let the load ramp up
+
+    streams = []
+
+    def factory(**kwargs):
+        streams.append(_DeviceStream(buffer_blocks=args.buffer_blocks, **kwargs))
+        return streams[-1]
+
+    recorder = AudioRecorder(SAMPLERATE, dtype="int16", stream_factory=factory)
+    session = LiveFeatureSession(FeatureExtractor(), SAMPLERATE, "int16")
+    recorder.set_block_listener(session.feed)
+    backlog = 0
+    start_work = sum(done)
+    started = time.perf_counter()
+    recorder.start()
+    while time.perf_counter() - started < args.seconds:
+        time.sleep(0.05)
+        backlog = max(backlog, session.backlog)
+    drain(recorder.stop())
+    elapsed = time.perf_counter() - started
+    work = sum(done) - start_work
+    session.close()
+    stop.set()
+    for worker in workers:
+        worker.join()
+
+    lateness = streams[0].lateness_ms
+    return {
+        "mode": mode,
+        "partitioned": cpu_partition.enabled,
+        "partition": cpu_partition.summary(),
+        "overflows": recorder.telemetry.flags["input_overflow"],
+        "lost_ms": streams[0].lost_blocks * BLOCK / SAMPLERATE * 1000,
+        "late_p50": statistics.median(lateness),
+        "late_p99": float(np.percentile(lateness, 99)),
+        "late_max": max(lateness),
+        "backlog": backlog,
+        "throughput": work / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--reserved", type=int, default=1, help="physical cores kept for capture")
+    parser.add_argument("--buffer-blocks", type=int, default=4,
+                        help=f"device buffer in {BLOCK}-frame blocks at {SAMPLERATE} Hz")
+    parser.add_argument("--model", help="decode with this model instead of synthetic load")
+    parser.add_argument("--quantization", default="int8")
+    parser.add_argument("--audio", help="clip to decode in a loop (default: 30 s of noise)")
+    args = parser.parse_args()
+
+    model = audio = None
+    if args.model:
+        from faster_whisper import decode_audio
+        from core.models.loader import load_model
+
+        # Loaded with every physical core; "on" still confines its threads to the decode CPUs.
+        cpu_partition.configure(False)
+        model = load_model(args.model, args.quantization, "cpu")
+        audio = (
+            decode_audio(args.audio, sampling_rate=16_000) if args.audio
+            else np.random.default_rng(0).normal(0, 0.05, 30 * 16_000).astype(np.float32)
+        )
+
+    if not cpu_partition.configure(True, args.reserved):
+        cpu_partition.configure(False)
+        print(f"Cannot measure: no CPU partition on this machine ({cpu_partition.summary()}, "
+              f"{os.cpu_count()} logical CPU(s)); needs Linux and {args.reserved + 2}+ physical cores")
+        sys.exit(2)
+    cpu_partition.configure(False)
+
+    buffer_ms = args.buffer_blocks * BLOCK / SAMPLERATE * 1000
+    unit = "decodes/s" if model is not None else "matmuls/s"
+    print(f"device buffer {buffer_ms:.0f} ms, {args.seconds:g}s per mode, {os.cpu_count()} logical CPU(s)")
+    results = {}
+    for mode in ("off", "on"):
+        r = results[mode] = _run(mode, args, model, audio)
+        print(
+            f"  {r['mode']:>3}: {r['overflows']:4d} overflow(s), {r['lost_ms']:6.0f} ms lost; "
+            f"wake-up late p50 {r['late_p50']:.2f} / p99 {r['late_p99']:.1f} / max {r['late_max']:.1f} ms; "
+            f"feature backlog {r['backlog']} blocks; {r['throughput']:.1f} {unit}  [{r['partition']}]"
+        )
+    cpu_partition.configure(False)
+
+    on = results["on"]
+    if on["overflows"]:
+        print(f"FAIL: {on['overflows']} overflow(s) under full decode load with the partition on")
+        sys.exit(1)
+    print(f"OK: no overflows with the partition on ({results['off']['overflows']} without)")
+
+
+if __name__ == "__main__":
+    main()
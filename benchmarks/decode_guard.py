@@ -0,0 +1,79 @@
+"""
+Measure the decode time the guard saves on adversarial clips.
+
+Each clip is transcribed twice: plainly, with faster-whisper's defaults,
+and through ``DecodeGuard.transcribe``, which stops decoding at a runaway
+and bounds temperature fallback.  The wall time of fully consuming the
+segments, the segments kept and the audio the guard never decoded are
+compared.  Pass WAV files of clips known to loop (long silent or noisy tails, music, hum); without any,
+a set of synthetic noise/hum/silence clips is generated.
+
+    python -m benchmarks.decode_guard --model base.en clip1.wav clip2.wav
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+from faster_whisper import decode_audio
+
+from core.models.loader import load_model
+from core.transcription.guard import DecodeGuard, GuardStats
+
+
+def synthetic_clips(seconds: float = 60.0) -> dict[str, np.ndarray]:
+    rng = np.random.default_rng(0)
+    n = int(16_000 * seconds)
+    t = np.arange(n, dtype=np.float32) / 16_000
+    return {
+        "silence": np.zeros(n, dtype=np.float32),
+        "white-noise": (0.02 * rng.standard_normal(n)).astype(np.float32),
+        "mains-hum": (0.05 * np.sin(2 * np.pi * 50 * t)).astype(np.float32),
+        "babble": (0.05 * rng.standard_normal(n) * np.sin(2 * np.pi * 3 * t) ** 2).astype(np.float32),
+    }
+
+
+def _timed(model, audio, guard=None) -> tuple[float, int]:
+    start = time.perf_counter()
+    if guard is not None:
+        segments, _ = guard.transcribe(model, audio)
+    else:
+        segments, _ = model.transcribe(audio)
+    count = sum(1 for _ in segments)
+    return time.perf_counter() - start, count
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("clips", nargs="*")
+    parser.add_argument("--model", default="base.en")
+    parser.add_argument("--quantization", default="float32")
+    parser.add_argument("--device", default="cpu")
+    args = parser.parse_args()
+
+    clips = {path: decode_audio(path) for path in args.clips} or synthetic_clips()
+    model = load_model(args.model, args.quantization, args.device)
+    totals = GuardStats()
+
+    total_plain = total_guarded = 0.0
+    print(f"{'clip':<24}{'plain s':>10}{'guarded s':>12}{'saved s':>10}{'skipped audio s':>18}{'segments':>12}")
+    for name, audio in clips.items():
+        stats = GuardStats()
+        plain, plain_count = _timed(model, audio)
+        guarded, guarded_count = _timed(model, audio, DecodeGuard(stats))
+        total_plain += plain
+        total_guarded += guarded
+        counts = stats.snapshot()
+        for key, value in counts.items():
+            totals.increment(key, value)
+        print(f"{name:<24}{plain:>10.2f}{guarded:>12.2f}{plain - guarded:>10.2f}"
+              f"{counts.get('skipped_ms', 0) / 1000:>18.1f}{plain_count:>6}->{guarded_count:<5}")
+
+    print(f"\ntotal: {total_plain:.2f}s -> {total_guarded:.2f}s, {total_plain - total_guarded:.2f}s saved "
+          f"({total_plain / max(total_guarded, 1e-9):.2f}x)")
+    print("guard counters:", totals.snapshot())
+
+
+if __name__ == "__main__":
+    main()
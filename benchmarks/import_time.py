@@ -0,0 +1,58 @@
+"""
+Import cost of the Qt-free engine compared with the Qt controller.
+
+Each module is imported in a fresh interpreter several times; the median
+wall time, the resident memory afterwards and whether PySide6 got pulled in
+are reported.
+
+    python -m benchmarks.import_time
+"""
+from __future__ import annotations
+
+import json
+import statistics
+import subprocess
+import sys
+
+MODULES = ("core.engine", "core.controller")
+
+_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+import psutil
+print(json.dumps({{
+    "seconds": elapsed,
+    "rss": psutil.Process().memory_info().rss,
+    "qt": any(name.startswith("PySide6") for name in sys.modules),
+}}))
+"""
+
+
+def measure(module: str, runs: int = 5) -> dict:
+    samples = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", _SNIPPET.format(module=module)],
+            capture_output=True, text=True, check=True,
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    return {
+        "seconds": statistics.median(s["seconds"] for s in samples),
+        "rss_mb": statistics.median(s["rss"] for s in samples) / 2**20,
+        "qt": any(s["qt"] for s in samples),
+    }
+
+
+def main() -> None:
+    print(f"{'module':<20}{'import s':>10}{'RSS MB':>10}{'Qt loaded':>11}")
+    for module in MODULES:
+        result = measure(module)
+        print(f"{module:<20}{result['seconds']:>10.3f}{result['rss_mb']:>10.1f}{str(result['qt']):>11}")
+        if module == "core.engine" and result["qt"]:
+            raise SystemExit("core.engine must not import PySide6")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+The file-system job queue with several worker processes on one machine.
+
+Writes ``--jobs`` synthetic clips into a temporary queue, submits them
+(twice, to show that resubmission is a no-op) and starts ``--workers``
+worker processes, each with its own engine.  With ``--kill-after`` one
+worker is killed with SIGKILL mid-job; its lease stops being renewed,
+expires after ``--lease`` seconds and the job is reclaimed by another
+worker.  The coordinator prints ``status`` once a second, then checks
+that every job has exactly one result and reports per-worker throughput.
+
+Without ``--model`` each worker's model sleeps ``--rtf`` x the clip
+length, so the run measures queueing and leasing, not decoding.
+
+Each worker runs ``--slots`` jobs at once over one copy of the model.  With
+``--daemon`` the workers load nothing themselves: a daemon process holds
+the model, with ``--workers`` x ``--slots`` slots, and every worker sends
+its audio there.  The summed PSS of the workers, as they last reported it,
+plus the daemon's, compares N processes with their own copy each against
+N processes sharing one.
+
+    python -m benchmarks.job_queue --jobs 24 --workers 3 --kill-after 2
+    python -m benchmarks.job_queue --jobs 8 --workers 2 --model tiny.en --clip 30
+    python -m benchmarks.job_queue --jobs 8 --workers 2 --model tiny.en --clip 30 --daemon
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import multiprocessing
+import secrets
+import tempfile
+import time
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.jobqueue import JobQueue, QueueWorker, format_status
+from utils import format_bytes
+
+
+class _SleepingModel:
+    """Decodes at a fixed real-time factor; one segment with word timestamps."""
+
+    feature_extractor = SimpleNamespace(sampling_rate=16_000)
+
+    def __init__(self, rtf: float) -> None:
+        self.rtf = rtf
+
+    def transcribe(self, audio, **_options):
+        seconds = len(audio) / 16_000
+        info = SimpleNamespace(language="en", language_probability=1.0, duration=seconds)
+        return self._segments(seconds), info
+
+    def _segments(self, seconds: float):
+        time.sleep(seconds * self.rtf)
+        words = [SimpleNamespace(start=0.0, end=seconds, word=f" {seconds:.0f}s", probability=1.0)]
+        yield SimpleNamespace(
+            text=words[0].word, start=0.0, end=seconds, avg_logprob=-0.1, no_speech_prob=0.0,
+            compression_ratio=1.0, temperature=0.0, words=words, tokens=[1],
+        )
+
+
+def _write_clip(path: Path, seconds: float, frequency: float) -> None:
+    n = np.arange(int(seconds * 16_000))
+    samples = (3000 * np.sin(2 * np.pi * frequency * n / 16_000)).astype(np.int16)
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(16_000)
+        wf.writeframes(samples.tobytes())
+
+
+def _engine(model: str | None, rtf: float, slots: int, factory=None):
+    from core.engine import TranscriptionEngine
+
+    if factory is None and not model:
+        factory = lambda *a, **kw: _SleepingModel(rtf)  # noqa: E731
+    engine = TranscriptionEngine(guard_enabled=False, pool_size=slots, pool_mode="workers", model_factory=factory)
+    engine.load_model(model or "simulated", "int8" if model else "float32", "cpu")
+    return engine
+
+
+def _serve(address: str, authkey: bytes, model: str | None, rtf: float, slots: int) -> None:
+    from core.daemon import TranscriptionDaemon
+
+    logging.basicConfig(level=logging.WARNING, format="daemon: %(levelname)s %(message)s")
+    TranscriptionDaemon(_engine(model, rtf, slots), address, authkey).serve_forever()
+
+
+def _attach(address: str, authkey: bytes, timeout: float = 120.0):
+    from core.daemon import DaemonClient
+
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            client = DaemonClient(address, authkey)
+            if client.health()["loaded"]:
+                return client
+            client.close()
+        except (OSError, EOFError):
+            if time.monotonic() > deadline:
+                raise
+        time.sleep(0.1)
+
+
+def _work(root: str, name: str, lease_s: float, model: str | None, rtf: float, slots: int,
+          daemon: tuple | None) -> None:
+    from core.daemon import RemoteModelFactory
+    from core.transcription.priority import BATCH
+
+    logging.basicConfig(level=logging.WARNING, format=f"{name}: %(levelname)s %(message)s")
+    client = _attach(*daemon) if daemon else None
+    engine = _engine(model, rtf, slots, RemoteModelFactory(client, BATCH) if client else None)
+    try:
+        QueueWorker(JobQueue(root, lease_s), engine, name, slots=slots).run(exit_when_empty=True)
+    finally:
+        if client is not None:
+            client.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--slots", type=int, default=1, help="jobs each worker runs at once")
+    parser.add_argument("--clip", type=float, default=20.0, help="clip length in seconds")
+    parser.add_argument("--rtf", type=float, default=0.05, help="stand-in model real-time factor")
+    parser.add_argument("--lease", type=float, default=3.0)
+    parser.add_argument("--kill-after", type=float, default=0.0, help="kill one worker after N seconds")
+    parser.add_argument("--model", help="real model to decode with, e.g. tiny.en")
+    parser.add_argument("--daemon", action="store_true", help="workers share one model held by a daemon process")
+    parser.add_argument("--queue", help="queue directory (default: a temporary one)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(args.queue or tmp)
+        queue = JobQueue(root, args.lease)
+        (root / "audio").mkdir(exist_ok=True)
+        clips = []
+        for i in range(args.jobs):
+            clips.append(root / "audio" / f"clip{i:03d}.wav")
+            _write_clip(clips[-1], args.clip, 200 + 10 * i)
+        print(f"submitted {len(queue.submit(clips))} job(s), resubmitted {len(queue.submit(clips))}")
+
+        ctx = multiprocessing.get_context("spawn")
+        daemon = server = None
+        if args.daemon:
+            daemon = (str(Path(tmp) / "daemon.sock"), secrets.token_bytes(32))
+            server = ctx.Process(target=_serve, args=(*daemon, args.model, args.rtf, args.workers * args.slots))
+            server.start()
+        workers = [
+            ctx.Process(
+                target=_work, args=(str(root), f"worker{i}", args.lease, args.model, args.rtf, args.slots, daemon)
+            )
+            for i in range(args.workers)
+        ]
+        started = time.perf_counter()
+        for process in workers:
+            process.start()
+        killed = False
+        while any(p.is_alive() for p in workers):
+            time.sleep(1.0)
+            if args.kill_after and not killed and time.perf_counter() - started >= args.kill_after:
+                workers[0].kill()
+                killed = True
+                print("-- killed worker0")
+            print(format_status(queue.status(), queue.lease_s), flush=True)
+        wall = time.perf_counter() - started
+
+        status = queue.status()
+        results = [queue.result(job_id) for job_id in (p.stem for p in (root / "jobs").glob("*.json"))]
+        missing = sum(r is None for r in results)
+        failures = [queue.failures(p.stem) for p in (root / "failed").glob("*.json")]
+        reclaimed = sum(any("expired" in e["error"] for e in f["errors"]) for f in failures if f)
+        audio_s = sum(r["audio_s"] for r in results if r)
+        print()
+        print(format_status(status, queue.lease_s))
+        print(
+            f"{status['done']}/{status['total']} done in {wall:.1f}s, {missing} without a result, "
+            f"{reclaimed} reclaimed after a lease expired; {audio_s / wall:.1f}x realtime overall"
+        )
+        memory = list(status["workers"].values())
+        if server is not None:
+            client = _attach(*daemon)
+            memory.append(client.health())
+            client.shutdown()
+            server.join(30)
+        for w in memory[args.workers:]:
+            print(f"daemon: rss {format_bytes(w.get('rss', 0))}, pss {format_bytes(w.get('pss', 0))}")
+        print(
+            f"{args.workers} worker(s) x {args.slots} slot(s){' + daemon' if server else ''}: "
+            f"rss {format_bytes(sum(w.get('rss', 0) for w in memory))}, "
+            f"pss {format_bytes(sum(w.get('pss', 0) for w in memory))} summed"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Language detection skipped by the per-session ``LanguageCache``.
+
+Cuts ``--audio`` into ``--clip``-second clips, as if they were separate
+dictations, and transcribes them with a multilingual model twice: with
+detection on every clip (no language set), and through the cache.
+Reports wall time per clip, detections run and skipped, the measured cost
+of one detection, and whether the texts agree.
+
+    python -m benchmarks.language_cache --model small --audio speech.wav --clip 8
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+from faster_whisper import decode_audio
+
+from core.models.loader import load_model
+from core.transcription.language import LanguageCache
+from core.transcription.transcriber import Transcriber
+
+
+def _run(model, clips, cache) -> tuple[float, list]:
+    transcriber = Transcriber(guard_enabled=False)
+    transcriber.language_cache = cache
+    texts = []
+    started = time.perf_counter()
+    for clip in clips:
+        texts.append(transcriber.transcribe(
+            model, audio=clip, cache=False, beam_size=1,
+            language_session="bench" if cache is not None else None,
+        ))
+    return time.perf_counter() - started, texts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="small", help="a multilingual model (no .en suffix)")
+    parser.add_argument("--quantization", default="int8")
+    parser.add_argument("--audio", required=True)
+    parser.add_argument("--clip", type=float, default=8.0)
+    parser.add_argument("--recheck", type=int, default=10, help="re-detect after this many clips")
+    args = parser.parse_args()
+
+    model = load_model(args.model, args.quantization, "cpu")
+    if not model.model.is_multilingual:
+        raise SystemExit(f"{args.model} is English-only and never detects the language")
+    audio = decode_audio(args.audio, sampling_rate=16_000)
+    step = int(args.clip * 16_000)
+    clips = [audio[i:i + step] for i in range(0, len(audio) - step // 2, step)]
+
+    _run(model, clips[:1], None)  # warm-up
+    baseline_s, baseline = _run(model, clips, None)
+    cache = LanguageCache(recheck_every=args.recheck)
+    cached_s, texts = _run(model, clips, cache)
+
+    stats = cache.stats
+    same = sum(a == b for a, b in zip(baseline, texts))
+    print(f"{len(clips)} clips of {args.clip:g}s")
+    print(f"  detect every clip: {baseline_s / len(clips) * 1000:7.0f} ms/clip")
+    print(f"  language cache:    {cached_s / len(clips) * 1000:7.0f} ms/clip  ({cache.summary()})")
+    print(
+        f"  {stats.detections} detections ({stats.mean_detect_s * 1000:.0f} ms each), {stats.skipped} skipped, "
+        f"{stats.switches} switches; measured saving {baseline_s - cached_s:.2f}s, "
+        f"credited {stats.saved_s:.2f}s; {same}/{len(clips)} texts identical"
+    )
+
+
+if __name__ == "__main__":
+    main()
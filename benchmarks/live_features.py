@@ -0,0 +1,100 @@
+"""
+Incremental log-mel extraction against the batch extractor.
+
+Feeds a synthetic recording through ``LiveFeatureSession`` block by block,
+the way the capture callback does, and checks that the 16 kHz audio and
+the features match what the batch path (``to_whisper_audio`` followed by
+faster-whisper's ``FeatureExtractor``) produces for the same blocks.  It
+also reports how long each path leaves on the critical path after stop:
+the whole extraction for the batch path, only the final frames for the
+incremental one.  Exits non-zero if any case differs by more than ``--tol``.
+
+    python -m benchmarks.live_features
+    python -m benchmarks.live_features --seconds 5 60 600 --rates 16000 48000
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from core.audio.recording import to_whisper_audio
+from core.transcription.live import LiveFeatureSession
+
+
+def _recording(seconds: float, samplerate: int, block: int, seed: int = 0) -> list:
+    """Voiced bursts over low noise, as int16 capture blocks."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * samplerate)
+    t = np.arange(n) / samplerate
+    envelope = (np.sin(2 * np.pi * 0.4 * t) > 0).astype(np.float32)
+    voice = np.sin(2 * np.pi * 140 * t) + 0.5 * np.sin(2 * np.pi * 280 * t + 1.0)
+    audio = 0.3 * envelope * voice + 0.01 * rng.standard_normal(n)
+    samples = (np.clip(audio, -1, 1) * 32767).astype(np.int16).reshape(-1, 1)
+    return [samples[i:i + block] for i in range(0, n, block)]
+
+
+def _run_case(extractor, seconds: float, samplerate: int, block: int) -> dict:
+    blocks = _recording(seconds, samplerate, block)
+
+    started = time.perf_counter()
+    audio = to_whisper_audio(blocks, "int16", samplerate)
+    reference = extractor(audio)
+    batch_s = time.perf_counter() - started
+
+    session = LiveFeatureSession(extractor, samplerate, "int16")
+    for b in blocks:
+        session.feed(b)
+    # Capture is slower than extraction, so at stop the worker has caught up.
+    while session.backlog:
+        time.sleep(0.001)
+    live_audio, features = session.finish()
+
+    return {
+        "audio_diff": float(np.abs(live_audio - audio).max()) if len(audio) == len(live_audio) else np.inf,
+        "shape_ok": features.shape == reference.shape,
+        "feature_diff": float(np.abs(features - reference).max()) if features.shape == reference.shape else np.inf,
+        "batch_s": batch_s,
+        "post_stop_s": session.post_stop_s,
+        "frames": reference.shape[1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, nargs="+", default=[0.01, 1.0, 30.0, 300.0])
+    parser.add_argument("--rates", type=int, nargs="+", default=[16_000, 44_100])
+    parser.add_argument("--blocks", type=int, nargs="+", default=[160, 1024])
+    parser.add_argument("--mels", type=int, nargs="+", default=[80, 128])
+    parser.add_argument("--tol", type=float, default=1e-4)
+    args = parser.parse_args()
+
+    from faster_whisper.feature_extractor import FeatureExtractor
+
+    failures = 0
+    print(f"{'mels':>4} {'rate':>6} {'block':>5} {'secs':>7} {'frames':>7} "
+          f"{'max |diff|':>10} {'batch':>8} {'at stop':>8}")
+    for n_mels in args.mels:
+        extractor = FeatureExtractor(feature_size=n_mels)
+        for rate in args.rates:
+            for block in args.blocks:
+                for seconds in args.seconds:
+                    r = _run_case(extractor, seconds, rate, block)
+                    ok = r["shape_ok"] and r["audio_diff"] == 0 and r["feature_diff"] <= args.tol
+                    failures += not ok
+                    print(
+                        f"{n_mels:>4} {rate:>6} {block:>5} {seconds:>7.2f} {r['frames']:>7} "
+                        f"{r['feature_diff']:>10.2e} {r['batch_s'] * 1000:>6.1f}ms "
+                        f"{r['post_stop_s'] * 1000:>6.1f}ms{'' if ok else '  MISMATCH'}"
+                    )
+
+    if failures:
+        print(f"FAIL: {failures} case(s) differ from the batch extractor")
+        sys.exit(1)
+    print("OK: incremental features match the batch extractor")
+
+
+if __name__ == "__main__":
+    main()
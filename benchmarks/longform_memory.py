@@ -0,0 +1,136 @@
+"""
+Peak memory of chunked long-file transcription.
+
+Writes a synthetic WAV of the requested length, runs it through the
+windowed decoder while sampling RSS, and fails if the peak grows by more
+than ``--max-growth-mb`` over the starting RSS.  Without ``--model`` a
+stand-in model that only consumes the audio is used, which isolates the
+decode/window path; ``--compare`` also measures ``decode_audio`` loading
+the whole file for reference.
+
+    python -m benchmarks.longform_memory --minutes 120
+    python -m benchmarks.longform_memory --minutes 30 --model base.en --compare
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.transcription.longform import transcribe_long_file
+from utils import format_bytes, get_process_rss, release_freed_memory
+
+SAMPLING_RATE = 16_000
+
+
+class _PeakRss:
+
+    def __init__(self, interval: float = 0.02) -> None:
+        self.interval = interval
+        self.peak = get_process_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, get_process_rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, get_process_rss())
+
+
+class _ConsumingModel:
+    """Touches every sample and reports one word per second of audio."""
+
+    feature_extractor = SimpleNamespace(sampling_rate=SAMPLING_RATE)
+
+    def transcribe(self, audio, **_options):
+        energy = float(np.square(audio).mean()) if len(audio) else 0.0
+        words = [
+            SimpleNamespace(start=float(t), end=float(t) + 0.5, word=f" w{t}")
+            for t in range(int(len(audio) / SAMPLING_RATE))
+        ]
+        segment = SimpleNamespace(text=f" {energy:.3f}", words=words, avg_logprob=-0.1, no_speech_prob=0.0)
+        return iter([segment]), None
+
+
+def _write_wav(path: str, minutes: float) -> None:
+    block = SAMPLING_RATE * 10
+    t = np.arange(block, dtype=np.float32) / SAMPLING_RATE
+    tone = (3000 * np.sin(2 * np.pi * 220 * t)).astype(np.int16).tobytes()
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLING_RATE)
+        for _ in range(int(minutes * 6)):
+            wf.writeframes(tone)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--minutes", type=float, default=60.0)
+    parser.add_argument("--window", type=float, default=60.0)
+    parser.add_argument("--overlap", type=float, default=4.0)
+    parser.add_argument("--model", help="real model to decode with, e.g. base.en")
+    parser.add_argument("--quantization", default="int8")
+    parser.add_argument("--max-growth-mb", type=float, default=150.0)
+    parser.add_argument("--compare", action="store_true", help="also measure decode_audio on the whole file")
+    args = parser.parse_args()
+
+    if args.model:
+        from core.models.loader import load_model
+        model = load_model(args.model, args.quantization, "cpu")
+    else:
+        model = _ConsumingModel()
+
+    fd, path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    try:
+        _write_wav(path, args.minutes)
+        print(f"{args.minutes:.0f} min file, {format_bytes(os.path.getsize(path))} on disk")
+
+        release_freed_memory()
+        baseline = get_process_rss()
+        started = time.perf_counter()
+        with _PeakRss() as rss:
+            text = transcribe_long_file(model, path, args.window, args.overlap, beam_size=1)
+        growth = rss.peak - baseline
+        print(
+            f"chunked: {time.perf_counter() - started:.1f}s, {len(text.split())} words, "
+            f"peak RSS +{format_bytes(growth)}"
+        )
+
+        if args.compare:
+            from faster_whisper import decode_audio
+
+            release_freed_memory()
+            baseline = get_process_rss()
+            with _PeakRss() as full:
+                audio = decode_audio(path, sampling_rate=SAMPLING_RATE)
+            print(f"decode_audio whole file: {format_bytes(audio.nbytes)} array, peak RSS +{format_bytes(full.peak - baseline)}")
+            del audio
+    finally:
+        os.unlink(path)
+
+    limit = args.max_growth_mb * 1024 * 1024
+    if growth > limit:
+        print(f"FAIL: peak RSS grew by {format_bytes(growth)}, limit {format_bytes(limit)}")
+        sys.exit(1)
+    print(f"OK: peak RSS growth within {format_bytes(limit)}")
+
+
+if __name__ == "__main__":
+    main()
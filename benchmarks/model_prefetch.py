@@ -0,0 +1,102 @@
+"""
+Cold versus read-ahead model load time.
+
+For each round the model's files are dropped from the page cache with
+``posix_fadvise(DONTNEED)`` (Linux; no root needed for clean pages), then:
+
+* cold     - ``load_model`` straight from disk;
+* prefetch - ``read_ahead`` of the files at idle IO priority, as the
+  ``Prefetcher`` does in the background after a load;
+* warm     - ``load_model`` again, now from the page cache.
+
+The model must already be in the local store.
+
+    python -m benchmarks.model_prefetch --model large-v3 --quantization int8 --rounds 3
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import statistics
+import sys
+import threading
+import time
+
+from core.models.conversion import storage_quantization
+from core.models.loader import load_model
+from core.models.prefetch import lower_thread_priority, read_ahead
+from core.models.registry import get_default_registry
+
+
+def _evict(files) -> None:
+    for file in files:
+        fd = os.open(file, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+
+
+def _timed_load(args) -> float:
+    started = time.perf_counter()
+    model = load_model(args.model, args.quantization, args.device)
+    elapsed = time.perf_counter() - started
+    del model
+    gc.collect()
+    return elapsed
+
+
+def _prefetch(files) -> tuple[float, int]:
+    result = {}
+
+    def run():
+        lower_thread_priority()
+        started = time.perf_counter()
+        result["bytes"] = read_ahead(files, 1 << 40)
+        result["seconds"] = time.perf_counter() - started
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    thread.join()
+    return result["seconds"], result["bytes"]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", required=True)
+    parser.add_argument("--quantization", default="float32")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    if not hasattr(os, "posix_fadvise"):
+        sys.exit("Evicting files from the page cache needs posix_fadvise (Linux)")
+    files = get_default_registry().stored_files(args.model, storage_quantization(args.quantization))
+    if not files:
+        sys.exit(f"{args.model} ({args.quantization}) is not in the local model store; load it once first")
+    size = sum(f.stat().st_size for f in files)
+    print(f"{args.model} {args.quantization}: {len(files)} files, {size / 1e6:.0f} MB")
+
+    cold, warm, prefetch = [], [], []
+    for i in range(args.rounds):
+        _evict(files)
+        cold.append(_timed_load(args))
+        _evict(files)
+        seconds, done = _prefetch(files)
+        prefetch.append(seconds)
+        warm.append(_timed_load(args))
+        print(
+            f"  round {i + 1}: cold {cold[-1]:.2f}s, read-ahead {seconds:.2f}s ({done / 1e6:.0f} MB), "
+            f"warm {warm[-1]:.2f}s"
+        )
+    cold_s, warm_s = statistics.median(cold), statistics.median(warm)
+    print(
+        f"median: cold {cold_s:.2f}s, warm {warm_s:.2f}s, saved {cold_s - warm_s:.2f}s "
+        f"({1 - warm_s / cold_s:.0%}); read-ahead took {statistics.median(prefetch):.2f}s off the critical path"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""
+Throughput and fairness with several capture sources sharing one model pool.
+
+Each simulated source is an ``AudioRecorder`` fed by a stand-in input
+stream that delivers blocks in (compressed) real time.  A source records
+``--clips`` utterances back to back; every finished utterance becomes an
+interactive job, tagged with its source, that leases a model through the
+``PriorityScheduler``.  Reported per source count:
+
+* throughput - seconds of audio transcribed per wall-clock second, in
+  uncompressed time;
+* latency - from the end of an utterance to its text, p50/p95 over all
+  sources, and the worst per-source mean;
+* fairness - Jain's index over per-source mean latency (1.0 = even).
+
+Without ``--model`` the model sleeps ``--rtf`` x the clip length (scaled by
+``--speed``) per decode, which isolates capture and scheduling.
+
+    python -m benchmarks.multi_source --sources 1 2 4 8
+    python -m benchmarks.multi_source --sources 1 2 4 --model base.en --speed 1 --pool-size 2
+"""
+from __future__ import annotations
+
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import numpy as np
+
+from core.audio.recording import AudioRecorder, drain, to_whisper_audio
+from core.models.pool import ModelPool, Replica
+from core.transcription.priority import INTERACTIVE, PriorityScheduler
+from core.transcription.transcriber import Transcriber
+
+BLOCK = 1024
+
+
+class _SimulatedStream:
+    """Calls the capture callback with a tone at ``speed`` x real time."""
+
+    def __init__(self, samplerate, channels, dtype, callback, device=None, speed=1.0):
+        self.samplerate = samplerate
+        self.callback = callback
+        self.speed = speed
+        self.frequency = 200 + 40 * (device or 0)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        period = BLOCK / self.samplerate / self.speed
+        t = 0
+        next_at = time.perf_counter()
+        while not self._stop.is_set():
+            n = np.arange(t, t + BLOCK)
+            block = (3000 * np.sin(2 * np.pi * self.frequency * n / self.samplerate)).astype(np.int16)
+            self.callback(block.reshape(-1, 1), BLOCK, None, None)
+            t += BLOCK
+            next_at += period
+            time.sleep(max(0.0, next_at - time.perf_counter()))
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def close(self) -> None:
+        pass
+
+
+class _SleepingModel:
+    """Decodes at a fixed real-time factor, one segment per clip."""
+
+    feature_extractor = SimpleNamespace(sampling_rate=16_000)
+
+    def __init__(self, rtf: float, speed: float) -> None:
+        self.rtf = rtf
+        self.speed = speed
+
+    def transcribe(self, audio, **_options):
+        seconds = len(audio) / 16_000
+        time.sleep(seconds * self.rtf / self.speed)
+        segment = SimpleNamespace(
+            text=f" {seconds:.1f}s", avg_logprob=-0.1, no_speech_prob=0.0,
+            compression_ratio=1.0, words=None, start=0.0, end=seconds, tokens=[1],
+        )
+        return iter([segment]), None
+
+
+def _jain(values) -> float:
+    values = np.asarray(values, dtype=float)
+    return float(values.sum() ** 2 / (len(values) * np.square(values).sum())) if values.any() else 1.0
+
+
+def _run(n_sources: int, pool: ModelPool, args) -> dict:
+    scheduler = PriorityScheduler()
+    transcriber = Transcriber(guard_enabled=False)
+    latencies = {f"src{i}": [] for i in range(n_sources)}
+    audio_seconds = [0.0]
+    lock = threading.Lock()
+    executor = ThreadPoolExecutor(max_workers=n_sources * 2)
+
+    def transcribe(source: str, audio: np.ndarray, captured_at: float) -> None:
+        with scheduler.lease(pool, INTERACTIVE, source) as model:
+            transcriber.transcribe(model, audio=audio, cache=False, beam_size=1)
+        with lock:
+            latencies[source].append((time.perf_counter() - captured_at) * args.speed)
+            audio_seconds[0] += len(audio) / 16_000
+
+    def capture(index: int) -> None:
+        source = f"src{index}"
+        recorder = AudioRecorder(
+            args.samplerate,
+            stream_factory=lambda **kw: _SimulatedStream(speed=args.speed, **kw),
+            device=index,
+        )
+        # Stagger the sources so their utterances do not all end together.
+        time.sleep(index * args.clip / n_sources / args.speed)
+        for _ in range(args.clips):
+            recorder.start()
+            time.sleep(args.clip / args.speed)
+            buffer = recorder.stop()
+            audio = to_whisper_audio(drain(buffer), recorder.dtype, recorder.samplerate)
+            executor.submit(transcribe, source, audio, time.perf_counter())
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=capture, args=(i,)) for i in range(n_sources)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    executor.shutdown(wait=True)
+    wall = (time.perf_counter() - started) * args.speed
+
+    every = [v for values in latencies.values() for v in values]
+    means = [float(np.mean(v)) for v in latencies.values()]
+    return {
+        "throughput": audio_seconds[0] / wall,
+        "p50": float(np.percentile(every, 50)),
+        "p95": float(np.percentile(every, 95)),
+        "worst_mean": max(means),
+        "fairness": _jain(means),
+        "waits": scheduler.summary(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sources", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--clips", type=int, default=6, help="utterances per source")
+    parser.add_argument("--clip", type=float, default=5.0, help="utterance length in seconds")
+    parser.add_argument("--samplerate", type=int, default=16_000)
+    parser.add_argument("--speed", type=float, default=10.0, help="time compression of the simulation")
+    parser.add_argument("--rtf", type=float, default=0.15, help="stand-in model real-time factor")
+    parser.add_argument("--pool-size", type=int, default=1)
+    parser.add_argument("--pool-mode", default="workers")
+    parser.add_argument("--model", help="real model to decode with, e.g. base.en")
+    parser.add_argument("--quantization", default="int8")
+    args = parser.parse_args()
+
+    if args.model:
+        from core.models.loader import load_model
+
+        pool = ModelPool.load(
+            lambda **kw: load_model(args.model, args.quantization, "cpu", **kw),
+            args.pool_size, args.pool_mode,
+        )
+    else:
+        pool = ModelPool([
+            Replica(_SleepingModel(args.rtf, args.speed), index=i) for i in range(args.pool_size)
+        ])
+
+    print(f"{'sources':>7} {'x realtime':>10} {'p50 s':>7} {'p95 s':>7} {'worst mean':>10} {'fairness':>8}")
+    for n in args.sources:
+        r = _run(n, pool, args)
+        print(
+            f"{n:>7} {r['throughput']:>10.2f} {r['p50']:>7.2f} {r['p95']:>7.2f} "
+            f"{r['worst_mean']:>10.2f} {r['fairness']:>8.3f}   {r['waits']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
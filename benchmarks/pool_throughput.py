@@ -0,0 +1,68 @@
+"""
+Throughput of the model pool from 1 to N concurrent jobs.
+
+For every pool size the same batch of clips is pushed through with as many
+concurrent jobs as the pool has slots, and clips per second and the
+speed-up over a single slot are reported.
+
+    python -m benchmarks.pool_throughput --model base.en --max-size 4 --mode workers
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+from core.models.loader import load_model
+from core.models.pool import ModelPool, split_threads
+from utils import release_freed_memory
+
+
+def _clip(seconds: float) -> np.ndarray:
+    t = np.arange(int(16_000 * seconds), dtype=np.float32) / 16_000
+    return (0.05 * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _job(pool: ModelPool, audio: np.ndarray) -> None:
+    with pool.lease() as model:
+        segments, _ = model.transcribe(audio, beam_size=1, condition_on_previous_text=False)
+        for _segment in segments:
+            pass
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="base.en")
+    parser.add_argument("--quantization", default="float32")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--mode", default="workers", choices=("workers", "replicas"))
+    parser.add_argument("--max-size", type=int, default=4)
+    parser.add_argument("--clips", type=int, default=16)
+    parser.add_argument("--clip-seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    audio = _clip(args.clip_seconds)
+    factory = partial(load_model, args.model, args.quantization, args.device)
+    baseline = None
+
+    print(f"{'slots':>6}{'threads/slot':>14}{'clips/s':>10}{'speed-up':>10}")
+    for size in range(1, args.max_size + 1):
+        pool = ModelPool.load(factory, size, args.mode)
+        _job(pool, audio)  # warm-up
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=size) as executor:
+            list(executor.map(lambda _: _job(pool, audio), range(args.clips)))
+        rate = args.clips / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{size:>6}{split_threads(size):>14}{rate:>10.2f}{rate / baseline:>9.2f}x")
+
+        del pool
+        release_freed_memory()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Benchmark compute types and store the fastest one per model.
+
+Run from the project folder:
+    python -m benchmarks.quantization distil-whisper-large-v3 --device cpu
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+
+from core.quantization import CheckQuantizationSupport, recommend_compute_type
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("models", nargs="+")
+    parser.add_argument("--device", default="cpu")
+    parser.add_argument("--compute-types", nargs="*")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--audio", help="speech sample to time instead of a synthetic signal")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    CheckQuantizationSupport().update_supported_quantizations()
+
+    for model_name in args.models:
+        fastest = recommend_compute_type(
+            model_name,
+            args.device,
+            compute_types=args.compute_types or None,
+            runs=args.runs,
+            audio_file=args.audio,
+        )
+        print(f"{model_name} on {args.device}: fastest compute type is {fastest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Memory and speed of ``SegmentStore`` against faster-whisper ``Segment`` objects.
+
+Builds a synthetic session of ``--hours`` of speech (about 2.5 words a
+second, ~12 words and ~20 tokens per segment, a few thousand distinct
+words) as faster-whisper ``Segment``/``Word`` objects, then measures with
+tracemalloc:
+
+* objects  - the list of segments, as kept by anything holding results;
+* store    - the same data in a ``SegmentStore`` (its ``nbytes`` and the
+  traced total, which includes the small Python wrappers);
+* file     - the size written by ``save``.
+
+It also times building the store, slicing a one-minute range, the binary
+round trip and each export format.
+
+    python -m benchmarks.segment_store --hours 1 4
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from faster_whisper.transcribe import Segment, Word
+
+from core.transcription.segments import SegmentStore
+
+WORDS_PER_S = 2.5
+WORDS_PER_SEGMENT = 12
+
+
+def _session(hours: float, vocabulary: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    lexicon = [" " + "".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 9))) for _ in range(vocabulary)]
+    weights = [1 / (rank + 1) for rank in range(vocabulary)]  # Zipf-like word frequencies
+    segments, t = [], 0.0
+    for i in range(int(hours * 3600 * WORDS_PER_S / WORDS_PER_SEGMENT)):
+        words = []
+        for token in rng.choices(lexicon, weights, k=WORDS_PER_SEGMENT):
+            length = len(token) * 0.06
+            words.append(Word(start=round(t, 2), end=round(t + length, 2), word=token, probability=rng.random()))
+            t += length + 0.1
+        segments.append(Segment(
+            id=i, seek=0, start=words[0].start, end=words[-1].end,
+            text="".join(w.word for w in words),
+            tokens=[rng.randrange(50_000) for _ in range(20)],
+            avg_logprob=-rng.random(), compression_ratio=1.5, no_speech_prob=rng.random() / 10,
+            words=words, temperature=0.0,
+        ))
+    return segments
+
+
+def _traced(build):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return value, size
+
+
+def _timed(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _mb(n: int) -> str:
+    return f"{n / 1e6:8.1f} MB"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--hours", type=float, nargs="+", default=[1.0])
+    parser.add_argument("--vocabulary", type=int, default=5000)
+    args = parser.parse_args()
+
+    for hours in args.hours:
+        segments, objects = _traced(lambda: _session(hours, args.vocabulary))
+        store, traced = _traced(lambda: SegmentStore.from_segments(segments))
+        assert store.joined_text() == "\n".join(s.text for s in segments)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = store.save(Path(tmp) / "session.wseg")
+            size = os.path.getsize(path)
+            load_s = _timed(lambda: SegmentStore.load(path).joined_text())
+            exports = {
+                fmt: _timed(lambda: store.export(Path(tmp) / f"session.{fmt}"), repeat=1)
+                for fmt in ("srt", "vtt", "json")
+            }
+        build_s = _timed(lambda: SegmentStore.from_segments(segments), repeat=1)
+        middle = store.duration / 2
+        slice_s = _timed(lambda: store.slice(middle, middle + 60), repeat=100)
+
+        print(f"{hours:g} h: {len(store)} segments, {store.word_count} words")
+        print(f"  objects  {_mb(objects)}")
+        print(f"  store    {_mb(store.nbytes)} (traced {_mb(traced).strip()}, {objects / traced:.1f}x smaller)")
+        print(f"  file     {_mb(size)}")
+        print(
+            f"  build {build_s:.2f}s, 1-min slice {slice_s * 1e6:.0f}us, load+join {load_s * 1e3:.0f}ms, "
+            + ", ".join(f"{fmt} {s:.2f}s" for fmt, s in exports.items())
+        )
+
+
+if __name__ == "__main__":
+    main()
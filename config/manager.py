@@ -3,6 +3,7 @@ Centralized configuration management for the Whisper transcriber.
 """
 from __future__ import annotations
 
+import copy
 import logging
 from pathlib import Path
 from typing import Any, Dict, Optional
@@ -22,6 +23,47 @@ class ConfigManager:
         "device_type": "cpu",
         "show_clipboard_window": True,
         "curate_transcription": True,
+        "keep_stream_open": False,
+        "preroll_ms": 300,
+        "stream_idle_timeout": 300,
+        "model_idle_timeout": 1800,
+        "model_store_dir": "models",
+        "model_hub_endpoint": "https://huggingface.co",
+        "download_workers": 8,
+        "quantization_benchmarks": {},
+        "int8_conversion": True,
+        "adaptive_models": [],
+        "latency_target": 4.0,
+        "decode_guard": True,
+        "recording_cache_size": 3,
+        "cache_features": False,
+        "model_pool_size": 1,
+        "model_pool_mode": "workers",
+        "use_daemon": False,
+        "daemon_autostart": True,
+        "long_file_threshold": 600,
+        "long_file_window": 60,
+        "long_file_overlap": 4,
+        "speculative_transcription": False,
+        "speculative_silence_ms": 700,
+        "live_features": True,
+        "batch_cpu_share": 0.5,
+        "capture_sources": [],
+        "history_enabled": True,
+        "history_db": "history.sqlite3",
+        "job_lease_s": 60,
+        "job_max_attempts": 3,
+        "job_worker_slots": 1,
+        "job_worker_daemon": False,
+        "prefetch_models": True,
+        "prefetch_max_mb": 2048,
+        "prefetch_count": 2,
+        "language_cache": True,
+        "language_min_probability": 0.8,
+        "language_recheck_clips": 10,
+        "language_recheck_s": 600,
+        "cpu_partition": False,
+        "capture_reserved_cores": 1,
         "supported_quantizations": {
             "cpu": [],
             "cuda": []
@@ -39,7 +81,7 @@ class ConfigManager:
     def load_config(self) -> Dict[str, Any]:
         if self._config_cache is None:
             self._config_cache = self._load_from_file()
-        return self._config_cache.copy()
+        return copy.deepcopy(self._config_cache)
 
     def _load_from_file(self) -> Dict[str, Any]:
         try:
@@ -52,7 +94,7 @@ class ConfigManager:
             logger.error(f"Error parsing config file: {e}")
             config = {}
 
-        merged_config = self.DEFAULT_CONFIG.copy()
+        merged_config = copy.deepcopy(self.DEFAULT_CONFIG)
         self._deep_update(merged_config, config)
         return merged_config
 
@@ -63,7 +105,7 @@ class ConfigManager:
             with self._config_path.open("w") as f:
                 yaml.safe_dump(config, f, sort_keys=False)
 
-            self._config_cache = config.copy()
+            self._config_cache = copy.deepcopy(config)
             logger.debug("Configuration saved successfully")
             
         except Exception as e:
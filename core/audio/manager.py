@@ -1,72 +1,224 @@
 # core/audio/manager.py
-from typing import Optional
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
-import tempfile
-import wave
-from PySide6.QtCore import QObject, Signal, Slot
-from .recording import RecordingThread
+import logging
+import queue
+from PySide6.QtCore import QObject, Signal
+from .recording import AudioRecorder, drain, write_temp_wav
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SOURCE = "default"
+
+
+class CaptureSource:
+    """One named input: its recorder and the sessions fed from the current recording."""
+
+    def __init__(self, name: str, recorder: AudioRecorder) -> None:
+        self.name = name
+        self.recorder = recorder
+        self.speculation = None
+        self.live = None
+
+    @property
+    def samplerate(self) -> int:
+        return self.recorder.samplerate
+
+    @property
+    def dtype(self) -> str:
+        return self.recorder.dtype
+
 
 class AudioManager(QObject):
+    """
+    Records from one or more named sources at once.
+
+    The source given to the constructor is ``DEFAULT_SOURCE``; ``add_source``
+    adds more (another device, or another line of an audio interface).  A
+    recording starts and stops every source together, and each source's
+    audio is handed on separately, tagged with its name.
+    """
     recording_started = Signal()
     recording_stopped = Signal()
-    audio_ready = Signal(str)  # file path
+    audio_ready = Signal(str, str)  # file path, source
+    speculative_audio_ready = Signal(object, str)  # SpeculativeSession, source
+    live_audio_ready = Signal(object, str)  # LiveFeatureSession, source
     audio_error = Signal(str)
-    
-    def __init__(self, samplerate: int = 44_100, channels: int = 1, dtype: str = "int16"):
+
+    def __init__(self, samplerate: int = 44_100, channels: int = 1, dtype: str = "int16",
+                 recorder: Optional[AudioRecorder] = None):
         super().__init__()
-        self.samplerate = samplerate
-        self.channels = channels
-        self.dtype = dtype
-        self._recording_thread: Optional[RecordingThread] = None
-    
+        self.recorder = recorder or AudioRecorder(samplerate, channels, dtype)
+        self.samplerate = self.recorder.samplerate
+        self.channels = self.recorder.channels
+        self.dtype = self.recorder.dtype
+        self._sources: Dict[str, CaptureSource] = {DEFAULT_SOURCE: CaptureSource(DEFAULT_SOURCE, self.recorder)}
+        self._speculator = None
+        self._pool_provider: Optional[Callable[[str], object]] = None
+        self._live_factory: Optional[Callable[[int, str], object]] = None
+        self._persistent = (False, 300, 300.0)
+
+    @property
+    def sources(self) -> List[str]:
+        return list(self._sources)
+
+    def add_source(self, name: str, device=None, samplerate: Optional[int] = None,
+                   channels: Optional[int] = None, recorder: Optional[AudioRecorder] = None) -> None:
+        """Record ``device`` (a sounddevice index or name) too, as source ``name``."""
+        if self.is_recording():
+            raise RuntimeError("Cannot add a source while recording")
+        if name in self._sources:
+            raise ValueError(f"Source {name!r} already exists")
+        recorder = recorder or AudioRecorder(
+            samplerate or self.samplerate, channels or self.channels, self.dtype, device=device
+        )
+        enabled, preroll_ms, idle_timeout_s = self._persistent
+        recorder.set_persistent_stream(enabled, preroll_ms, idle_timeout_s)
+        self._sources[name] = CaptureSource(name, recorder)
+
+    def remove_source(self, name: str) -> None:
+        if name == DEFAULT_SOURCE:
+            raise ValueError("The default source cannot be removed")
+        if self.is_recording():
+            raise RuntimeError("Cannot remove a source while recording")
+        source = self._sources.pop(name, None)
+        if source is not None:
+            source.recorder.close()
+
+    @property
+    def keep_stream_open(self) -> bool:
+        return self.recorder.keep_stream_open
+
+    def set_persistent_stream(self, enabled: bool, preroll_ms: int = 300, idle_timeout_s: float = 300.0) -> None:
+        """Switch between per-recording streams and one always-open stream per source."""
+        self._persistent = (enabled, preroll_ms, idle_timeout_s)
+        for source in self._sources.values():
+            source.recorder.set_persistent_stream(enabled, preroll_ms, idle_timeout_s)
+
+    def set_speculator(self, speculator, pool_provider: Optional[Callable[[str], object]] = None) -> None:
+        """
+        Transcribe speculatively during pauses while recording.
+
+        ``speculator`` is a ``SpeculativeTranscriber`` (None disables it) and
+        ``pool_provider(source)`` returns the model pool to decode with.
+        """
+        self._speculator = speculator
+        self._pool_provider = pool_provider
+
+    def set_live_features(self, session_factory: Optional[Callable[[int, str], object]]) -> None:
+        """
+        Compute log-mel features while recording.
+
+        ``session_factory(samplerate, dtype)`` returns a ``LiveFeatureSession``
+        for the current model, or None when its features cannot be
+        precomputed; passing None disables live features.  Speculative
+        transcription takes precedence.
+        """
+        self._live_factory = session_factory
+
+    def capture_metrics(self, source: str = DEFAULT_SOURCE) -> dict:
+        """Health of the last (or current) recording: dropouts, jitter, buffering."""
+        return self._sources[source].recorder.telemetry.snapshot()
+
+    def capture_summary(self, source: str = DEFAULT_SOURCE) -> str:
+        return self._sources[source].recorder.telemetry.summary()
+
+    def is_recording(self) -> bool:
+        return any(source.recorder.is_recording() for source in self._sources.values())
+
     def start_recording(self) -> bool:
-        """Start audio recording."""
-        if self._recording_thread and self._recording_thread.isRunning():
+        """Start recording from every source; if one fails, none keeps recording."""
+        if self.is_recording():
             return False
-            
-        self._recording_thread = RecordingThread(
-            self.samplerate, self.channels, self.dtype
-        )
-        self._recording_thread.recording_error.connect(self.audio_error)
-        self._recording_thread.recording_finished.connect(self._on_recording_finished)
-        self._recording_thread.start()
+        started = []
+        for source in self._sources.values():
+            source.speculation = self._begin_speculation(source)
+            source.live = None if source.speculation else self._begin_live_features(source)
+            try:
+                if not source.recorder.start():
+                    raise RuntimeError("already recording")
+            except Exception as e:
+                self._abandon(source)
+                for other in started:
+                    other.recorder.stop()
+                    self._abandon(other)
+                label = "" if len(self._sources) == 1 else f" ({source.name})"
+                self.audio_error.emit(f"Recording error{label}: {e}")
+                return False
+            started.append(source)
         self.recording_started.emit()
         return True
-    
+
     def stop_recording(self) -> None:
         """Stop audio recording."""
-        if self._recording_thread and self._recording_thread.isRunning():
-            self._recording_thread.stop()
-            self.recording_stopped.emit()
-    
-    @Slot()
-    def _on_recording_finished(self) -> None:
+        stopped = [(source, source.recorder.stop()) for source in self._sources.values()]
+        stopped = [(source, buffer) for source, buffer in stopped if buffer is not None]
+        if not stopped:
+            return
+        for source, _buffer in stopped:
+            source.recorder.set_block_listener(None)
+        self.recording_stopped.emit()
+        for source, buffer in stopped:
+            self._finish_source(source, buffer)
+
+    def _finish_source(self, source: CaptureSource, buffer: queue.Queue) -> None:
+        session, source.speculation = source.speculation, None
+        live, source.live = source.live, None
+        if session is not None:
+            session.close()
+            drain(buffer, source.recorder.telemetry)
+            self.speculative_audio_ready.emit(session, source.name)
+            return
+        if live is not None:
+            live.close()
+            drain(buffer, source.recorder.telemetry)
+            self.live_audio_ready.emit(live, source.name)
+            return
+        self._on_recording_finished(source, buffer)
+
+    def _abandon(self, source: CaptureSource) -> None:
+        if source.speculation is not None:
+            source.speculation.close()
+            source.speculation = None
+        if source.live is not None:
+            source.live.close()
+            source.live = None
+        source.recorder.set_block_listener(None)
+
+    def _begin_speculation(self, source: CaptureSource):
+        pool = self._pool_provider(source.name) if self._speculator and self._pool_provider else None
+        session = self._speculator.begin(pool, source.samplerate, source.dtype) if pool else None
+        source.recorder.set_block_listener(session.feed if session else None)
+        return session
+
+    def _begin_live_features(self, source: CaptureSource):
+        if self._live_factory is None:
+            return None
+        try:
+            session = self._live_factory(source.samplerate, source.dtype)
+        except Exception as exc:
+            logger.warning("Live feature extraction unavailable: %s", exc)
+            return None
+        if session is not None:
+            source.recorder.set_block_listener(session.feed)
+        return session
+
+    def _on_recording_finished(self, source: CaptureSource, buffer: queue.Queue) -> None:
         """Handle recording completion and save to file."""
         try:
-            audio_file = self._save_recording_to_file()
-            self.audio_ready.emit(str(audio_file))
+            audio_file = self._save_recording_to_file(source, buffer)
+            self.audio_ready.emit(str(audio_file), source.name)
         except Exception as e:
             self.audio_error.emit(f"Failed to save audio: {e}")
-    
-    def _save_recording_to_file(self) -> Path:
+
+    def _save_recording_to_file(self, source: CaptureSource, buffer: queue.Queue) -> Path:
         """Save recorded audio to temporary WAV file."""
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tf:
-            path = Path(tf.name)
-        
-        with wave.open(str(path), "wb") as wf:
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(self._sample_width())
-            wf.setframerate(self.samplerate)
-            while not self._recording_thread.buffer.empty():
-                wf.writeframes(self._recording_thread.buffer.get().tobytes())
-        
-        return path
-    
-    def _sample_width(self) -> int:
-        return {"int16": 2, "int32": 4, "float32": 4}.get(self.dtype, 2)
-    
+        recorder = source.recorder
+        return write_temp_wav(
+            drain(buffer, recorder.telemetry), recorder.samplerate, recorder.channels, recorder.dtype
+        )
+
     def cleanup(self) -> None:
         """Clean up audio resources."""
-        if self._recording_thread and self._recording_thread.isRunning():
-            self._recording_thread.stop()
-            self._recording_thread.wait()
\ No newline at end of file
+        for source in self._sources.values():
+            source.recorder.close()
@@ -1,5 +1,5 @@
 """
-Audio-capture thread and tiny WAV helpers.
+Qt-free audio capture and tiny WAV helpers.
 
 Placed in: myapp/core/audio/recording.py
 """
@@ -10,82 +10,419 @@ import queue
 import tempfile
 import threading
 import wave
-from contextlib import contextmanager
+from collections import deque
 from pathlib import Path
-from typing import Iterator
+from typing import Callable, Iterable, Optional
 
 import sounddevice as sd
-from PySide6.QtCore import QThread, Signal
 
+from ..cpu import cpu_partition
+from .telemetry import CaptureTelemetry
 
 logger = logging.getLogger(__name__)
 
 
-class RecordingThread(QThread):
+def sample_width_from_dtype(dtype: str) -> int:
+    return {"int16": 2, "int32": 4, "float32": 4}.get(dtype, 2)
 
-    update_status_signal = Signal(str)
-    recording_error = Signal(str)
-    recording_finished = Signal()
 
-    def __init__(self, samplerate: int = 44_100, channels: int = 1, dtype: str = "int16") -> None:
-        super().__init__()
+def drain(buffer: Optional[queue.Queue], telemetry: Optional[CaptureTelemetry] = None) -> list:
+    """Pop every block currently in a capture queue."""
+    blocks = []
+    while buffer is not None and not buffer.empty():
+        blocks.append(buffer.get())
+    if telemetry is not None:
+        telemetry.consumed(sum(len(block) for block in blocks))
+    return blocks
+
+
+def write_wav(
+    blocks: Iterable,
+    outfile: str | Path,
+    samplerate: int,
+    channels: int,
+    dtype: str,
+) -> Path:
+    outfile = Path(outfile)
+    with wave.open(str(outfile), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(sample_width_from_dtype(dtype))
+        wf.setframerate(samplerate)
+        for block in blocks:
+            wf.writeframes(block.tobytes())
+    return outfile
+
+
+def write_temp_wav(blocks: Iterable, samplerate: int, channels: int, dtype: str) -> Path:
+    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
+    tmp.close()
+    return write_wav(blocks, tmp.name, samplerate, channels, dtype)
+
+
+def to_whisper_audio(blocks: list, dtype: str, samplerate: Optional[int] = None):
+    """
+    Concatenate captured blocks into mono float32 in [-1, 1].
+
+    If ``samplerate`` is given the result is resampled to 16 kHz.
+    """
+    import numpy as np
+
+    if not blocks:
+        return np.zeros(0, dtype=np.float32)
+    audio = np.concatenate(blocks).astype(np.float32)
+    if audio.ndim > 1:
+        audio = audio.mean(axis=1)
+    scale = {"int16": 32768.0, "int32": 2147483648.0}.get(dtype)
+    audio = audio / scale if scale else audio
+    if samplerate and samplerate != 16_000:
+        audio = resample_audio(audio, samplerate, 16_000)
+    return audio
+
+
+def resample_audio(audio, rate: int, target: int = 16_000):
+    """Band-limited resampling of mono float32 audio through PyAV."""
+    import numpy as np
+
+    resampler = StreamingResampler(rate, target)
+    out = [resampler.process(audio), resampler.flush()]
+    return np.concatenate(out)
+
+
+class StreamingResampler:
+    """
+    Resample mono float32 audio a chunk at a time.
+
+    The filter state carries across chunks, so the concatenated output is
+    identical to resampling the whole signal at once.
+    """
+
+    def __init__(self, rate: int, target: int = 16_000) -> None:
+        import av
+
+        self.rate = rate
+        self.target = target
+        self._resampler = av.audio.resampler.AudioResampler(format="flt", layout="mono", rate=target)
+
+    def process(self, audio):
+        import av
+        import numpy as np
+
+        if not len(audio):
+            return np.zeros(0, dtype=np.float32)
+        frame = av.AudioFrame.from_ndarray(
+            np.clip(audio, -1.0, 1.0).astype(np.float32).reshape(1, -1), format="flt", layout="mono"
+        )
+        frame.sample_rate = self.rate
+        return self._collect(self._resampler.resample(frame))
+
+    def flush(self):
+        """Samples still held in the filter; call once after the last chunk."""
+        return self._collect(self._resampler.resample(None))
+
+    @staticmethod
+    def _collect(frames):
+        import numpy as np
+
+        out = [f.to_ndarray().reshape(-1) for f in frames]
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+class AudioRecorder:
+    """
+    Start/stop audio capture into an in-memory queue.
+
+    By default each recording opens its own input stream.  With
+    ``set_persistent_stream(True)`` one ``PersistentInputStream`` stays open
+    between recordings, so starting is instant and includes a short pre-roll;
+    it is closed again after ``idle_timeout_s`` without a recording (0: never).
+    """
+
+    def __init__(
+        self,
+        samplerate: int = 44_100,
+        channels: int = 1,
+        dtype: str = "int16",
+        stream_factory: Optional[Callable[..., object]] = None,
+        device=None,
+    ) -> None:
         self.samplerate = samplerate
         self.channels = channels
         self.dtype = dtype
-        self.buffer: queue.Queue = queue.Queue()
-
-    @contextmanager
-    def _audio_stream(self) -> Iterator[None]:
-        stream = sd.InputStream(
-            samplerate=self.samplerate,
-            channels=self.channels,
-            dtype=self.dtype,
-            callback=self._audio_callback,
+        self.device = device  # sounddevice index or name; None for the default input
+        self._stream_factory = stream_factory or sd.InputStream
+        self._lock = threading.Lock()
+        self._stream = None
+        self._buffer: Optional[queue.Queue] = None
+        self._persistent: Optional[PersistentInputStream] = None
+        self._idle_timeout = 0.0
+        self._idle_timer: Optional[threading.Timer] = None
+        self.telemetry = CaptureTelemetry(samplerate)
+        self._block_listener: Optional[Callable[[object], None]] = None
+        self._probe = None  # set while the stream opens, until its first callback
+
+    @property
+    def keep_stream_open(self) -> bool:
+        return self._persistent is not None
+
+    def set_persistent_stream(self, enabled: bool, preroll_ms: int = 300, idle_timeout_s: float = 300.0) -> None:
+        """Switch between per-recording streams and one always-open stream."""
+        if self.is_recording():
+            return
+        self._close_persistent()
+        self._persistent = None
+        if not enabled:
+            return
+        self._persistent = PersistentInputStream(
+            self.samplerate,
+            self.channels,
+            self.dtype,
+            preroll_seconds=preroll_ms / 1000,
+            stream_factory=self._stream_factory,
+            telemetry=self.telemetry,
+            device=self.device,
         )
+        self._persistent.listener = self._block_listener
+        self._idle_timeout = max(0.0, float(idle_timeout_s))
         try:
-            with stream:
-                yield
-        finally:
-            stream.close()
+            self._persistent.open()
+        except Exception as exc:
+            logger.warning("Could not open input stream: %s", exc)
+        self._restart_idle_timer()
+
+    def set_block_listener(self, listener: Optional[Callable[[object], None]]) -> None:
+        """
+        Also hand every captured block to ``listener`` (on the audio thread).
+
+        Set it before ``start``; it must be quick and must not block.
+        """
+        self._block_listener = listener
+        if self._persistent is not None:
+            self._persistent.listener = listener
+
+    def is_recording(self) -> bool:
+        if self._persistent is not None:
+            return self._persistent.is_capturing
+        return self._buffer is not None
+
+    def start(self) -> bool:
+        """Begin capturing; False if already recording. Stream errors propagate."""
+        with self._lock:
+            if self.is_recording():
+                return False
+            self.telemetry.begin_session()
+            if self._persistent is not None:
+                self._cancel_idle_timer()
+                self._persistent.open()
+                self._persistent.begin_capture()
+                return True
+
+            buffer: queue.Queue = queue.Queue()
+            with cpu_partition.capture_stream() as probe:
+                self._probe = probe
+                stream = self._stream_factory(
+                    samplerate=self.samplerate,
+                    channels=self.channels,
+                    dtype=self.dtype,
+                    callback=self._audio_callback,
+                    device=self.device,
+                )
+                self._buffer = buffer
+                try:
+                    stream.start()
+                except Exception:
+                    self._buffer = None
+                    stream.close()
+                    raise
+            self._stream = stream
+            return True
+
+    def stop(self) -> Optional[queue.Queue]:
+        """Stop capturing and return the queue of recorded blocks."""
+        with self._lock:
+            if self._persistent is not None:
+                if not self._persistent.is_capturing:
+                    return None
+                buffer = self._persistent.end_capture()
+                self._restart_idle_timer()
+                self.telemetry.end_session()
+                return buffer
+
+            stream, self._stream = self._stream, None
+            if stream is not None:
+                try:
+                    stream.stop()
+                finally:
+                    stream.close()
+            buffer, self._buffer = self._buffer, None
+            if buffer is not None:
+                self.telemetry.end_session()
+            return buffer
+
+    def close(self) -> None:
+        self.stop()
+        self._close_persistent()
 
     def _audio_callback(self, indata, frames, timestamp, status) -> None:  # noqa: D401, N802
+        probe = self._probe
+        if probe is not None:
+            self._probe = None
+            probe.report()
+        started = self.telemetry.callback_started(frames, status)
         if status:
             logger.warning(status)
-        self.buffer.put(indata.copy())
+        buffer = self._buffer
+        if buffer is not None:
+            block = indata.copy()
+            buffer.put(block)
+            self.telemetry.produced(frames)
+            listener = self._block_listener
+            if listener is not None:
+                listener(block)
+        self.telemetry.callback_finished(started)
 
-    def run(self) -> None:  # noqa: D401
-        self.update_status_signal.emit("Recording.")
-        try:
-            with self._audio_stream():
-                gate = threading.Event()
-                while not self.isInterruptionRequested():
-                    gate.wait(timeout=1.0)
-        except Exception as exc:  # pragma: no cover
-            self.recording_error.emit(f"Recording error: {exc}")
-        finally:
-            self.recording_finished.emit()
-
-    def stop(self) -> None:
-        self.requestInterruption()
+    def _cancel_idle_timer(self) -> None:
+        if self._idle_timer is not None:
+            self._idle_timer.cancel()
+            self._idle_timer = None
 
-    @staticmethod
-    def _sample_width_from_dtype(dtype: str) -> int:
-        return {"int16": 2, "int32": 4, "float32": 4}.get(dtype, 2)
+    def _restart_idle_timer(self) -> None:
+        self._cancel_idle_timer()
+        # 0 keeps the stream open until it is switched off, as for idle model unloading.
+        if self._idle_timeout and self._persistent is not None and self._persistent.is_open:
+            self._idle_timer = threading.Timer(self._idle_timeout, self._on_stream_idle)
+            self._idle_timer.daemon = True
+            self._idle_timer.start()
+
+    def _on_stream_idle(self) -> None:
+        with self._lock:
+            if self._persistent is not None and not self._persistent.is_capturing:
+                logger.info("Closing idle input stream")
+                self._persistent.close()
 
-    def dump_to_wav(self, outfile: str | Path) -> Path:
+    def _close_persistent(self) -> None:
+        self._cancel_idle_timer()
+        if self._persistent is not None:
+            try:
+                self._persistent.close()
+            except Exception as exc:
+                logger.warning("Failed to close input stream: %s", exc)
 
-        outfile = Path(outfile)
-        with wave.open(str(outfile), "wb") as wf:
-            wf.setnchannels(self.channels)
-            wf.setsampwidth(self._sample_width_from_dtype(self.dtype))
-            wf.setframerate(self.samplerate)
 
-            while not self.buffer.empty():
-                wf.writeframes(self.buffer.get().tobytes())
-        return outfile
+class PersistentInputStream:
+    """
+    A single long-lived input stream with a circular pre-roll buffer.
 
-    def dump_to_temp_wav(self) -> Path:
+    While idle the callback keeps only the most recent ``preroll_seconds`` of
+    audio.  ``begin_capture`` hands that pre-roll to a fresh queue and routes
+    every following block into it until ``end_capture`` is called.
+    ``stream_factory`` defaults to ``sd.InputStream``; pass a stand-in with the
+    same ``start``/``stop``/``close`` surface to drive it without a device.
+    Callbacks made while capturing are recorded in ``telemetry`` if given.
+    """
 
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        tmp.close()
-        return self.dump_to_wav(tmp.name)
+    def __init__(
+        self,
+        samplerate: int = 44_100,
+        channels: int = 1,
+        dtype: str = "int16",
+        preroll_seconds: float = 0.3,
+        stream_factory: Optional[Callable[..., object]] = None,
+        telemetry: Optional[CaptureTelemetry] = None,
+        device=None,
+    ) -> None:
+        self.samplerate = samplerate
+        self.channels = channels
+        self.dtype = dtype
+        self.device = device
+        self.telemetry = telemetry
+        self.listener: Optional[Callable[[object], None]] = None
+        self.max_preroll_frames = max(0, int(samplerate * preroll_seconds))
+        self._stream_factory = stream_factory or sd.InputStream
+        self._stream = None
+        self._lock = threading.Lock()
+        self._preroll: deque = deque()
+        self._preroll_frames = 0
+        self._capture: Optional[queue.Queue] = None
+        self._probe = None  # set while the stream opens, until its first callback
+
+    @property
+    def is_open(self) -> bool:
+        return self._stream is not None
+
+    @property
+    def is_capturing(self) -> bool:
+        return self._capture is not None
+
+    def open(self) -> None:
+        if self._stream is not None:
+            return
+        with cpu_partition.capture_stream() as probe:
+            self._probe = probe
+            stream = self._stream_factory(
+                samplerate=self.samplerate,
+                channels=self.channels,
+                dtype=self.dtype,
+                callback=self._audio_callback,
+                device=self.device,
+            )
+            stream.start()
+        self._stream = stream
+        logger.debug("Persistent input stream opened")
+
+    def close(self) -> None:
+        stream, self._stream = self._stream, None
+        if stream is not None:
+            try:
+                stream.stop()
+            finally:
+                stream.close()
+            logger.debug("Persistent input stream closed")
+        with self._lock:
+            self._preroll.clear()
+            self._preroll_frames = 0
+
+    def begin_capture(self) -> queue.Queue:
+        """Start routing audio into a new queue, seeded with the pre-roll."""
+        capture: queue.Queue = queue.Queue()
+        with self._lock:
+            for block in self._preroll:
+                capture.put(block)
+                if self.telemetry is not None:
+                    self.telemetry.produced(len(block))
+                if self.listener is not None:
+                    self.listener(block)
+            self._preroll.clear()
+            self._preroll_frames = 0
+            self._capture = capture
+        return capture
+
+    def end_capture(self) -> Optional[queue.Queue]:
+        with self._lock:
+            capture, self._capture = self._capture, None
+        return capture
+
+    def _audio_callback(self, indata, frames, timestamp, status) -> None:  # noqa: D401, N802
+        probe = self._probe
+        if probe is not None:
+            self._probe = None
+            probe.report()
+        telemetry = self.telemetry if self._capture is not None else None
+        started = telemetry.callback_started(frames, status) if telemetry else 0.0
+        if status:
+            logger.warning(status)
+        block = indata.copy()
+        with self._lock:
+            if self._capture is not None:
+                self._capture.put(block)
+                if self.listener is not None:
+                    self.listener(block)
+                if telemetry is not None:
+                    telemetry.produced(frames)
+                    telemetry.callback_finished(started)
+                return
+            if not self.max_preroll_frames:
+                return
+            self._preroll.append(block)
+            self._preroll_frames += len(block)
+            while self._preroll and self._preroll_frames - len(self._preroll[0]) >= self.max_preroll_frames:
+                self._preroll_frames -= len(self._preroll.popleft())
@@ -0,0 +1,172 @@
+"""
+Capture health telemetry.
+
+The input callback runs on PortAudio's real-time thread, so the counters
+and histograms here do a bisect and a few additions per block and nothing
+else.  Per recording ("session") they track:
+
+* status flags - input/output overflows and underflows reported by
+  PortAudio; an input overflow means audio was dropped.
+* jitter - how far each callback's arrival strays from the block period.
+* callback time - how long our own callback body takes.
+* buffer depth - the high-water mark of captured audio not yet consumed.
+
+``snapshot()`` returns a plain dict for logging or display and ``summary()``
+a one-line description for the status bar.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from typing import Optional, Sequence
+
+# Upper bounds in milliseconds; the last bucket catches everything larger.
+LATENCY_BUCKETS_MS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+STATUS_FLAGS = ("input_overflow", "input_underflow", "output_overflow", "output_underflow")
+
+
+class Histogram:
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        self.bounds = tuple(bounds)
+        self.reset()
+
+    def reset(self) -> None:
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding the ``q``-th percentile."""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                return self.bounds[i] if i < len(self.bounds) else self.max
+        return self.max
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max,
+            "buckets": dict(zip([*self.bounds, float("inf")], self.counts)),
+        }
+
+
+class CaptureTelemetry:
+    """Per-recording capture health, plus totals across recordings."""
+
+    def __init__(self, samplerate: int) -> None:
+        self.samplerate = samplerate
+        self._lock = threading.Lock()
+        self.totals: Counter = Counter()
+        self.jitter_ms = Histogram()
+        self.callback_ms = Histogram()
+        self._reset_session()
+
+    def _reset_session(self) -> None:
+        self.flags: Counter = Counter()
+        self.callbacks = 0
+        self.frames = 0
+        self.depth_frames = 0
+        self.high_water_frames = 0
+        self.jitter_ms.reset()
+        self.callback_ms.reset()
+        self._last_arrival: Optional[float] = None
+        self.started = time.monotonic()
+        self.ended: Optional[float] = None
+
+    def begin_session(self) -> None:
+        with self._lock:
+            self._reset_session()
+
+    def end_session(self) -> dict:
+        with self._lock:
+            self.ended = time.monotonic()
+            self.totals["recordings"] += 1
+        return self.snapshot()
+
+    def callback_started(self, frames: int, status=None) -> float:
+        """Record a block's arrival; returns the start time for ``callback_finished``."""
+        now = time.perf_counter()
+        with self._lock:
+            if self._last_arrival is not None:
+                expected = frames / self.samplerate
+                self.jitter_ms.add(abs(now - self._last_arrival - expected) * 1000)
+            self._last_arrival = now
+            self.callbacks += 1
+            self.frames += frames
+            if status:
+                for flag in STATUS_FLAGS:
+                    if getattr(status, flag, False):
+                        self.flags[flag] += 1
+                        self.totals[flag] += 1
+        return now
+
+    def callback_finished(self, started: float) -> None:
+        elapsed = (time.perf_counter() - started) * 1000
+        with self._lock:
+            self.callback_ms.add(elapsed)
+
+    def produced(self, frames: int) -> None:
+        """``frames`` were queued for the consumer."""
+        with self._lock:
+            self.depth_frames += frames
+            if self.depth_frames > self.high_water_frames:
+                self.high_water_frames = self.depth_frames
+
+    def consumed(self, frames: int) -> None:
+        with self._lock:
+            self.depth_frames = max(0, self.depth_frames - frames)
+
+    @property
+    def dropped_audio(self) -> bool:
+        return bool(self.flags["input_overflow"])
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            end = self.ended if self.ended is not None else time.monotonic()
+            return {
+                "duration_s": end - self.started,
+                "callbacks": self.callbacks,
+                "frames": self.frames,
+                "flags": {flag: self.flags[flag] for flag in STATUS_FLAGS},
+                "jitter_ms": self.jitter_ms.snapshot(),
+                "callback_ms": self.callback_ms.snapshot(),
+                "buffer_depth_s": self.depth_frames / self.samplerate,
+                "buffer_high_water_s": self.high_water_frames / self.samplerate,
+                "totals": dict(self.totals),
+            }
+
+    def summary(self) -> str:
+        snap = self.snapshot()
+        overflows = snap["flags"]["input_overflow"]
+        underflows = snap["flags"]["input_underflow"]
+        health = (
+            f"{overflows} overflow(s), audio may be missing"
+            if overflows else "no dropouts"
+        )
+        if underflows:
+            health += f", {underflows} underflow(s)"
+        return (
+            f"Audio: {health}; jitter p95 {snap['jitter_ms']['p95']:g} ms, "
+            f"callback p99 {snap['callback_ms']['p99']:g} ms"
+        )
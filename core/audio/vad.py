@@ -0,0 +1,74 @@
+"""
+Block-level energy voice activity detection.
+
+Cheap enough to run on the capture callback: one RMS per block.  A block
+counts as speech when it is clearly above the noise floor (the quietest
+block of the last few seconds, so it follows a changing room) or loud in
+absolute terms, which covers recordings that start mid-sentence before any
+floor has been heard.
+"""
+from __future__ import annotations
+
+import math
+from collections import deque
+from typing import Optional
+
+import numpy as np
+
+_FULL_SCALE = {"int16": 32768.0, "int32": 2147483648.0}
+
+
+def block_dbfs(block: np.ndarray, dtype: str) -> float:
+    scale = _FULL_SCALE.get(dtype, 1.0)
+    if not len(block):
+        return -math.inf
+    rms = float(np.sqrt(np.mean(np.square(block, dtype=np.float64)))) / scale
+    return 20 * math.log10(rms) if rms > 0 else -math.inf
+
+
+class EnergyVAD:
+
+    def __init__(
+        self,
+        samplerate: int,
+        dtype: str = "int16",
+        margin_db: float = 12.0,
+        min_speech_db: float = -50.0,
+        loud_db: float = -35.0,
+        floor_window_s: float = 3.0,
+        block_hint: int = 1024,
+    ) -> None:
+        self.samplerate = samplerate
+        self.dtype = dtype
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.loud_db = loud_db
+        self._levels: deque[float] = deque(maxlen=max(1, int(floor_window_s * samplerate / block_hint)))
+        self.frames = 0
+        self.last_speech_end: Optional[int] = None  # frame index just after the last speech block
+
+    @property
+    def noise_floor_db(self) -> float:
+        return min(self._levels) if self._levels else -math.inf
+
+    def feed(self, block: np.ndarray) -> bool:
+        """Classify one block; returns True if it contains speech."""
+        level = block_dbfs(block, self.dtype)
+        self._levels.append(level)
+        threshold = max(self.min_speech_db, min(self.noise_floor_db + self.margin_db, self.loud_db))
+        self.frames += len(block)
+        speech = level >= threshold
+        if speech:
+            self.last_speech_end = self.frames
+        return speech
+
+    @property
+    def heard_speech(self) -> bool:
+        return self.last_speech_end is not None
+
+    @property
+    def trailing_silence_s(self) -> float:
+        """Seconds since the last speech block (0 while speaking or before any speech)."""
+        if self.last_speech_end is None:
+            return 0.0
+        return (self.frames - self.last_speech_end) / self.samplerate
@@ -1,60 +1,253 @@
 # core/controller.py
 from __future__ import annotations
 
+import logging
+import sqlite3
+import time
+import wave
+from dataclasses import dataclass, field
+from typing import Optional
+
 from PySide6.QtCore import QObject, Signal, Slot
 from PySide6.QtWidgets import QApplication
 
 from config.manager import config_manager
+from core.cpu import cpu_partition
+from core.daemon import DaemonClient, RemoteModelFactory
+from core.engine import TranscriptionEngine
+from core.history import HistoryStore
 from core.models.manager import ModelManager
+from core.models.policy import ModelSelectionPolicy, SelectionDecision
 from core.audio.manager import AudioManager
+from core.transcription.longform import audio_duration
 from core.transcription.service import TranscriptionService
+from core.transcription.live import begin_live_features
+from core.transcription.priority import BATCH
+from core.transcription.segments import SegmentStore
+from core.transcription.speculative import SpeculativeTranscriber
+from utils import format_bytes, get_resource_path
+
+logger = logging.getLogger(__name__)
+
+
+def _wav_duration(audio_file: str) -> float:
+    try:
+        with wave.open(audio_file, "rb") as wf:
+            return wf.getnframes() / float(wf.getframerate() or 1)
+    except (OSError, wave.Error):
+        return 0.0
+
+
+@dataclass
+class _Job:
+    """One transcription, from dispatch to its result."""
+    key: Optional[tuple] = None  # model used, None for the current one
+    audio_seconds: Optional[float] = None
+    batch: bool = False
+    decision: Optional[SelectionDecision] = None
+    speculation: object = None
+    capture_summary: Optional[str] = None
+    source: Optional[str] = None
+    group: Optional["_SourceGroup"] = None
+    segments: Optional[SegmentStore] = None
+    started: float = field(default_factory=time.perf_counter)
+    decode_started: Optional[float] = None  # set once a worker holds a model
+
+    def decode_seconds(self) -> float:
+        """Time since decoding began, excluding queueing and model loading where known."""
+        return time.perf_counter() - (self.started if self.decode_started is None else self.decode_started)
+
+
+@dataclass
+class _SourceGroup:
+    """The per-source jobs of one multi-source recording, joined into one result."""
+    sources: list
+    results: dict = field(default_factory=dict)
+
+    def add(self, source: str, text: str) -> bool:
+        """Record one source's text; True once every source has reported."""
+        self.results[source] = text
+        return len(self.results) == len(self.sources)
+
+    def text(self) -> str:
+        return "\n\n".join(
+            f"[{name}]\n{self.results[name]}" for name in self.sources if self.results.get(name, "").strip()
+        )
+
 
 class TranscriberController(QObject):
     update_status_signal = Signal(str)
     enable_widgets_signal = Signal(bool)
     text_ready_signal = Signal(str)
     model_loaded_signal = Signal(str, str, str)
+    history_added_signal = Signal(object)  # HistoryEntry
 
     def __init__(self, samplerate: int = 44_100, channels: int = 1, dtype: str = "int16", curate: bool = False):
         super().__init__()
 
-        self.model_manager = ModelManager()
+        self._daemon = self._attach_daemon()
+        self.engine = TranscriptionEngine(
+            curate, model_factory=RemoteModelFactory(self._daemon) if self._daemon else None
+        )
+        self.model_manager = ModelManager(self.engine.models)
         self.audio_manager = AudioManager(samplerate, channels, dtype)
-        self.transcription_service = TranscriptionService(curate)
+        self.transcription_service = TranscriptionService(transcriber=self.engine.transcriber)
+        self._pending_audio: list[tuple] = []  # (WAV path or LiveFeatureSession, source)
+        self._selection_policy: Optional[ModelSelectionPolicy] = None
+        self._capture_summaries: dict[str, str] = {}
+        self._group: Optional[_SourceGroup] = None
+        self.last_segments: Optional[SegmentStore] = None
+        self.history = self._open_history()
 
         self._connect_signals()
 
         self._load_settings()
 
+    @staticmethod
+    def _attach_daemon() -> Optional[DaemonClient]:
+        """Client for the resident daemon when enabled, else None to load in-process."""
+        if not config_manager.get_value("use_daemon", False):
+            return None
+        try:
+            client = DaemonClient.connect(autostart=config_manager.get_value("daemon_autostart", True))
+        except Exception as exc:
+            logger.warning("Could not reach the transcription daemon: %s", exc)
+            client = None
+        if client is None:
+            logger.warning("Transcription daemon unavailable, loading the model in-process")
+        else:
+            logger.info("Attached to transcription daemon at %s", client.address)
+        return client
+
+    @staticmethod
+    def _open_history() -> Optional[HistoryStore]:
+        if not config_manager.get_value("history_enabled", True):
+            return None
+        path = get_resource_path(config_manager.get_value("history_db", "history.sqlite3"))
+        try:
+            return HistoryStore(path)
+        except sqlite3.Error as exc:
+            logger.warning("Transcription history disabled, could not open %s: %s", path, exc)
+            return None
+
+    def _begin_job(self, audio_seconds: Optional[float], batch: bool = False,
+                   source: Optional[str] = None) -> _Job:
+        job = _Job(self.model_manager.current_key, audio_seconds, batch, source=source)
+        if not batch:
+            # The capture summary belongs to the recording this job transcribes.
+            job.capture_summary = self._capture_summaries.pop(source, None)
+            job.group = self._group
+        return job
+
+    def _record_history(self, job: Optional[_Job], text: str) -> None:
+        if self.history is None or job is None or not text.strip():
+            return
+        name, quant, device = job.key or (None, None, None)
+        try:
+            entry = self.history.add(
+                text, name, quant, device, job.audio_seconds, job.decode_seconds()
+            )
+        except sqlite3.Error as exc:
+            logger.warning("Could not save transcription to history: %s", exc)
+            return
+        self.history_added_signal.emit(entry)
+
     def _connect_signals(self) -> None:
 
         self.model_manager.model_loaded.connect(self._on_model_loaded)
         self.model_manager.model_error.connect(self._on_model_error)
-
-        self.audio_manager.recording_started.connect(
-            lambda: self.update_status_signal.emit("Recording...")
+        self.model_manager.model_unloaded.connect(self._on_model_unloaded)
+        self.model_manager.download_progress.connect(self._on_download_progress)
+        self.model_manager.load_superseded.connect(
+            lambda name: logger.info("Dropped superseded load of %s", name)
         )
+
+        self.audio_manager.recording_started.connect(self._on_recording_started)
+        self.audio_manager.recording_stopped.connect(self._on_recording_stopped)
         self.audio_manager.audio_ready.connect(self._on_audio_ready)
+        self.audio_manager.speculative_audio_ready.connect(self._on_speculative_audio_ready)
+        self.audio_manager.live_audio_ready.connect(self._on_live_audio_ready)
         self.audio_manager.audio_error.connect(self._on_audio_error)
 
         self.transcription_service.transcription_started.connect(
-            lambda: self.update_status_signal.emit("Transcribing...")
+            lambda job: self.update_status_signal.emit(
+                "Transcribing in the background..." if job is not None and job.batch else "Transcribing..."
+            )
         )
+        self.transcription_service.decode_started.connect(self._on_decode_started)
         self.transcription_service.transcription_completed.connect(self._on_transcription_completed)
+        self.transcription_service.segments_ready.connect(self._on_segments_ready)
         self.transcription_service.transcription_error.connect(self._on_transcription_error)
     
     def update_model(self, model_name: str, quant: str, device: str) -> None:
-        self.enable_widgets_signal.emit(False)
-        self.update_status_signal.emit(f"Loading model {model_name}...")
+        current = self.model_manager.current_key
+        if self.model_manager.is_loaded and current is not None:
+            # The current model keeps serving until the new one is swapped in.
+            self.update_status_signal.emit(
+                f"Loading model {model_name}... (using {current[0]} until it is ready)"
+            )
+        else:
+            self.enable_widgets_signal.emit(False)
+            self.update_status_signal.emit(f"Loading model {model_name}...")
         self.model_manager.load_model(model_name, quant, device)
 
+    def prefetch_model(self, model_name: str, quant: str) -> None:
+        """A model was selected but not applied yet; start reading its files."""
+        self.model_manager.prefetch(model_name, quant)
+
     def start_recording(self) -> None:
-        if not self.audio_manager.start_recording():
+        if self.audio_manager.is_recording():
             self.update_status_signal.emit("Already recording")
+            return
+        self.audio_manager.start_recording()
 
     def stop_recording(self) -> None:
         self.audio_manager.stop_recording()
 
+    def transcribe_file(self, audio_file: str) -> None:
+        """
+        Transcribe an existing audio file as a batch job; long files are
+        decoded in windows.  Dictation stays available and takes priority.
+        """
+        pool = self.model_manager.get_pool()
+        if not pool:
+            self.update_status_signal.emit("No model loaded")
+            return
+        job = self._begin_job(audio_duration(audio_file) or None, batch=True)
+        self.transcription_service.transcribe_file(
+            pool, audio_file, keep_file=True, priority=BATCH, job=job
+        )
+
+    def retranscribe_last(self) -> None:
+        """Run the most recent recording through the current model again, as a batch job."""
+        pool = self.model_manager.get_pool()
+        if not pool:
+            self.update_status_signal.emit("No model loaded")
+            return
+        last = self.transcription_service.recording_cache.get(0)
+        job = self._begin_job(len(last.audio) / last.sampling_rate if last else None, batch=True)
+        if not self.transcription_service.retranscribe(pool, job=job):
+            self.update_status_signal.emit("Nothing to re-transcribe yet")
+
+    def export_segments(self, path: str) -> bool:
+        """
+        Write the timestamps of the last single-source transcription to
+        ``path``: .srt, .vtt or .json, or .wseg for the binary store.
+        """
+        if self.last_segments is None:
+            self.update_status_signal.emit("No timestamps to export yet")
+            return False
+        try:
+            if path.lower().endswith(".wseg"):
+                self.last_segments.save(path)
+            else:
+                self.last_segments.export(path)
+        except (OSError, ValueError) as exc:
+            self.update_status_signal.emit(f"Export failed: {exc}")
+            return False
+        self.update_status_signal.emit(f"Exported {len(self.last_segments)} segment(s)")
+        return True
+
     @property
     def curate(self) -> bool:
         return self.transcription_service.curate_enabled
@@ -66,48 +259,288 @@ class TranscriberController(QObject):
     @Slot(str, str, str)
     def _on_model_loaded(self, name: str, quant: str, device: str) -> None:
         config_manager.set_model_settings(name, quant, device)
-        self.update_status_signal.emit(f"Model {name} ready on {device}")
-        self.enable_widgets_signal.emit(True)
         self.model_loaded_signal.emit(name, quant, device)
+        self._load_adaptive_candidates()
+        if self._pending_audio:
+            pending, self._pending_audio = self._pending_audio, []
+            for audio, source in pending:
+                if isinstance(audio, str):
+                    self._on_audio_ready(audio, source)
+                else:
+                    self._on_live_audio_ready(audio, source)
+            return
+        if self.audio_manager.is_recording() or self.transcription_service.is_busy:
+            return
+        footprint = self.model_manager.memory_footprint
+        swap = self.model_manager.last_swap
+        peak = (
+            f", peak +{format_bytes(swap.peak_growth)} during swap"
+            if swap is not None and swap.key == (name, quant, device) else ""
+        )
+        self.update_status_signal.emit(
+            f"Model {name} ready on {device} ({format_bytes(footprint)}{peak})"
+        )
+        self.enable_widgets_signal.emit(True)
 
     @Slot(str)
     def _on_model_error(self, error: str) -> None:
+        self._pending_audio = []
         self.update_status_signal.emit(error)
         self.enable_widgets_signal.emit(True)
 
-    @Slot(str)
-    def _on_audio_ready(self, audio_file: str) -> None:
-        model, expected_id = self.model_manager.get_model()
-        if model and expected_id:
-            self.transcription_service.transcribe_file(model, expected_id, audio_file)
+    @Slot(object, object)
+    def _on_model_unloaded(self, rss_before: int, rss_after: int) -> None:
+        self.update_status_signal.emit(
+            f"Model unloaded while idle (freed {format_bytes(max(0, rss_before - rss_after))})"
+        )
+
+    @Slot(object, object, float)
+    def _on_download_progress(self, done: int, total: int, rate: float) -> None:
+        percent = 100 * done / total if total else 100
+        self.update_status_signal.emit(
+            f"Downloading model... {percent:.0f}% of {format_bytes(total)} ({format_bytes(rate)}/s)"
+        )
+
+    @Slot()
+    def _on_recording_started(self) -> None:
+        if self.model_manager.ensure_loaded():
+            self.update_status_signal.emit("Recording... (reloading model)")
+        else:
+            self.update_status_signal.emit("Recording...")
+
+    @Slot()
+    def _on_recording_stopped(self) -> None:
+        sources = self.audio_manager.sources
+        self._group = _SourceGroup(sources) if len(sources) > 1 else None
+        for source in sources:
+            metrics = self.audio_manager.capture_metrics(source)
+            self._capture_summaries[source] = self.audio_manager.capture_summary(source)
+            log = logger.warning if metrics["flags"]["input_overflow"] else logger.info
+            log("Capture telemetry (%s): %s", source, metrics)
+
+    @Slot(str, str)
+    def _on_audio_ready(self, audio_file: str, source: str) -> None:
+        pool, job = self._select_model(_wav_duration(audio_file), source)
+        if pool:
+            self.transcription_service.transcribe_file(pool, audio_file, job=job, source=source)
+        else:
+            self._wait_for_model(audio_file, source)
+
+    @Slot(object, str)
+    def _on_live_audio_ready(self, session, source: str) -> None:
+        pool, job = self._select_model(session.duration_s, source)
+        if pool:
+            self.transcription_service.transcribe_live(pool, session, job=job, source=source)
+        else:
+            self._wait_for_model(session, source)
+
+    def _wait_for_model(self, pending, source: str) -> None:
+        if self.model_manager.is_loading or self.model_manager.ensure_loaded():
+            self._pending_audio.append((pending, source))
+            self.update_status_signal.emit("Waiting for model to load...")
         else:
             self.update_status_signal.emit("No model loaded")
             self.enable_widgets_signal.emit(True)
 
+    @Slot(object, str)
+    def _on_speculative_audio_ready(self, session, source: str) -> None:
+        job = self._begin_job(session.duration_s, source=source)
+        job.speculation = session
+        self.transcription_service.finish_speculation(session, job=job)
+
     @Slot(str)
     def _on_audio_error(self, error: str) -> None:
         self.update_status_signal.emit(error)
         self.enable_widgets_signal.emit(True)
 
-    @Slot(str)
-    def _on_transcription_completed(self, text: str) -> None:
+    def _select_model(self, duration: float, source: Optional[str] = None) -> tuple[object, _Job]:
+        job = self._begin_job(duration, source=source)
+        if self._selection_policy is None:
+            return self.model_manager.get_pool(), job
+
+        decision = self._selection_policy.choose(duration, self.model_manager.available_models())
+        if decision is None:
+            return self.model_manager.get_pool(), job
+
+        logger.info(
+            "Adaptive selection: %.1fs clip -> %s/%s (predicted %.2fs, target %.2fs%s)",
+            duration, decision.key[0], decision.key[1], decision.predicted,
+            self._selection_policy.latency_target,
+            "" if decision.within_target else ", none within target",
+        )
+        job.key, job.decision = decision.key, decision
+        return self.model_manager.get_pool(decision.key), job
+
+    def _load_adaptive_candidates(self) -> None:
+        if self._selection_policy is None:
+            return
+        for name, quant, device in self._selection_policy.candidates:
+            self.model_manager.load_auxiliary(name, quant, device)
+
+    def _configure_speculation(self) -> None:
+        if not config_manager.get_value("speculative_transcription", False):
+            self.audio_manager.set_speculator(None)
+            return
+        speculator = SpeculativeTranscriber(
+            self.transcription_service.transcriber,
+            min_silence_s=config_manager.get_value("speculative_silence_ms", 700) / 1000,
+        )
+        self.audio_manager.set_speculator(
+            speculator,
+            lambda source: self.transcription_service.interactive_pool(self.model_manager.get_pool(), source),
+        )
+
+    def _configure_live_features(self) -> None:
+        if not config_manager.get_value("live_features", True):
+            self.audio_manager.set_live_features(None)
+            return
+        self.audio_manager.set_live_features(
+            lambda samplerate, dtype: begin_live_features(self.model_manager.get_pool(), samplerate, dtype)
+        )
+
+    def _configure_sources(self) -> None:
+        """Extra inputs recorded alongside the default one, e.g. a room mic."""
+        for spec in config_manager.get_value("capture_sources", []) or []:
+            try:
+                self.audio_manager.add_source(
+                    spec["name"],
+                    device=spec.get("device"),
+                    samplerate=spec.get("samplerate"),
+                    channels=spec.get("channels"),
+                )
+            except (KeyError, ValueError, RuntimeError) as exc:
+                logger.warning("Skipping capture source %s: %s", spec, exc)
+
+    def _configure_adaptive_selection(self) -> None:
+        candidates = [
+            (c["model_name"], c["quantization_type"], c["device_type"])
+            for c in config_manager.get_value("adaptive_models", []) or []
+        ]
+        if len(candidates) < 2 or self._daemon is not None:
+            # The daemon keeps a single resident model.
+            self._selection_policy = None
+            return
+        self._selection_policy = ModelSelectionPolicy(
+            candidates,
+            latency_target=config_manager.get_value("latency_target", 4.0),
+        )
+
+    @Slot(object, object)
+    def _on_segments_ready(self, job: Optional[_Job], segments: SegmentStore) -> None:
+        if job is not None:
+            job.segments = segments
+
+    @Slot(object, float)
+    def _on_decode_started(self, job: Optional[_Job], when: float) -> None:
+        if job is not None:
+            job.decode_started = when
+
+    @Slot(object, str)
+    def _on_transcription_completed(self, job: Optional[_Job], text: str) -> None:
+        if job is not None:
+            # Speculative and multi-source results have no single timeline.
+            self.last_segments = job.segments if job.group is None else None
+        if job is not None and job.decision is not None and self._selection_policy is not None:
+            self._selection_policy.record(job.decision, job.decode_seconds())
+        if job is not None and job.group is not None:
+            if not job.group.add(job.source, text):
+                self.update_status_signal.emit(
+                    f"Transcribed {job.source} ({len(job.group.results)}/{len(job.group.sources)})"
+                )
+                return
+            # Every source is in: report them together, tagged by source.
+            text = job.group.text()
+
         app = QApplication.instance()
         if app:
             app.clipboard().setText(text)
 
         self.text_ready_signal.emit(text)
-        self.update_status_signal.emit("Done")
+        self._record_history(job, text)
+        notes = []
+        if job is not None:
+            notes = [n for n in (job.capture_summary, self._speculation_note(job)) if n]
+        metrics = self.transcription_service.scheduler.metrics()
+        logger.info("Queue wait by priority: %s", {
+            p: {k: h[k] for k in ("count", "p50", "p95", "max")}
+            for p, h in metrics["queue_wait_ms"].items()
+        })
+        if metrics["preemptions"]:
+            notes.append(self.transcription_service.scheduler.summary())
+        languages = self.transcription_service.language_cache
+        if languages is not None and languages.stats.skipped:
+            logger.info("Language cache: %s", languages.stats.snapshot())
+        self.update_status_signal.emit(f"Done. {'; '.join(notes)}" if notes else "Done")
         self.enable_widgets_signal.emit(True)
 
-    @Slot(str)
-    def _on_transcription_error(self, error: str) -> None:
+    def _speculation_note(self, job: _Job) -> Optional[str]:
+        session = job.speculation
+        if session is None or session.outcome is None:
+            return None
+        stats = session.stats.snapshot()
+        logger.info("Speculative transcription: %s, saved %.2fs; totals %s", session.outcome, session.saved_s, stats)
+        return (
+            f"Early transcription saved {session.saved_s:.1f}s "
+            f"(hit rate {stats['hit_rate']:.0%} over {stats['sessions']})"
+        )
+
+    @Slot(object, str)
+    def _on_transcription_error(self, job: Optional[_Job], error: str) -> None:
+        if job is not None and job.group is not None:
+            logger.warning("Transcribing %s failed: %s", job.source, error)
+            if job.group.add(job.source, ""):
+                # The other sources' text still goes out.
+                text, job.group = job.group.text(), None
+                self._on_transcription_completed(job, text)
+            return
         self.update_status_signal.emit(error)
         self.enable_widgets_signal.emit(True)
 
     def _load_settings(self) -> None:
         settings = config_manager.get_model_settings()
+        # Before the model loads: the partition decides how many decode threads it gets.
+        cpu_partition.configure(
+            config_manager.get_value("cpu_partition", False),
+            config_manager.get_value("capture_reserved_cores", 1),
+        )
         curate = config_manager.get_value("curate_transcription", False)
         self.transcription_service.set_curation_enabled(curate)
+        self.transcription_service.set_guard_enabled(config_manager.get_value("decode_guard", True))
+        self.transcription_service.set_batch_cpu_share(config_manager.get_value("batch_cpu_share", 0.5))
+        self.transcription_service.configure_language_cache(
+            config_manager.get_value("language_cache", True),
+            config_manager.get_value("language_min_probability", 0.8),
+            config_manager.get_value("language_recheck_clips", 10),
+            config_manager.get_value("language_recheck_s", 600),
+        )
+        self.transcription_service.configure_recording_cache(
+            config_manager.get_value("recording_cache_size", 3),
+            config_manager.get_value("cache_features", False),
+        )
+        self.transcription_service.configure_long_files(
+            config_manager.get_value("long_file_threshold", 600),
+            config_manager.get_value("long_file_window", 60),
+            config_manager.get_value("long_file_overlap", 4),
+        )
+        self.model_manager.set_idle_timeout(config_manager.get_value("model_idle_timeout", 1800))
+        self.model_manager.configure_pool(
+            config_manager.get_value("model_pool_size", 1),
+            config_manager.get_value("model_pool_mode", "workers"),
+        )
+        self.model_manager.configure_prefetch(
+            config_manager.get_value("prefetch_models", True),
+            config_manager.get_value("prefetch_max_mb", 2048),
+            config_manager.get_value("prefetch_count", 2),
+        )
+        self._configure_adaptive_selection()
+        self._configure_speculation()
+        self._configure_live_features()
+        self._configure_sources()
+        self.audio_manager.set_persistent_stream(
+            config_manager.get_value("keep_stream_open", False),
+            preroll_ms=config_manager.get_value("preroll_ms", 300),
+            idle_timeout_s=config_manager.get_value("stream_idle_timeout", 300),
+        )
         self.update_model(
             settings["model_name"],
             settings["quantization_type"],
@@ -117,4 +550,9 @@ class TranscriberController(QObject):
     def stop_all_threads(self) -> None:
         self.audio_manager.cleanup()
         self.transcription_service.cleanup()
-        self.model_manager.cleanup()
\ No newline at end of file
+        self.model_manager.cleanup()
+        if self._daemon is not None:
+            # Detach only; the daemon stays resident for the next launch.
+            self._daemon.close()
+        if self.history is not None:
+            self.history.close()
\ No newline at end of file
@@ -0,0 +1,255 @@
+"""
+CPU partitioning between audio capture and decoding.
+
+ctranslate2 runs one compute thread per physical core, so while a clip is
+decoded every core is busy.  The PortAudio callback, and the Python threads
+fed from it, then wait for a time slice; a wait longer than the device
+buffer is an input overflow.  ``CpuPartition`` reserves ``reserved_cores``
+physical cores (with their SMT siblings) for capture:
+
+* decode thread counts are capped at the other physical cores
+  (``decode_threads``, the default for ``load_model`` and model pools);
+* ``capture_stream()`` wraps opening and starting an input stream and
+  yields a ``CallbackProbe``.  The stream's callback reports its thread
+  to the probe once, on its first call; a helper thread then pins that
+  thread alone to the reserved CPUs with raised priority: SCHED_RR where
+  permitted (root, CAP_SYS_NICE or an RLIMIT_RTPRIO grant), else a
+  negative nice value, else nothing.  Other threads started meanwhile
+  (model loads, ctranslate2 workers) are left alone, and the realtime
+  callback makes no system call;
+* ``claim_capture_thread()`` does the same for the calling thread, for
+  threads that consume the captured blocks;
+* ``isolate()`` pins every other thread of the process to the remaining
+  CPUs.  It runs when the partition is configured and after each model
+  load, once the ctranslate2 workers exist; threads started later inherit
+  their creator's affinity.
+
+This is off by default (``cpu_partition``): it moves every thread of the
+process, and its benefit depends on the machine, so measure it with
+``benchmarks.capture_stress`` first.  Thread affinity and priority are set
+per thread on Linux only; elsewhere, and on machines with fewer than
+``reserved_cores + 2`` physical cores, nothing changes, decode thread
+counts included.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Set
+
+import psutil
+
+logger = logging.getLogger(__name__)
+
+_LINUX = sys.platform.startswith("linux")
+_RR_PRIORITY = 10
+_CAPTURE_NICE = -10
+_PROBE_TIMEOUT_S = 5.0
+_PROBE_POLL_S = 0.005
+
+
+def _parse_cpu_list(text: str) -> Set[int]:
+    cpus: Set[int] = set()
+    for part in text.strip().split(","):
+        if "-" in part:
+            lo, hi = part.split("-")
+            cpus.update(range(int(lo), int(hi) + 1))
+        elif part:
+            cpus.add(int(part))
+    return cpus
+
+
+def core_groups() -> List[frozenset]:
+    """The CPUs this process may use, grouped by physical core, in CPU order."""
+    allowed = set(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else set(range(os.cpu_count() or 1))
+    groups: List[frozenset] = []
+    for cpu in sorted(allowed):
+        if any(cpu in group for group in groups):
+            continue
+        topology = Path(f"/sys/devices/system/cpu/cpu{cpu}/topology")
+        siblings = {cpu}
+        for name in ("core_cpus_list", "thread_siblings_list"):
+            try:
+                siblings = _parse_cpu_list((topology / name).read_text())
+                break
+            except (OSError, ValueError):
+                continue
+        groups.append(frozenset((siblings & allowed) | {cpu}))
+    return groups
+
+
+def physical_cores() -> int:
+    return psutil.cpu_count(logical=False) or 1
+
+
+class CallbackProbe:
+    """Learns which thread runs a stream callback; ``report`` is safe to call from it."""
+
+    __slots__ = ("tid",)
+
+    def __init__(self) -> None:
+        self.tid: Optional[int] = None
+
+    def report(self) -> None:
+        self.tid = threading.get_native_id()
+
+
+class CpuPartition:
+
+    def __init__(self) -> None:
+        self.reserved_cores = 0
+        self.capture_cpus: frozenset = frozenset()
+        self.decode_cpus: frozenset = frozenset()
+        self.capture_priority: Optional[str] = None  # "SCHED_RR", "nice" or None
+        self._all_cpus: frozenset = frozenset()
+        self._capture_tids: Set[int] = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """True when a partition is applied (Linux, enough cores)."""
+        return bool(self.capture_cpus)
+
+    def configure(self, enabled: bool, reserved_cores: int = 1) -> bool:
+        """Reserve ``reserved_cores`` for capture, or undo it; True if a partition is in effect."""
+        reserved_cores = max(0, int(reserved_cores)) if enabled else 0
+        if reserved_cores and physical_cores() < reserved_cores + 2:
+            logger.info("CPU partition skipped: %d physical core(s)", physical_cores())
+            reserved_cores = 0
+        with self._lock:
+            if self.enabled:
+                self._restore()
+            self.reserved_cores = reserved_cores
+            self.capture_cpus = self.decode_cpus = frozenset()
+            if reserved_cores and _LINUX:
+                groups = core_groups()
+                if len(groups) >= reserved_cores + 2:
+                    self._all_cpus = frozenset().union(*groups)
+                    self.capture_cpus = frozenset().union(*groups[-reserved_cores:])
+                    self.decode_cpus = self._all_cpus - self.capture_cpus
+        if self.enabled:
+            self.isolate()
+            logger.info(
+                "CPU partition: capture on %s, decode on %s with %d thread(s)",
+                sorted(self.capture_cpus) or "any CPU", sorted(self.decode_cpus) or "any CPU",
+                self.decode_threads(),
+            )
+        return self.enabled
+
+    def decode_threads(self) -> int:
+        """Threads for decoding: every physical core not reserved for capture."""
+        if not self.enabled:
+            return physical_cores()
+        return max(1, physical_cores() - self.reserved_cores)
+
+    @contextmanager
+    def capture_stream(self) -> Iterator[Optional[CallbackProbe]]:
+        """
+        Around opening and starting an input stream.  Yields a probe whose
+        ``report()`` the callback calls once, or None when there is no
+        partition; the reporting thread is then claimed for capture.
+        """
+        if not self.enabled:
+            yield None
+            return
+        probe = CallbackProbe()
+        yield probe
+        threading.Thread(target=self._claim_reported, args=(probe,), name="capture-probe", daemon=True).start()
+
+    def _claim_reported(self, probe: CallbackProbe) -> None:
+        deadline = time.monotonic() + _PROBE_TIMEOUT_S
+        while probe.tid is None:
+            if time.monotonic() > deadline:
+                logger.debug("Input stream callback never ran; capture thread left unpinned")
+                return
+            time.sleep(_PROBE_POLL_S)
+        self._claim(probe.tid, raise_priority=True)
+
+    def claim_capture_thread(self, raise_priority: bool = True) -> None:
+        """Pin the calling thread to the capture CPUs, and optionally raise its priority."""
+        if self.enabled:
+            self._claim(threading.get_native_id(), raise_priority)
+
+    def _claim(self, tid: int, raise_priority: bool) -> None:
+        with self._lock:
+            if not self.capture_cpus or tid in self._capture_tids:
+                return
+            self._capture_tids.add(tid)
+            try:
+                os.sched_setaffinity(tid, self.capture_cpus)
+            except OSError as exc:
+                logger.debug("Could not pin capture thread %d: %s", tid, exc)
+            if raise_priority:
+                self.capture_priority = self._raise_priority(tid)
+
+    @staticmethod
+    def _raise_priority(tid: int) -> Optional[str]:
+        try:
+            os.sched_setscheduler(tid, os.SCHED_RR, os.sched_param(_RR_PRIORITY))
+            return "SCHED_RR"
+        except (AttributeError, OSError):
+            pass
+        try:
+            os.setpriority(os.PRIO_PROCESS, tid, _CAPTURE_NICE)
+            return "nice"
+        except (AttributeError, OSError):
+            return None
+
+    def isolate(self) -> int:
+        """Pin every thread that is not capturing to the decode CPUs; returns how many."""
+        if not self.decode_cpus:
+            return 0
+        pinned = 0
+        with self._lock:
+            tids = self._threads()
+            self._capture_tids &= tids
+            for tid in tids - self._capture_tids:
+                try:
+                    os.sched_setaffinity(tid, self.decode_cpus)
+                    pinned += 1
+                except OSError:
+                    pass  # exited meanwhile
+        return pinned
+
+    def _restore(self) -> None:
+        """Undo a previous partition (lock held)."""
+        for tid in self._threads():
+            try:
+                os.sched_setaffinity(tid, self._all_cpus)
+            except OSError:
+                pass
+            if tid in self._capture_tids:
+                # Undo whichever of the two _raise_priority managed.
+                for reset in (
+                    lambda: os.sched_setscheduler(tid, os.SCHED_OTHER, os.sched_param(0)),
+                    lambda: os.setpriority(os.PRIO_PROCESS, tid, 0),
+                ):
+                    try:
+                        reset()
+                    except (AttributeError, OSError):
+                        pass
+        self._capture_tids.clear()
+        self.capture_priority = None
+
+    @staticmethod
+    def _threads() -> Set[int]:
+        try:
+            return {int(tid) for tid in os.listdir("/proc/self/task")}
+        except OSError:
+            return set()
+
+    def summary(self) -> str:
+        if not self.enabled:
+            return "CPU partition off"
+        return (
+            f"capture CPUs {sorted(self.capture_cpus) or 'unpinned'} ({self.capture_priority or 'normal priority'}), "
+            f"{self.decode_threads()} decode thread(s)"
+        )
+
+
+cpu_partition = CpuPartition()
@@ -0,0 +1,548 @@
+"""
+Resident transcription daemon.
+
+A background process that owns the loaded model so the GUI, the CLI and
+hotkey helpers can attach to it instead of loading their own copy.  It
+listens on a named pipe (Windows) or a Unix domain socket, authenticated
+with a per-install key, and speaks pickled dictionaries:
+
+    {"op": "health"}
+    {"op": "load", "model_name": ..., "quantization_type": ..., "device_type": ...}
+    {"op": "segments", "audio": ndarray | str, "options": {...}, "priority": ...}
+    {"op": "transcribe", "audio": ndarray | str, "options": {...}}
+    {"op": "shutdown"}
+
+Every reply is ``{"ok": True, ...}`` or ``{"ok": False, "error": str}``.
+"segments" streams as the model decodes: ``{"ok": True, "info": {...}}``,
+then one ``{"segment": (...)}`` per segment with its words, then
+``{"ok": True, "done": True}`` (or an error reply if decoding failed).
+Meanwhile the client may send ``{"op": "cancel"}`` to stop early; the
+stream then ends at the next segment.  Each stream has its own connection,
+and leases go through a ``PriorityScheduler`` with the client's priority
+class, so an interactive clip borrows the model from a batch job between
+its segments as it would in-process.
+
+The daemon is also how several processes share one copy of the weights:
+ctranslate2 copies them into memory it allocates on load, so each process
+that loads a model holds its own.  Queue workers started with
+``jobqueue work --daemon`` decode here instead, and ``serve --slots N``
+loads one model with ``num_workers=N`` so N requests decode in parallel
+over that copy.  Worker processes then cost their activations and audio
+only; ``status`` reports the daemon's RSS and PSS.
+
+    python -m core.daemon serve --model base.en --slots 4
+    python -m core.daemon status | stop | transcribe clip.wav
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import secrets
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import Client, Connection, Listener
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core.transcription.priority import INTERACTIVE, PriorityScheduler, current_priority
+from utils import get_process_memory, get_resource_path
+
+logger = logging.getLogger(__name__)
+
+_FAMILY = "AF_PIPE" if sys.platform == "win32" else "AF_UNIX"
+
+
+def default_address() -> str:
+    if sys.platform == "win32":
+        return r"\\.\pipe\ctranslate2-whisper-transcriber"
+    uid = os.getuid() if hasattr(os, "getuid") else 0
+    return os.path.join(tempfile.gettempdir(), f"whisper-transcriber-{uid}.sock")
+
+
+def load_authkey(create: bool = False) -> bytes:
+    """Per-install secret shared by the daemon and its clients."""
+    path = Path(get_resource_path("daemon.key"))
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        if not create:
+            raise
+    key = secrets.token_bytes(32)
+    path.write_bytes(key)
+    try:
+        path.chmod(0o600)
+    except OSError:
+        pass
+    return key
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+# ---------------------------------------------------------------- server
+
+
+class TranscriptionDaemon:
+
+    def __init__(self, engine=None, address: Optional[str] = None, authkey: Optional[bytes] = None) -> None:
+        if engine is None:
+            from core.engine import TranscriptionEngine
+            engine = TranscriptionEngine()
+        self.engine = engine
+        self.address = address or default_address()
+        self.authkey = authkey if authkey is not None else load_authkey(create=True)
+        self.started = time.time()
+        self.scheduler = PriorityScheduler()
+        self._listener: Optional[Listener] = None
+        self._stopping = threading.Event()
+        self._load_lock = threading.Lock()
+        self._handlers: list[threading.Thread] = []
+
+    def serve_forever(self) -> None:
+        if _FAMILY == "AF_UNIX" and os.path.exists(self.address):
+            if DaemonClient.is_running(self.address, self.authkey):
+                raise DaemonError(f"A daemon is already listening on {self.address}")
+            os.unlink(self.address)
+
+        self._listener = Listener(self.address, family=_FAMILY, authkey=self.authkey)
+        logger.info("Daemon %d listening on %s", os.getpid(), self.address)
+        try:
+            while not self._stopping.is_set():
+                try:
+                    conn = self._listener.accept()
+                except Exception:
+                    if self._stopping.is_set():
+                        break
+                    logger.exception("Rejected connection")
+                    continue
+                thread = threading.Thread(target=self._handle, args=(conn,), daemon=True)
+                thread.start()
+                self._handlers = [t for t in self._handlers if t.is_alive()] + [thread]
+        finally:
+            self._finish()
+
+    def shutdown(self) -> None:
+        """Stop accepting, let in-flight requests finish, then release the model."""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        try:
+            # Unblock accept() with a throwaway, unauthenticated connection;
+            # the listener rejects it without waiting on a handshake.
+            Client(self.address, family=_FAMILY).close()
+        except Exception:
+            pass
+
+    def _finish(self) -> None:
+        for thread in self._handlers:
+            thread.join(timeout=30)
+        if self._listener is not None:
+            self._listener.close()
+        self.engine.close()
+        logger.info("Daemon stopped")
+
+    def _handle(self, conn: Connection) -> None:
+        with conn:
+            while True:
+                try:
+                    request = conn.recv()
+                except (EOFError, OSError):
+                    return
+                if request.get("op") == "cancel":
+                    continue  # arrived after its stream had already finished
+                try:
+                    if request.get("op") == "segments":
+                        reply = self._stream_segments(conn, request)
+                    else:
+                        reply = self._dispatch(request)
+                except DaemonError as exc:
+                    reply = {"ok": False, "error": str(exc)}
+                except Exception as exc:
+                    logger.exception("Request %s failed", request.get("op"))
+                    reply = {"ok": False, "error": str(exc)}
+                try:
+                    conn.send(reply)
+                except (OSError, ValueError):
+                    return
+                if request.get("op") == "shutdown":
+                    self.shutdown()
+                    return
+
+    def _dispatch(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        op = request.get("op")
+        if op == "health":
+            models = self.engine.models
+            return {
+                "ok": True,
+                "pid": os.getpid(),
+                "uptime": time.time() - self.started,
+                "loaded": models.is_loaded,
+                "loading": models.is_loading,
+                "model": models.current_settings,
+                "footprint": models.memory_footprint,
+                "scheduler": self.scheduler.metrics(),
+                **get_process_memory(),
+            }
+        if op == "load":
+            self.load(request["model_name"], request["quantization_type"], request["device_type"])
+            return {"ok": True, "footprint": self.engine.models.memory_footprint}
+        if op == "transcribe":
+            return {"ok": True, "text": self.engine.transcribe(request["audio"], **request.get("options", {}))}
+        if op == "shutdown":
+            return {"ok": True}
+        raise DaemonError(f"Unknown op {op!r}")
+
+    def load(self, model_name: str, quantization_type: str, device_type: str) -> None:
+        """Make this the resident model; a no-op when it already is."""
+        key = (model_name, quantization_type, device_type)
+        with self._load_lock:
+            if self.engine.models.current_key != key or not self.engine.models.is_loaded:
+                self.engine.load_model(*key)
+
+    def _stream_segments(self, conn: Connection, request: Dict[str, Any]) -> Dict[str, Any]:
+        """Send segments as they are decoded; returns the closing message."""
+        models = self.engine.models
+        pool = models.get_pool() or models.ensure_loaded()
+        if pool is None:
+            raise DaemonError("No model loaded")
+        cancelled = False
+        with self.scheduler.lease(pool, request.get("priority", INTERACTIVE)) as model:
+            # Raw segments: the client's Transcriber applies the decode guard, as for a local model.
+            segments, info = model.transcribe(request["audio"], **request.get("options", {}))
+            conn.send({"ok": True, "info": {
+                "language": info.language,
+                "language_probability": info.language_probability,
+                "duration": info.duration,
+            }})
+            try:
+                for segment in segments:
+                    conn.send({"segment": _segment_fields(segment)})
+                    if conn.poll():
+                        conn.recv()  # a client only sends "cancel" mid-stream
+                        cancelled = True
+                        break
+                    self.scheduler.checkpoint()
+            finally:
+                segments.close()
+        return {"ok": True, "done": True, "cancelled": cancelled}
+
+
+def _segment_fields(segment) -> tuple:
+    words = segment.words and tuple((w.start, w.end, w.word, w.probability) for w in segment.words)
+    return (
+        segment.start, segment.end, segment.text, segment.avg_logprob, segment.no_speech_prob,
+        segment.compression_ratio, segment.temperature, tuple(segment.tokens), words,
+    )
+
+
+# ---------------------------------------------------------------- client
+
+
+@dataclass(frozen=True)
+class RemoteWord:
+    start: float
+    end: float
+    word: str
+    probability: float
+
+
+@dataclass(frozen=True)
+class RemoteSegment:
+    start: float
+    end: float
+    text: str
+    avg_logprob: float
+    no_speech_prob: float
+    compression_ratio: float = 0.0
+    temperature: float = 0.0
+    tokens: Tuple[int, ...] = ()
+    words: Optional[Tuple[RemoteWord, ...]] = None
+
+    @classmethod
+    def from_fields(cls, fields: tuple) -> "RemoteSegment":
+        *head, words = fields
+        return cls(*head, words=words and tuple(RemoteWord(*w) for w in words))
+
+
+@dataclass(frozen=True)
+class RemoteInfo:
+    language: str
+    language_probability: float
+    duration: float
+
+
+class SegmentStream:
+    """
+    Segments of one "segments" request, read as the daemon sends them.
+
+    Closing it before the end (or dropping it) cancels the rest of the
+    decode; the connection goes back to the client once the daemon has
+    acknowledged.
+    """
+
+    def __init__(self, client: "DaemonClient", conn: Connection) -> None:
+        self._client = client
+        self._conn: Optional[Connection] = conn
+
+    def __iter__(self) -> "SegmentStream":
+        return self
+
+    def __next__(self) -> RemoteSegment:
+        if self._conn is None:
+            raise StopIteration
+        try:
+            message = self._conn.recv()
+        except (EOFError, OSError):
+            self._discard()
+            raise
+        if "segment" in message:
+            return RemoteSegment.from_fields(message["segment"])
+        self._finish()
+        if not message.get("ok"):
+            raise DaemonError(message.get("error", "daemon request failed"))
+        raise StopIteration
+
+    def close(self) -> None:
+        """Stop the decode in the daemon and skip what it already sent."""
+        if self._conn is None:
+            return
+        try:
+            self._conn.send({"op": "cancel"})
+            while "segment" in self._conn.recv():
+                pass
+        except (EOFError, OSError):
+            self._discard()
+            return
+        self._finish()
+
+    def _finish(self) -> None:
+        conn, self._conn = self._conn, None
+        self._client._check_in(conn)
+
+    def _discard(self) -> None:
+        conn, self._conn = self._conn, None
+        conn.close()
+
+    def __del__(self) -> None:
+        try:
+            self.close()
+        except Exception:
+            pass
+
+
+class DaemonClient:
+
+    def __init__(self, address: Optional[str] = None, authkey: Optional[bytes] = None) -> None:
+        self.address = address or default_address()
+        self.authkey = authkey if authkey is not None else load_authkey()
+        self._conn = Client(self.address, family=_FAMILY, authkey=self.authkey)
+        self._lock = threading.Lock()
+        self._idle: List[Connection] = []  # for segment streams, one per stream in flight
+
+    @classmethod
+    def is_running(cls, address: Optional[str] = None, authkey: Optional[bytes] = None) -> bool:
+        try:
+            client = cls(address, authkey)
+        except (OSError, EOFError, FileNotFoundError):
+            return False
+        try:
+            return bool(client.health().get("ok"))
+        except Exception:
+            return False
+        finally:
+            client.close()
+
+    @classmethod
+    def connect(cls, autostart: bool = False, timeout: float = 30.0) -> Optional["DaemonClient"]:
+        """Attach to a running daemon, optionally spawning one first."""
+        try:
+            return cls()
+        except (OSError, EOFError, FileNotFoundError):
+            if not autostart:
+                return None
+        spawn_daemon()
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                return cls()
+            except (OSError, EOFError, FileNotFoundError):
+                time.sleep(0.1)
+        return None
+
+    def request(self, op: str, **payload) -> Dict[str, Any]:
+        with self._lock:
+            self._conn.send({"op": op, **payload})
+            reply = self._conn.recv()
+        if not reply.get("ok"):
+            raise DaemonError(reply.get("error", "daemon request failed"))
+        return reply
+
+    def health(self) -> Dict[str, Any]:
+        return self.request("health")
+
+    def load_model(self, model_name: str, quantization_type: str, device_type: str) -> Dict[str, Any]:
+        return self.request(
+            "load", model_name=model_name, quantization_type=quantization_type, device_type=device_type
+        )
+
+    def segments(self, audio, priority: str = INTERACTIVE, **options) -> Tuple[SegmentStream, RemoteInfo]:
+        """Start decoding ``audio`` in the daemon; segments arrive as they are decoded."""
+        conn = self._check_out()
+        try:
+            conn.send({"op": "segments", "audio": audio, "options": options, "priority": priority})
+            reply = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+        if not reply.get("ok"):
+            self._check_in(conn)
+            raise DaemonError(reply.get("error", "daemon request failed"))
+        return SegmentStream(self, conn), RemoteInfo(**reply["info"])
+
+    def _check_out(self) -> Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return Client(self.address, family=_FAMILY, authkey=self.authkey)
+
+    def _check_in(self, conn: Connection) -> None:
+        with self._lock:
+            self._idle.append(conn)
+
+    def transcribe(self, audio, **options) -> str:
+        return self.request("transcribe", audio=audio, options=options)["text"]
+
+    def shutdown(self) -> None:
+        self.request("shutdown")
+        self.close()
+
+    def close(self) -> None:
+        with self._lock:
+            conns, self._idle = [self._conn, *self._idle], []
+        for conn in conns:
+            try:
+                conn.close()
+            except OSError:
+                pass
+
+
+class _RemoteFeatureExtractor:
+    sampling_rate = 16_000
+
+
+class RemoteModel:
+    """Stands in for a WhisperModel whose decoding happens in the daemon."""
+
+    feature_extractor = _RemoteFeatureExtractor()
+
+    def __init__(self, client: DaemonClient, priority: str = INTERACTIVE) -> None:
+        self.client = client
+        self.priority = priority  # used outside a scheduler lease
+
+    def transcribe(self, audio, **options):
+        if isinstance(audio, Path):
+            audio = str(audio)
+        return self.client.segments(audio, current_priority() or self.priority, **options)
+
+
+class RemoteModelFactory:
+    """``load_model``-compatible factory that loads into the daemon instead."""
+
+    def __init__(self, client: DaemonClient, priority: str = INTERACTIVE) -> None:
+        self.client = client
+        self.priority = priority
+
+    def __call__(self, model_name: str, quantization_type: str = "float32", device_type: str = "cpu",
+                 progress_callback=None, **_ignored) -> RemoteModel:
+        self.client.load_model(model_name, quantization_type, device_type)
+        return RemoteModel(self.client, self.priority)
+
+
+def spawn_daemon() -> subprocess.Popen:
+    """Start ``python -m core.daemon serve`` detached from this process."""
+    kwargs: Dict[str, Any] = {"cwd": os.path.dirname(get_resource_path("config.yaml"))}
+    if sys.platform == "win32":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    load_authkey(create=True)
+    return subprocess.Popen(
+        [sys.executable, "-m", "core.daemon", "serve"],
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        **kwargs,
+    )
+
+
+# ---------------------------------------------------------------- CLI
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m core.daemon")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="run the daemon in the foreground")
+    serve.add_argument("--model")
+    serve.add_argument("--quantization")
+    serve.add_argument("--device")
+    serve.add_argument("--slots", type=int, help="requests decoded at once over one copy of the model")
+    sub.add_parser("status", help="print daemon health")
+    sub.add_parser("stop", help="shut the daemon down gracefully")
+    transcribe = sub.add_parser("transcribe", help="transcribe an audio file")
+    transcribe.add_argument("audio")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    if args.command == "serve":
+        from config.manager import config_manager
+        from core.cpu import cpu_partition
+        from core.engine import TranscriptionEngine
+
+        settings = config_manager.get_model_settings()
+        # Capture runs in the GUI process; keep this process's decoding off its core too.
+        cpu_partition.configure(
+            config_manager.get_value("cpu_partition", False),
+            config_manager.get_value("capture_reserved_cores", 1),
+        )
+        daemon = TranscriptionDaemon(TranscriptionEngine(
+            pool_size=args.slots or config_manager.get_value("model_pool_size", 1),
+            pool_mode=config_manager.get_value("model_pool_mode", "workers"),
+        ))
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: daemon.shutdown())
+        daemon.engine.transcriber.curate_enabled = config_manager.get_value("curate_transcription", False)
+        threading.Thread(
+            target=daemon.load,
+            args=(
+                args.model or settings["model_name"],
+                args.quantization or settings["quantization_type"],
+                args.device or settings["device_type"],
+            ),
+            daemon=True,
+        ).start()
+        daemon.serve_forever()
+        return
+
+    try:
+        client = DaemonClient()
+    except (OSError, EOFError, FileNotFoundError):
+        raise SystemExit("No daemon is running")
+    if args.command == "status":
+        for key, value in client.health().items():
+            print(f"{key}: {value}")
+    elif args.command == "stop":
+        client.shutdown()
+        print("Daemon stopped")
+    elif args.command == "transcribe":
+        print(client.transcribe(os.path.abspath(args.audio)))
+    client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Qt-free transcription engine for scripts, services and embedding.
+
+    from core.engine import TranscriptionEngine
+
+    engine = TranscriptionEngine()
+    engine.load_model("base.en", "float32", "cpu")
+    print(engine.transcribe(audio))          # 16 kHz mono float32 array or a file path
+    text = await engine.transcribe_async(audio)
+
+Passing ``model_factory=RemoteModelFactory(client)`` from ``core.daemon``
+decodes in the resident daemon instead of loading a model in-process.
+
+The Qt classes in ``core.models.manager``, ``core.audio.manager`` and
+``core.transcription.service`` are adapters over the same pieces.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from pathlib import Path
+from typing import Optional
+
+from core.models.lifecycle import ModelHost, ModelKey
+from core.transcription.transcriber import Transcriber
+
+logger = logging.getLogger(__name__)
+
+
+class TranscriptionEngine:
+
+    def __init__(
+        self,
+        curate: bool = False,
+        guard_enabled: bool = True,
+        idle_timeout_s: float = 0,
+        max_concurrency: Optional[int] = None,
+        pool_size: int = 1,
+        pool_mode: str = "workers",
+        model_factory=None,
+    ) -> None:
+        self.models = ModelHost(idle_timeout_s, pool_size, pool_mode, model_factory)
+        self.transcriber = Transcriber(curate, guard_enabled)
+        self.max_concurrency = max(1, max_concurrency or pool_size)
+        self._limiter: Optional[asyncio.Semaphore] = None
+        self._recorder = None
+
+    def load_model(self, model_name: str, quantization_type: str = "float32",
+                   device_type: str = "cpu", progress_callback=None):
+        return self.models.load(model_name, quantization_type, device_type, progress_callback)
+
+    def unload_model(self) -> None:
+        self.models.unload()
+
+    def transcribe(self, audio, model_key: Optional[ModelKey] = None, **transcribe_options) -> str:
+        """Transcribe a 16 kHz mono float32 array or an audio file path."""
+        with self.models.lease(model_key) as model:
+            if isinstance(audio, (str, Path)):
+                text = self.transcriber.transcribe(model, audio_file=audio, **transcribe_options)
+            else:
+                text = self.transcriber.transcribe(model, audio=audio, **transcribe_options)
+        return self.transcriber.postprocess(text or "")
+
+    def transcribe_long_file(self, audio_file: str | Path, **transcribe_options) -> str:
+        """Transcribe a file of any length in bounded memory."""
+        with self.models.lease() as model:
+            text = self.transcriber.transcribe_long(model, audio_file, **transcribe_options)
+        return self.transcriber.postprocess(text or "")
+
+    async def transcribe_async(self, audio, model_key: Optional[ModelKey] = None, **transcribe_options) -> str:
+        """``transcribe`` on a worker thread, at most ``max_concurrency`` at a time."""
+        if self._limiter is None:
+            self._limiter = asyncio.Semaphore(self.max_concurrency)
+        async with self._limiter:
+            return await asyncio.to_thread(self.transcribe, audio, model_key, **transcribe_options)
+
+    @property
+    def recorder(self):
+        """Microphone capture at 16 kHz float32, created on first use."""
+        if self._recorder is None:
+            from core.audio.recording import AudioRecorder
+            self._recorder = AudioRecorder(samplerate=16_000, channels=1, dtype="float32")
+        return self._recorder
+
+    def start_recording(self) -> bool:
+        return self.recorder.start()
+
+    def stop_recording(self):
+        """Stop capture and return the recording as a Whisper-ready array."""
+        from core.audio.recording import drain, to_whisper_audio
+        blocks = drain(self.recorder.stop(), self.recorder.telemetry)
+        return to_whisper_audio(blocks, self.recorder.dtype)
+
+    def close(self) -> None:
+        if self._recorder is not None:
+            self._recorder.close()
+        self.models.close()
@@ -0,0 +1,176 @@
+"""
+Persistent transcription history.
+
+Every finished transcription is stored in SQLite with its timestamp, the
+model that produced it and how long the audio and the decode took.  An
+FTS5 index over the text (kept in sync by triggers) makes search instant
+across tens of thousands of entries; on SQLite builds without FTS5 search
+falls back to ``LIKE``.  Reads are paged so a view only ever loads what it
+shows.
+"""
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created REAL NOT NULL,
+    text TEXT NOT NULL,
+    model_name TEXT,
+    quantization_type TEXT,
+    device_type TEXT,
+    audio_seconds REAL,
+    transcribe_seconds REAL
+);
+"""
+
+_FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    text, content='transcripts', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_ai AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_ad AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts(transcripts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+_COLUMNS = (
+    "id, created, text, model_name, quantization_type, device_type, "
+    "audio_seconds, transcribe_seconds"
+)
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    id: int
+    created: float
+    text: str
+    model_name: Optional[str] = None
+    quantization_type: Optional[str] = None
+    device_type: Optional[str] = None
+    audio_seconds: Optional[float] = None
+    transcribe_seconds: Optional[float] = None
+
+
+def fts_query(text: str) -> Optional[str]:
+    """Turn free text into an FTS5 query matching every word as a prefix."""
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+class HistoryStore:
+
+    def __init__(self, path: str | Path = ":memory:") -> None:
+        self.path = str(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        try:
+            self._conn.executescript(_FTS_SCHEMA)
+            self.full_text = True
+        except sqlite3.OperationalError as exc:
+            logger.warning("FTS5 unavailable, history search will be slower: %s", exc)
+            self.full_text = False
+        self._conn.commit()
+
+    def add(
+        self,
+        text: str,
+        model_name: Optional[str] = None,
+        quantization_type: Optional[str] = None,
+        device_type: Optional[str] = None,
+        audio_seconds: Optional[float] = None,
+        transcribe_seconds: Optional[float] = None,
+    ) -> HistoryEntry:
+        created = time.time()
+        values = (created, text, model_name, quantization_type, device_type, audio_seconds, transcribe_seconds)
+        with self._lock:
+            cursor = self._conn.execute(
+                "INSERT INTO transcripts (created, text, model_name, quantization_type, device_type, "
+                "audio_seconds, transcribe_seconds) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                values,
+            )
+            self._conn.commit()
+        return HistoryEntry(cursor.lastrowid, *values)
+
+    def _where(self, query: Optional[str]) -> tuple[str, tuple]:
+        if not query or not query.strip():
+            return "", ()
+        if self.full_text:
+            match = fts_query(query)
+            if match is None:
+                return "", ()
+            return "WHERE id IN (SELECT rowid FROM transcripts_fts WHERE transcripts_fts MATCH ?)", (match,)
+        return "WHERE text LIKE ?", (f"%{query.strip()}%",)
+
+    def count(self, query: Optional[str] = None) -> int:
+        where, params = self._where(query)
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM transcripts {where}", params).fetchone()[0]
+
+    def page(self, limit: int = 100, before_id: Optional[int] = None,
+             query: Optional[str] = None) -> List[HistoryEntry]:
+        """
+        Newest-first page of the history, optionally filtered by ``query``.
+
+        Pass the id of the last entry already shown as ``before_id`` to get
+        the next page; paging by key keeps every page as cheap as the first.
+        """
+        where, params = self._where(query)
+        if before_id is not None:
+            where = f"{where} AND id < ?" if where else "WHERE id < ?"
+            params = (*params, before_id)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM transcripts {where} ORDER BY id DESC LIMIT ?",
+                (*params, limit),
+            ).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def matches(self, entry_id: int, query: Optional[str]) -> bool:
+        where, params = self._where(query)
+        where = f"{where} AND id = ?" if where else "WHERE id = ?"
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM transcripts {where}", (*params, entry_id)
+            ).fetchone()
+        return row is not None
+
+    def get(self, entry_id: int) -> Optional[HistoryEntry]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM transcripts WHERE id = ?", (entry_id,)
+            ).fetchone()
+        return HistoryEntry(*row) if row else None
+
+    def delete(self, entry_id: int) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts WHERE id = ?", (entry_id,))
+            self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM transcripts")
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
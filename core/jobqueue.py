@@ -0,0 +1,576 @@
+"""
+Batch transcription spread over several machines through a shared directory.
+
+A queue is a directory every node can reach (a network share, or a local
+path for several worker processes on one box):
+
+    jobs/<id>.json       what to transcribe: audio path and options
+    leases/<id>.json     which worker holds the job, and until when
+    results/<id>.json    the transcript; its presence marks the job done
+    results/<id>.wseg    segments and word timestamps (``SegmentStore``)
+    failed/<id>.json     errors so far; after ``max_attempts`` the job is given up
+    workers/<name>.json  each worker's state and counters
+
+Claiming a job creates its lease with ``O_CREAT | O_EXCL``, which exactly
+one node can win.  The holder rewrites the lease every heartbeat.  A lease
+past its expiry belongs to a dead or cut-off node: it is reclaimed by
+renaming it aside, which again only one node can win, before claiming
+afresh.  Expiry compares wall clocks across nodes, so clocks should be
+synced and the lease a good deal longer than any skew between them.
+
+Every file is written under a temporary name and renamed into place.  A
+worker that finds its lease gone stops before writing, but a job can still
+finish twice (a node that stalls past its expiry and then completes);
+both write the same transcript, so the second rename simply replaces the
+first.  Deleting ``failed/<id>.json`` lets a given-up job run again.
+
+    python -m core.jobqueue submit QUEUE a.wav b.mp3 ...
+    python -m core.jobqueue work QUEUE --model base.en --slots 2
+    python -m core.jobqueue work QUEUE --model base.en --slots 2 --daemon
+    python -m core.jobqueue status QUEUE --watch 10
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import signal
+import socket
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from utils import format_bytes, get_process_memory
+
+logger = logging.getLogger(__name__)
+
+_DIRS = ("jobs", "leases", "results", "failed", "workers")
+_UNSAFE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    """Contents of ``path``, or None if it is missing or still being written."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _write_json(path: Path, data: dict) -> None:
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp.write_text(json.dumps(data), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def _ids(directory: Path, suffix: str = ".json") -> Iterator[str]:
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.name.endswith(suffix) and not entry.name.startswith("."):
+                yield entry.name[: -len(suffix)]
+
+
+@dataclass
+class Job:
+    id: str
+    audio: str
+    options: dict = field(default_factory=dict)
+    submitted: float = 0.0
+
+
+class Lease:
+    """A claimed job.  ``lost`` is set once another node has taken it over."""
+
+    def __init__(self, queue: "JobQueue", job: Job, worker: str) -> None:
+        self.queue = queue
+        self.job = job
+        self.worker = worker
+        self.token = uuid.uuid4().hex
+        self.claimed = time.time()
+        self.lost = threading.Event()
+        self.path = queue.root / "leases" / f"{job.id}.json"
+
+    def _record(self) -> dict:
+        now = time.time()
+        return {
+            "job": self.job.id, "worker": self.worker, "host": socket.gethostname(), "pid": os.getpid(),
+            "token": self.token, "claimed": self.claimed, "heartbeat": now, "expires": now + self.queue.lease_s,
+        }
+
+    def heartbeat(self) -> bool:
+        """Extend the lease; False (and ``lost`` set) if it is no longer ours."""
+        current = _read_json(self.path)
+        if current is None or current.get("token") != self.token:
+            if not self.lost.is_set():
+                logger.warning("Lost the lease on job %s", self.job.id)
+            self.lost.set()
+            return False
+        _write_json(self.path, self._record())
+        return True
+
+    def release(self) -> None:
+        current = _read_json(self.path)
+        if current is not None and current.get("token") == self.token:
+            self.path.unlink(missing_ok=True)
+
+
+class JobQueue:
+
+    def __init__(self, root: str | Path, lease_s: float = 60.0, max_attempts: int = 3) -> None:
+        self.root = Path(root)
+        self.lease_s = float(lease_s)
+        self.max_attempts = max(1, int(max_attempts))
+        self._submitted_at: Dict[str, float] = {}  # job files never change once written
+        for name in _DIRS:
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    # -- submission -----------------------------------------------------
+
+    def submit(self, audio_files: Iterable[str | Path], **options) -> List[str]:
+        """
+        Add jobs; returns the ids of those that were new.
+
+        Paths inside the queue directory are stored relative to it, so nodes
+        may mount the share at different places; others must be reachable
+        under the same path on every node.  Ids depend only on the path and
+        options, so submitting a file twice is a no-op.
+        """
+        added = []
+        for audio_file in audio_files:
+            path = Path(audio_file).resolve()
+            try:
+                stored = path.relative_to(self.root.resolve()).as_posix()
+            except ValueError:
+                stored = str(path)
+            digest = hashlib.sha1(json.dumps([stored, options], sort_keys=True).encode()).hexdigest()[:12]
+            job = Job(f"{_UNSAFE.sub('_', path.stem)[:40]}-{digest}", stored, options, time.time())
+            try:
+                fd = os.open(self.root / "jobs" / f"{job.id}.json", os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(job.__dict__, f)
+            added.append(job.id)
+        return added
+
+    def job(self, job_id: str) -> Optional[Job]:
+        data = _read_json(self.root / "jobs" / f"{job_id}.json")
+        return Job(**data) if data else None
+
+    def audio_path(self, job: Job) -> Path:
+        path = Path(job.audio)
+        return path if path.is_absolute() else self.root / path
+
+    # -- state ----------------------------------------------------------
+
+    def is_done(self, job_id: str) -> bool:
+        return (self.root / "results" / f"{job_id}.json").exists()
+
+    def failures(self, job_id: str) -> Optional[dict]:
+        """``{"attempts": n, "errors": [...]}`` for a job that has failed or been reclaimed."""
+        return _read_json(self.root / "failed" / f"{job_id}.json")
+
+    def attempts(self, job_id: str) -> int:
+        record = self.failures(job_id)
+        return record["attempts"] if record else 0
+
+    def result(self, job_id: str) -> Optional[dict]:
+        return _read_json(self.root / "results" / f"{job_id}.json")
+
+    def _lease_expiry(self, path: Path) -> Optional[float]:
+        record = _read_json(path)
+        if record is not None:
+            return record["expires"]
+        try:
+            # Claimed but never written (the claimant died between the two):
+            # expire it relative to its creation.
+            return path.stat().st_mtime + self.lease_s
+        except FileNotFoundError:
+            return None
+
+    # -- claiming -------------------------------------------------------
+
+    def claim(self, worker: str) -> Optional[Lease]:
+        """Lease the oldest runnable job for ``worker``, or None if there is none."""
+        for job_id in self._runnable():
+            lease_path = self.root / "leases" / f"{job_id}.json"
+            expiry = self._lease_expiry(lease_path)
+            if expiry is not None:
+                if expiry > time.time() or not self._reclaim(lease_path, worker):
+                    continue
+            job = self.job(job_id)
+            if job is None:
+                continue
+            try:
+                fd = os.open(lease_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            lease = Lease(self, job, worker)
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(lease._record(), f)
+            if self.is_done(job_id):
+                # Finished by the previous holder between our checks.
+                lease.release()
+                continue
+            return lease
+        return None
+
+    def _runnable(self) -> List[str]:
+        """Jobs neither done nor given up, oldest first, from one listing of each directory."""
+        done = set(_ids(self.root / "results"))
+        failed = set(_ids(self.root / "failed"))
+        pending = [
+            job_id for job_id in _ids(self.root / "jobs")
+            if job_id not in done and (job_id not in failed or self.attempts(job_id) < self.max_attempts)
+        ]
+        return sorted(pending, key=self._submitted)
+
+    def _submitted(self, job_id: str) -> float:
+        submitted = self._submitted_at.get(job_id)
+        if submitted is None:
+            job = self.job(job_id)
+            if job is None:
+                return 0.0  # still being written; read again next scan
+            submitted = self._submitted_at[job_id] = job.submitted
+        return submitted
+
+    def _reclaim(self, lease_path: Path, worker: str) -> bool:
+        """Move an expired lease aside; True if this node won the rename."""
+        aside = lease_path.with_name(f".{lease_path.name}.expired-{uuid.uuid4().hex}")
+        try:
+            os.rename(lease_path, aside)
+        except FileNotFoundError:
+            return False
+        # If the holder heartbeated between our read and the rename it now
+        # finds its lease gone and stops; the job is simply redone here.
+        stale = _read_json(aside) or {}
+        aside.unlink(missing_ok=True)
+        job_id = lease_path.stem
+        logger.info("Reclaimed job %s from %s", job_id, stale.get("worker", "an unknown worker"))
+        self._record_failure(job_id, worker, f"lease of {stale.get('worker', 'unknown')} expired")
+        return self.attempts(job_id) < self.max_attempts
+
+    # -- completion -----------------------------------------------------
+
+    def complete(self, lease: Lease, text: str, segments=None, **stats) -> bool:
+        """Store the result unless the lease was lost; True if written."""
+        if not lease.heartbeat():
+            return False
+        results = self.root / "results"
+        if segments is not None:
+            tmp = results / f".{lease.job.id}.{uuid.uuid4().hex}.wseg"
+            segments.save(tmp)
+            os.replace(tmp, results / f"{lease.job.id}.wseg")
+        _write_json(results / f"{lease.job.id}.json", {
+            "job": lease.job.id, "audio": lease.job.audio, "text": text,
+            "worker": lease.worker, "host": socket.gethostname(), "finished": time.time(), **stats,
+        })
+        lease.release()
+        return True
+
+    def fail(self, lease: Lease, error: str) -> bool:
+        """Count a failed attempt unless the lease was lost; True if recorded."""
+        if lease.lost.is_set() or not lease.heartbeat():
+            # Whoever took the job over was already charged by the reclaim.
+            return False
+        self._record_failure(lease.job.id, lease.worker, error)
+        lease.release()
+        return True
+
+    def _record_failure(self, job_id: str, worker: str, error: str) -> None:
+        path = self.root / "failed" / f"{job_id}.json"
+        record = _read_json(path) or {"attempts": 0, "errors": []}
+        record["attempts"] += 1
+        record["errors"].append({"worker": worker, "error": error, "at": time.time()})
+        _write_json(path, record)
+
+    # -- workers and progress -------------------------------------------
+
+    def report_worker(self, name: str, state: dict) -> None:
+        _write_json(self.root / "workers" / f"{_UNSAFE.sub('_', name)}.json", state)
+
+    def status(self) -> dict:
+        """Job counts by state and each worker's counters, read from the directory."""
+        now = time.time()
+        jobs = list(_ids(self.root / "jobs"))
+        done = set(_ids(self.root / "results"))
+        failed = set(_ids(self.root / "failed"))
+        running = stale = given_up = 0
+        for job_id in jobs:
+            if job_id in done:
+                continue
+            if job_id in failed and self.attempts(job_id) >= self.max_attempts:
+                given_up += 1
+                continue
+            expiry = self._lease_expiry(self.root / "leases" / f"{job_id}.json")
+            if expiry is not None:
+                if expiry > now:
+                    running += 1
+                else:
+                    stale += 1
+        finished = len(done & set(jobs))
+        workers = {}
+        for name in _ids(self.root / "workers"):
+            state = _read_json(self.root / "workers" / f"{name}.json")
+            if state is not None:
+                workers[name] = state
+        return {
+            "total": len(jobs),
+            "done": finished,
+            "running": running,
+            "stale": stale,
+            "failed": given_up,
+            "pending": len(jobs) - finished - running - stale - given_up,
+            "workers": workers,
+            "time": now,
+        }
+
+
+def format_status(status: dict, lease_s: float = 60.0) -> str:
+    lines = [
+        f"{status['done']}/{status['total']} done, {status['running']} running, {status['pending']} pending, "
+        f"{status['stale']} stale lease(s), {status['failed']} failed"
+    ]
+    for name, w in sorted(status["workers"].items()):
+        age = status["time"] - w.get("last_seen", 0)
+        state = w.get("state", "?")
+        if state != "stopped" and age > 2 * lease_s:
+            state = "silent"
+        span = max(1e-9, w.get("last_seen", 0) - w.get("started", 0))
+        busy = w.get("busy_s", 0.0)
+        lines.append(
+            f"  {name:<28} {state:<8} {w.get('jobs', 0):>5} jobs {w.get('audio_s', 0.0) / 3600:>7.2f} h audio "
+            f"{(w.get('audio_s', 0.0) / busy) if busy else 0.0:>6.1f}x realtime {w.get('jobs', 0) / span * 3600:>7.1f} jobs/h "
+            f"{w.get('failures', 0):>3} failed  {w.get('slots', 1)} slot(s) "
+            f"rss {format_bytes(w.get('rss', 0))} pss {format_bytes(w.get('pss', 0))}  seen {age:.0f}s ago"
+        )
+    return "\n".join(lines)
+
+
+class QueueWorker:
+    """
+    Takes jobs from a ``JobQueue`` and transcribes them with a
+    ``TranscriptionEngine``, ``slots`` at a time.
+
+    The slots share the engine's model, so give it a pool of as many slots
+    in ``workers`` mode: N jobs then run over one copy of the weights.
+    Worker processes on one machine share a copy by decoding in the
+    resident daemon (``RemoteModelFactory``); each process then holds no
+    weights of its own.
+    """
+
+    def __init__(self, queue: JobQueue, engine, name: Optional[str] = None,
+                 heartbeat_s: Optional[float] = None, long_file_threshold_s: float = 600.0,
+                 slots: int = 1) -> None:
+        self.queue = queue
+        self.engine = engine
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.heartbeat_s = heartbeat_s or queue.lease_s / 4
+        self.long_file_threshold_s = long_file_threshold_s
+        self.slots = max(1, slots)
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._running: set = set()
+        self._state = {
+            "worker": self.name, "host": socket.gethostname(), "pid": os.getpid(), "started": time.time(),
+            "slots": self.slots, "state": "idle", "running": [], "jobs": 0, "audio_s": 0.0, "busy_s": 0.0,
+            "failures": 0,
+        }
+
+    def stop(self) -> None:
+        """Finish the current jobs, then return from ``run``."""
+        self._stop.set()
+
+    def run(self, exit_when_empty: bool = False, poll_s: float = 5.0) -> int:
+        """
+        Process jobs until stopped or, with ``exit_when_empty``, until every
+        job is done or given up; returns the number of jobs done.
+        """
+        self._report()
+        slots = [
+            threading.Thread(target=self._serve, args=(exit_when_empty, poll_s), name=f"job-slot-{i}", daemon=True)
+            for i in range(1, self.slots)
+        ]
+        for slot in slots:
+            slot.start()
+        try:
+            self._serve(exit_when_empty, poll_s)
+            for slot in slots:
+                slot.join()
+        finally:
+            self._report(stopped=True)
+        return self._state["jobs"]
+
+    def _serve(self, exit_when_empty: bool, poll_s: float) -> None:
+        while not self._stop.is_set():
+            lease = self.queue.claim(self.name)
+            if lease is None:
+                status = self.queue.status()
+                if exit_when_empty and not (status["running"] or status["stale"] or status["pending"]):
+                    return
+                # Jobs held by other workers come back if their leases expire.
+                self._report()
+                self._stop.wait(min(poll_s, self.queue.lease_s / 2))
+                continue
+            self._process(lease)
+
+    def _report(self, stopped: bool = False) -> None:
+        with self._lock:
+            self._state.update(
+                state="stopped" if stopped else "busy" if self._running else "idle",
+                running=sorted(self._running), last_seen=time.time(), **get_process_memory(),
+            )
+            self.queue.report_worker(self.name, self._state)
+
+    def _heartbeat(self, lease: Lease, done: threading.Event) -> None:
+        while not done.wait(self.heartbeat_s):
+            if not lease.heartbeat():
+                return
+            self._report()
+
+    def _process(self, lease: Lease) -> None:
+        from core.transcription.longform import audio_duration
+
+        job = lease.job
+        with self._lock:
+            self._running.add(job.id)
+        self._report()
+        done = threading.Event()
+        beat = threading.Thread(target=self._heartbeat, args=(lease, done), daemon=True)
+        beat.start()
+        started = time.perf_counter()
+        try:
+            audio_file = self.queue.audio_path(job)
+            duration = audio_duration(str(audio_file))
+            long_form = self.long_file_threshold_s > 0 and duration >= self.long_file_threshold_s
+            transcriber = self.engine.transcriber
+            with self.engine.models.lease() as model:
+                if long_form:
+                    segments = transcriber.transcribe_long_segments(
+                        model, audio_file, should_stop=lease.lost.is_set, **job.options
+                    )
+                else:
+                    segments = transcriber.transcribe_segments(
+                        model, audio_file=audio_file, should_stop=lease.lost.is_set, cache=False, **job.options
+                    )
+            if segments is None:
+                return
+            text = segments.joined_text("").strip() if long_form else segments.joined_text()
+            elapsed = time.perf_counter() - started
+            name, quant, device = self.engine.models.current_key or (None, None, None)
+            if self.queue.complete(
+                lease, transcriber.postprocess(text), segments,
+                audio_s=duration, elapsed_s=elapsed, model=name, quantization=quant, device=device,
+            ):
+                with self._lock:
+                    self._state["jobs"] += 1
+                    self._state["audio_s"] += duration
+                logger.info("Finished %s (%.0fs of audio in %.1fs)", job.id, duration, elapsed)
+        except Exception as exc:
+            if not self.queue.fail(lease, str(exc)):
+                logger.warning("Job %s failed after its lease was lost: %s", job.id, exc)
+                return
+            logger.exception("Job %s failed", job.id)
+            with self._lock:
+                self._state["failures"] += 1
+        finally:
+            done.set()
+            beat.join()
+            with self._lock:
+                self._state["busy_s"] += time.perf_counter() - started
+                self._running.discard(job.id)
+            self._report()
+
+
+# ---------------------------------------------------------------- CLI
+
+
+def main() -> None:
+    from config.manager import config_manager
+
+    parser = argparse.ArgumentParser(prog="python -m core.jobqueue")
+    parser.add_argument("--lease", type=float, default=config_manager.get_value("job_lease_s", 60),
+                        help="seconds a claim lasts without a heartbeat")
+    parser.add_argument("--max-attempts", type=int, default=config_manager.get_value("job_max_attempts", 3))
+    sub = parser.add_subparsers(dest="command", required=True)
+    submit = sub.add_parser("submit", help="add audio files to the queue")
+    submit.add_argument("queue")
+    submit.add_argument("audio", nargs="+")
+    submit.add_argument("--language")
+    work = sub.add_parser("work", help="transcribe jobs from the queue")
+    work.add_argument("queue")
+    work.add_argument("--model")
+    work.add_argument("--quantization")
+    work.add_argument("--device")
+    work.add_argument("--name", help="worker name (default host-pid)")
+    work.add_argument("--slots", type=int, default=config_manager.get_value("job_worker_slots", 1),
+                      help="jobs to run at once over one copy of the model")
+    work.add_argument("--daemon", action="store_true", default=config_manager.get_value("job_worker_daemon", False),
+                      help="decode in the resident daemon, sharing its model with other workers")
+    work.add_argument("--exit-when-empty", action="store_true")
+    status = sub.add_parser("status", help="report progress and per-node throughput")
+    status.add_argument("queue")
+    status.add_argument("--watch", type=float, help="refresh every N seconds")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    queue = JobQueue(args.queue, args.lease, args.max_attempts)
+
+    if args.command == "submit":
+        options = {"language": args.language} if args.language else {}
+        added = queue.submit(args.audio, **options)
+        print(f"Submitted {len(added)} new job(s), {len(args.audio) - len(added)} already queued")
+    elif args.command == "status":
+        while True:
+            print(format_status(queue.status(), queue.lease_s), flush=True)
+            if not args.watch:
+                break
+            time.sleep(args.watch)
+    elif args.command == "work":
+        from core.engine import TranscriptionEngine
+
+        settings = config_manager.get_model_settings()
+        client = factory = None
+        if args.daemon:
+            from core.daemon import DaemonClient, RemoteModelFactory
+            from core.transcription.priority import BATCH
+
+            client = DaemonClient.connect(autostart=config_manager.get_value("daemon_autostart", True))
+            if client is None:
+                raise SystemExit("Could not reach the transcription daemon")
+            # Queue jobs yield the shared model to interactive clips between segments.
+            factory = RemoteModelFactory(client, BATCH)
+        engine = TranscriptionEngine(
+            curate=config_manager.get_value("curate_transcription", False),
+            guard_enabled=config_manager.get_value("decode_guard", True),
+            pool_size=args.slots,
+            pool_mode="workers",
+            model_factory=factory,
+        )
+        engine.load_model(
+            args.model or settings["model_name"],
+            args.quantization or settings["quantization_type"],
+            args.device or settings["device_type"],
+        )
+        worker = QueueWorker(
+            queue, engine, args.name,
+            long_file_threshold_s=config_manager.get_value("long_file_threshold", 600),
+            slots=args.slots,
+        )
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: worker.stop())
+        try:
+            print(f"{worker.name}: {worker.run(args.exit_when_empty)} job(s) done")
+        finally:
+            engine.close()
+            if client is not None:
+                client.close()
+
+
+if __name__ == "__main__":
+    main()
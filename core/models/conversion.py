@@ -0,0 +1,87 @@
+"""
+Local int8 model variants.
+
+The hosted ``ctranslate2-4you`` repos only carry float weights.  int8
+compute types are served from an ``int8`` entry in the local store, produced
+once with ctranslate2's Transformers converter and then reused for every
+int8 compute type (``int8_float16`` etc. only differ in how the remaining
+layers run).
+
+CTranslate2 cannot re-quantize a converted model on disk, so the converter
+starts from the original Transformers checkpoint (``openai/whisper-*`` or
+``distil-whisper/*``), which transformers fetches from the Hugging Face Hub
+into its own cache: a separate, larger download than the CTranslate2 model.
+Set ``int8_conversion: false`` to never fetch it.  Without the conversion,
+or without the converter's dependencies, the loader uses the float32 weights
+and ctranslate2 quantizes them while loading.
+"""
+from __future__ import annotations
+
+import logging
+import shutil
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+INT8_TYPES = ("int8", "int8_float32", "int8_float16", "int8_bfloat16")
+
+_CONVERTER_COPY_FILES = ["tokenizer.json", "preprocessor_config.json"]
+
+
+def is_int8(quantization_type: str) -> bool:
+    return quantization_type in INT8_TYPES
+
+
+def storage_quantization(quantization_type: str) -> str:
+    """Weight type kept on disk for a given compute type."""
+    return "int8" if is_int8(quantization_type) else quantization_type
+
+
+def source_model_id(model_name: str) -> str:
+    """Original Transformers checkpoint a CTranslate2 model was converted from."""
+    if model_name.startswith("distil-whisper-"):
+        return f"distil-whisper/distil-{model_name[len('distil-whisper-'):]}"
+    return f"openai/whisper-{model_name}"
+
+
+def converter_available() -> bool:
+    try:
+        import transformers  # noqa: F401
+        from ctranslate2.converters import TransformersConverter  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def convert_to_int8(model_name: str, output_dir: str | Path) -> Optional[Path]:
+    """
+    Convert the original checkpoint to int8 CTranslate2 weights.
+
+    Downloads the checkpoint from the Hugging Face Hub unless transformers
+    has it cached.  Returns None when the converter cannot run here so the
+    caller can fall back to quantizing float32 weights at load time.
+    """
+    if not converter_available():
+        logger.warning("transformers is not installed, cannot convert %s to int8", model_name)
+        return None
+
+    from ctranslate2.converters import TransformersConverter
+
+    output_dir = Path(output_dir)
+    tmp_dir = output_dir.with_name(output_dir.name + ".converting")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    model_id = source_model_id(model_name)
+    logger.info("Fetching %s from the Hugging Face Hub to convert it to int8 …", model_id)
+    try:
+        converter = TransformersConverter(model_id, copy_files=_CONVERTER_COPY_FILES)
+        converter.convert(str(tmp_dir), quantization="int8", force=True)
+    except Exception:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.exception("Conversion of %s failed", model_id)
+        return None
+
+    shutil.rmtree(output_dir, ignore_errors=True)
+    tmp_dir.rename(output_dir)
+    return output_dir
@@ -0,0 +1,288 @@
+"""
+Parallel, resumable model downloads.
+
+Files of a Hugging Face model repo are split into fixed-size byte ranges
+that are fetched concurrently with HTTP ``Range`` requests and written in
+place into a preallocated ``<name>.part`` file.  Finished ranges are
+recorded in a ``<name>.part.json`` sidecar so an interrupted download picks
+up where it left off.  Each completed file is checked against the hash the
+hub reports (sha256 for LFS files, the git blob id otherwise) before it is
+renamed into place.  Files already present are kept only if they pass
+the same check.
+"""
+from __future__ import annotations
+
+import fnmatch
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ProgressCallback = Callable[[int, int, float], None]  # done bytes, total bytes, bytes/s
+
+# Same files faster-whisper fetches for a CTranslate2 Whisper model.
+MODEL_FILE_PATTERNS = (
+    "config.json",
+    "preprocessor_config.json",
+    "model.bin",
+    "tokenizer.json",
+    "vocabulary.*",
+)
+
+_READ_SIZE = 1024 * 1024
+
+
+class DownloadError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class RemoteFile:
+    path: str
+    size: int
+    sha256: Optional[str] = None
+    git_oid: Optional[str] = None
+
+
+def _file_digest_matches(path: Path, remote: RemoteFile) -> bool:
+    if remote.sha256:
+        digest = hashlib.sha256()
+        expected = remote.sha256
+    elif remote.git_oid:
+        digest = hashlib.sha1()
+        digest.update(b"blob %d\0" % remote.size)
+        expected = remote.git_oid
+    else:
+        return True
+    with path.open("rb") as f:
+        while chunk := f.read(_READ_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest() == expected
+
+
+class _Progress:
+
+    def __init__(self, total: int, callback: Optional[ProgressCallback], interval: float = 0.25):
+        self.total = total
+        self.done = 0
+        self._callback = callback
+        self._interval = interval
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+        self._session_bytes = 0
+        self._last_report = 0.0
+
+    def add(self, nbytes: int, resumed: bool = False, force: bool = False) -> None:
+        with self._lock:
+            self.done += nbytes
+            if not resumed:
+                self._session_bytes += nbytes
+            now = time.perf_counter()
+            if self._callback is None or (not force and now - self._last_report < self._interval):
+                return
+            self._last_report = now
+            rate = self._session_bytes / max(now - self._start, 1e-6)
+            done, total = self.done, self.total
+        self._callback(done, total, rate)
+
+
+class ModelDownloader:
+
+    def __init__(
+        self,
+        endpoint: str = "https://huggingface.co",
+        revision: str = "main",
+        max_workers: int = 8,
+        chunk_size: int = 16 * 1024 * 1024,
+        timeout: float = 30.0,
+        token: Optional[str] = None,
+        progress_callback: Optional[ProgressCallback] = None,
+        allow_patterns: Iterable[str] = MODEL_FILE_PATTERNS,
+    ) -> None:
+        self.endpoint = endpoint.rstrip("/")
+        self.revision = revision
+        self.max_workers = max(1, max_workers)
+        self.chunk_size = max(1, chunk_size)
+        self.timeout = timeout
+        self.token = token if token is not None else os.environ.get("HF_TOKEN")
+        self.progress_callback = progress_callback
+        self.allow_patterns = tuple(allow_patterns)
+        self._state_lock = threading.Lock()
+
+    def _request(self, url: str, headers: Optional[Dict[str, str]] = None) -> urllib.request.Request:
+        request = urllib.request.Request(url, headers=headers or {})
+        if self.token:
+            request.add_header("Authorization", f"Bearer {self.token}")
+        return request
+
+    def _file_url(self, repo_id: str, path: str) -> str:
+        return (
+            f"{self.endpoint}/{repo_id}/resolve/"
+            f"{urllib.parse.quote(self.revision, safe='')}/{urllib.parse.quote(path)}"
+        )
+
+    def list_files(self, repo_id: str) -> List[RemoteFile]:
+        url = (
+            f"{self.endpoint}/api/models/{repo_id}/tree/"
+            f"{urllib.parse.quote(self.revision, safe='')}?recursive=true"
+        )
+        try:
+            with urllib.request.urlopen(self._request(url), timeout=self.timeout) as response:
+                listing = json.load(response)
+        except Exception as exc:
+            raise DownloadError(f"Could not list files of {repo_id}: {exc}") from exc
+
+        files = []
+        for item in listing:
+            if item.get("type") != "file":
+                continue
+            if not any(fnmatch.fnmatch(item["path"], pattern) for pattern in self.allow_patterns):
+                continue
+            lfs = item.get("lfs") or {}
+            files.append(RemoteFile(
+                path=item["path"],
+                size=int(item["size"]),
+                sha256=lfs.get("oid"),
+                git_oid=None if lfs else item.get("oid"),
+            ))
+        if not files:
+            raise DownloadError(f"No model files found in {repo_id}")
+        return files
+
+    def download(self, repo_id: str, output_dir: str | Path) -> Path:
+        """Fetch every model file of ``repo_id`` into ``output_dir``."""
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        files = self.list_files(repo_id)
+        progress = _Progress(sum(f.size for f in files), self.progress_callback)
+
+        tasks = []
+        states: Dict[str, set[int]] = {}
+        for remote in files:
+            target = output_dir / remote.path
+            if target.is_file() and target.stat().st_size == remote.size:
+                # Same size is not enough: a corrupt copy must not be registered as verified.
+                if _file_digest_matches(target, remote):
+                    progress.add(remote.size, resumed=True)
+                    continue
+                logger.warning("%s does not match the hub's hash, downloading it again", target)
+                target.unlink()
+            target.parent.mkdir(parents=True, exist_ok=True)
+            done = self._prepare_part(target, remote.size)
+            states[remote.path] = done
+            for index, (start, end) in enumerate(self._ranges(remote.size)):
+                if index in done:
+                    progress.add(end - start + 1, resumed=True)
+                else:
+                    tasks.append((remote, index, start, end))
+
+        logger.info(
+            "Downloading %s: %d files, %d ranges, %d workers",
+            repo_id, len(states), len(tasks), self.max_workers,
+        )
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [
+                pool.submit(self._fetch_range, repo_id, output_dir, remote, index, start, end, states, progress)
+                for remote, index, start, end in tasks
+            ]
+            for future in futures:
+                future.result()
+
+        for remote in files:
+            if remote.path in states:
+                self._finalize(output_dir / remote.path, remote)
+
+        progress.add(0, force=True)
+        elapsed = time.perf_counter() - start_time
+        logger.info("Downloaded %s in %.1fs", repo_id, elapsed)
+        return output_dir
+
+    def _ranges(self, size: int) -> List[tuple[int, int]]:
+        if size == 0:
+            return []
+        return [
+            (start, min(start + self.chunk_size, size) - 1)
+            for start in range(0, size, self.chunk_size)
+        ]
+
+    @staticmethod
+    def _part_paths(target: Path) -> tuple[Path, Path]:
+        return target.with_name(target.name + ".part"), target.with_name(target.name + ".part.json")
+
+    def _prepare_part(self, target: Path, size: int) -> set[int]:
+        part, state = self._part_paths(target)
+        done: set[int] = set()
+        if part.is_file() and part.stat().st_size == size and state.is_file():
+            try:
+                saved = json.loads(state.read_text())
+                if saved.get("size") == size and saved.get("chunk_size") == self.chunk_size:
+                    done = set(saved.get("done", []))
+            except (OSError, ValueError):
+                done = set()
+        if not done:
+            with part.open("wb") as f:
+                f.truncate(size)
+            self._write_state(state, size, done)
+        else:
+            logger.info("Resuming %s (%d ranges already present)", target.name, len(done))
+        return done
+
+    def _write_state(self, state: Path, size: int, done: set[int]) -> None:
+        tmp = state.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"size": size, "chunk_size": self.chunk_size, "done": sorted(done)}))
+        os.replace(tmp, state)
+
+    def _fetch_range(
+        self,
+        repo_id: str,
+        output_dir: Path,
+        remote: RemoteFile,
+        index: int,
+        start: int,
+        end: int,
+        states: Dict[str, set[int]],
+        progress: _Progress,
+    ) -> None:
+        target = output_dir / remote.path
+        part, state = self._part_paths(target)
+        request = self._request(self._file_url(repo_id, remote.path), {"Range": f"bytes={start}-{end}"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                if response.status != 206 and (start, end) != (0, remote.size - 1):
+                    raise DownloadError("server ignored the Range header")
+                with part.open("r+b") as f:
+                    f.seek(start)
+                    remaining = end - start + 1
+                    while remaining > 0:
+                        chunk = response.read(min(_READ_SIZE, remaining))
+                        if not chunk:
+                            raise DownloadError("connection closed early")
+                        f.write(chunk)
+                        remaining -= len(chunk)
+                        progress.add(len(chunk))
+        except Exception as exc:
+            raise DownloadError(f"Failed to fetch {remote.path} [{start}-{end}]: {exc}") from exc
+
+        with self._state_lock:
+            states[remote.path].add(index)
+            self._write_state(state, remote.size, states[remote.path])
+
+    def _finalize(self, target: Path, remote: RemoteFile) -> None:
+        part, state = self._part_paths(target)
+        if not _file_digest_matches(part, remote):
+            part.unlink(missing_ok=True)
+            state.unlink(missing_ok=True)
+            raise DownloadError(f"Hash mismatch for {remote.path}, partial file discarded")
+        os.replace(part, target)
+        state.unlink(missing_ok=True)
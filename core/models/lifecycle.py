@@ -0,0 +1,256 @@
+"""
+Qt-free model lifecycle.
+
+``ModelHost`` owns the loaded Whisper models, each held as a ``ModelPool``:
+the current one, any auxiliary models kept next to it, the idle timer that unloads them, and the memory
+accounting around loads and unloads.  Everything here is plain threading so
+it can be driven from a script, a service, or the Qt adapter in
+``core.models.manager``.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from contextlib import contextmanager
+from functools import partial
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from utils import format_bytes, get_process_rss, release_freed_memory
+from ..cpu import cpu_partition
+from .pool import ModelPool
+
+logger = logging.getLogger(__name__)
+
+ModelKey = Tuple[str, str, str]  # model name, quantization, device
+
+
+class ModelHost:
+
+    def __init__(self, idle_timeout_s: float = 0, pool_size: int = 1, pool_mode: str = "workers",
+                 model_factory: Optional[Callable[..., object]] = None) -> None:
+        self._lock = threading.RLock()
+        self._model_factory = model_factory
+        self._model: Optional[ModelPool] = None
+        self._auxiliary: Dict[ModelKey, Optional[ModelPool]] = {}
+        self.pool_size = max(1, pool_size)
+        self.pool_mode = pool_mode
+        self._current_settings: Dict[str, str] = {}
+        self._loading = False
+        self._idle_timeout = 0.0
+        self._idle_timer: Optional[threading.Timer] = None
+        self.memory_footprint = 0
+        self.on_unloaded: Optional[Callable[[int, int], None]] = None
+        self.set_idle_timeout(idle_timeout_s)
+
+    @property
+    def is_loading(self) -> bool:
+        return self._loading
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def current_settings(self) -> Dict[str, str]:
+        return dict(self._current_settings)
+
+    @property
+    def current_key(self) -> Optional[ModelKey]:
+        if not self._current_settings:
+            return None
+        return (
+            self._current_settings["model_name"],
+            self._current_settings["quantization_type"],
+            self._current_settings["device_type"],
+        )
+
+    def set_idle_timeout(self, seconds: float) -> None:
+        """Unload models after ``seconds`` without use; 0 keeps them resident."""
+        self._idle_timeout = max(0.0, float(seconds or 0))
+        self.touch()
+
+    def configure_pool(self, size: int, mode: str = "workers") -> None:
+        """Parallel slots per model; applies to the next load."""
+        self.pool_size = max(1, size)
+        self.pool_mode = mode
+
+    def _build_pool(self, model_name: str, quantization_type: str, device_type: str,
+                    progress_callback=None) -> ModelPool:
+        if self._model_factory is None:
+            from .loader import load_model
+            self._model_factory = load_model
+
+        factory = partial(
+            self._model_factory, model_name, quantization_type, device_type,
+            progress_callback=progress_callback,
+        )
+        pool = ModelPool.load(factory, self.pool_size, self.pool_mode)
+        # Every lease, including the scheduler's direct ones, restarts the idle countdown.
+        pool.on_release = self.touch
+        cpu_partition.isolate()  # the new ctranslate2 threads stay off the capture core
+        return pool
+
+    def begin_load(self) -> None:
+        """Mark a load as in flight before it is handed to a worker."""
+        self._loading = True
+
+    def load(
+        self,
+        model_name: str,
+        quantization_type: str,
+        device_type: str,
+        progress_callback=None,
+    ):
+        """Load a model synchronously and make it the current one."""
+        self._loading = True
+        try:
+            rss_before = get_process_rss()
+            model = self.build(model_name, quantization_type, device_type, progress_callback)
+            footprint = max(0, get_process_rss() - rss_before)
+        finally:
+            self._loading = False
+        self.install((model_name, quantization_type, device_type), model, footprint)
+        return model
+
+    def build(self, model_name: str, quantization_type: str, device_type: str,
+              progress_callback=None) -> ModelPool:
+        """Load a model pool without touching the current one."""
+        return self._build_pool(model_name, quantization_type, device_type, progress_callback)
+
+    def install(self, key: ModelKey, model: ModelPool, footprint: int = 0) -> None:
+        """Atomically make a built pool the current model; in-flight leases finish on the old one."""
+        model_name, quantization_type, device_type = key
+        with self._lock:
+            previous, self._model = self._model, model
+            self._current_settings = {
+                "model_name": model_name,
+                "quantization_type": quantization_type,
+                "device_type": device_type,
+            }
+            self._auxiliary.pop(key, None)
+            self.memory_footprint = footprint
+        if previous is not None:
+            del previous
+            release_freed_memory()
+        logger.info("Model %s resident, footprint %s", model_name, format_bytes(footprint))
+        self.touch()
+
+    def fail_load(self) -> None:
+        self._loading = False
+
+    def reserve_auxiliary(self, key: ModelKey) -> bool:
+        """Claim a slot for an auxiliary model; False if it is loaded or loading."""
+        with self._lock:
+            if key in self._auxiliary or key == self.current_key:
+                return False
+            self._auxiliary[key] = None
+            return True
+
+    def load_auxiliary(self, model_name: str, quantization_type: str, device_type: str):
+        """Load an extra model that stays resident next to the current one."""
+        key = (model_name, quantization_type, device_type)
+        with self._lock:
+            self._auxiliary.setdefault(key, None)
+        try:
+            rss_before = get_process_rss()
+            model = self._build_pool(model_name, quantization_type, device_type)
+            footprint = max(0, get_process_rss() - rss_before)
+        except Exception:
+            with self._lock:
+                self._auxiliary.pop(key, None)
+            raise
+
+        with self._lock:
+            if key not in self._auxiliary:
+                return None
+            self._auxiliary[key] = model
+        logger.info("Auxiliary model %s resident, footprint %s", model_name, format_bytes(footprint))
+        return model
+
+    def available_models(self) -> set:
+        """Keys of every model that can serve a transcription right now."""
+        with self._lock:
+            keys = {key for key, model in self._auxiliary.items() if model is not None}
+            if self._model is not None:
+                keys.add(self.current_key)
+            return keys
+
+    def get_pool(self, key: Optional[ModelKey] = None) -> Optional[ModelPool]:
+        with self._lock:
+            if key is None or key == self.current_key:
+                model = self._model
+            else:
+                model = self._auxiliary.get(key)
+        self.touch()
+        return model
+
+    @contextmanager
+    def lease(self, key: Optional[ModelKey] = None, timeout: Optional[float] = None) -> Iterator[object]:
+        """Borrow a replica of a resident model for one transcription."""
+        pool = self.get_pool(key)
+        if pool is None and key is None:
+            pool = self.ensure_loaded()
+        if pool is None:
+            raise RuntimeError("No model loaded")
+        with pool.lease(timeout) as model:
+            yield model
+        self.touch()
+
+    def reload_settings(self) -> Optional[Dict[str, str]]:
+        """Settings to reload if the current model was unloaded, else None."""
+        if self._model is not None or self._loading or not self._current_settings:
+            return None
+        return dict(self._current_settings)
+
+    def ensure_loaded(self):
+        """Synchronously reload the last model if it was unloaded."""
+        settings = self.reload_settings()
+        if settings is not None:
+            logger.info("Reloading idle-unloaded model %s", settings["model_name"])
+            self.load(settings["model_name"], settings["quantization_type"], settings["device_type"])
+        return self.get_pool()
+
+    def unload(self) -> Optional[Tuple[int, int]]:
+        """Drop resident models; returns RSS before and after, or None if none was dropped."""
+        with self._lock:
+            if self._model is None and not any(self._auxiliary.values()):
+                return None
+            pools = [self._model, *self._auxiliary.values()]
+            if any(pool is not None and pool.active for pool in pools):
+                # A long file or batch run is still decoding; its release re-arms the countdown.
+                logger.debug("Not unloading: a model is in use")
+                return None
+            rss_before = get_process_rss()
+            self._model = None
+            self._auxiliary.clear()
+            self.memory_footprint = 0
+        release_freed_memory()
+        rss_after = get_process_rss()
+        logger.info(
+            "Unloaded model %s: RSS %s -> %s",
+            self._current_settings.get("model_name"),
+            format_bytes(rss_before),
+            format_bytes(rss_after),
+        )
+        if self.on_unloaded is not None:
+            self.on_unloaded(rss_before, rss_after)
+        return rss_before, rss_after
+
+    def touch(self) -> None:
+        """Restart the idle countdown."""
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            if self._idle_timeout and self._model is not None:
+                self._idle_timer = threading.Timer(self._idle_timeout, self.unload)
+                self._idle_timer.daemon = True
+                self._idle_timer.start()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._idle_timer is not None:
+                self._idle_timer.cancel()
+                self._idle_timer = None
+            self._model = None
+            self._auxiliary.clear()
@@ -4,11 +4,18 @@ Model loading utilities.
 from __future__ import annotations
 
 import logging
-from typing import Optional
+import time
+from pathlib import Path
+from typing import Optional, Tuple
 
-import psutil
 from faster_whisper import WhisperModel
 
+from config.manager import config_manager
+from ..cpu import cpu_partition
+from .conversion import convert_to_int8, is_int8, storage_quantization
+from .downloader import ModelDownloader, ProgressCallback
+from .registry import LocalModelRegistry, get_default_registry
+
 logger = logging.getLogger(__name__)
 
 def _make_repo_string(model_name: str, quantization_type: str) -> str:
@@ -16,31 +23,84 @@ def _make_repo_string(model_name: str, quantization_type: str) -> str:
         return f"ctranslate2-4you/{model_name}-ct2-{quantization_type}"
     return f"ctranslate2-4you/whisper-{model_name}-ct2-{quantization_type}"
 
+def resolve_model_path(
+    model_name: str,
+    quantization_type: str,
+    registry: Optional[LocalModelRegistry] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+) -> Path:
+    """Return a local model directory, fetching it into the store only on a miss."""
+    return _resolve(model_name, quantization_type, registry or get_default_registry(), progress_callback)[0]
+
+def _resolve(
+    model_name: str,
+    quantization_type: str,
+    registry: LocalModelRegistry,
+    progress_callback: Optional[ProgressCallback],
+) -> Tuple[Path, str]:
+    """Model directory and the weight type it actually holds."""
+    storage = storage_quantization(quantization_type)
+    path = registry.resolve(model_name, storage)
+    if path is not None:
+        return path, storage
+
+    if is_int8(storage):
+        converted = None
+        if config_manager.get_value("int8_conversion", True):
+            converted = convert_to_int8(model_name, registry.entry_dir(model_name, storage))
+        if converted is not None:
+            return registry.register(model_name, storage, converted), storage
+        logger.warning(
+            "No int8 weights for %s; loading float32 weights, quantized to %s while loading",
+            model_name, quantization_type,
+        )
+        return _resolve(model_name, "float32", registry, progress_callback)
+
+    repo = _make_repo_string(model_name, storage)
+    logger.info("Model %s not in local store, downloading …", repo)
+    output_dir = registry.entry_dir(model_name, storage)
+    downloader = ModelDownloader(
+        endpoint=config_manager.get_value("model_hub_endpoint", "https://huggingface.co"),
+        max_workers=config_manager.get_value("download_workers", 8),
+        progress_callback=progress_callback,
+    )
+    downloader.download(repo, output_dir)
+    return registry.register(model_name, storage, output_dir), storage
+
 def load_model(
     model_name: str,
     quantization_type: str = "float32",
     device_type: str = "cpu",
     cpu_threads: Optional[int] = None,
+    registry: Optional[LocalModelRegistry] = None,
+    progress_callback: Optional[ProgressCallback] = None,
+    num_workers: int = 1,
 ) -> WhisperModel:
 
+    registry = registry or get_default_registry()
     repo = _make_repo_string(model_name, quantization_type)
-    logger.info("Loading Whisper model %s on %s …", repo, device_type)
 
     if cpu_threads is None:
-        cpu_threads = psutil.cpu_count(logical=False) or 1
+        cpu_threads = cpu_partition.decode_threads()
 
     try:
+        path, storage = _resolve(model_name, quantization_type, registry, progress_callback)
+        logger.info("Loading Whisper model %s from %s on %s …", repo, path, device_type)
+        start = time.perf_counter()
         model = WhisperModel(
-            repo,
+            str(path),
             device=device_type,
             compute_type=quantization_type,
             cpu_threads=cpu_threads,
+            num_workers=num_workers,
         )
+        elapsed = time.perf_counter() - start
     except Exception as exc:
         logger.exception("Failed to load model %s", repo)
         raise RuntimeError(f"Error loading model {repo}: {exc}") from exc
 
-    logger.info("Model %s ready", repo)
+    registry.record_load_time(model_name, storage, elapsed)
+    logger.info("Model %s ready in %.2fs", repo, elapsed)
     return model
 
 
@@ -1,17 +1,24 @@
 # core/models/manager.py
 from typing import Optional
-from PySide6.QtCore import QObject, Signal, QMutex, QRunnable, QThreadPool
-import gc
-from .loader import load_model
+from PySide6.QtCore import QObject, Signal, QRunnable, QThreadPool
+import logging
+from .lifecycle import ModelHost
+from .prefetch import Prefetcher
+from .scheduler import LoadScheduler
+
+logger = logging.getLogger(__name__)
 
 class _LoaderSignals(QObject):
-    model_loaded = Signal(object, str, str, str)  # model, model_name, quant, device
+    model_loaded = Signal(str, str, str)  # model_name, quant, device
     error_occurred = Signal(str)
+    download_progress = Signal(object, object, float)  # done bytes, total bytes, bytes/s
+    superseded = Signal(str)  # model_name
 
-class _ModelLoaderRunnable(QRunnable):
-    def __init__(self, model_name: str, quant_type: str, device: str) -> None:
+class _AuxiliaryLoaderRunnable(QRunnable):
+    def __init__(self, host: ModelHost, model_name: str, quant_type: str, device: str) -> None:
         super().__init__()
         self.setAutoDelete(True)
+        self.host = host
         self.model_name = model_name
         self.quant_type = quant_type
         self.device = device
@@ -19,61 +26,137 @@ class _ModelLoaderRunnable(QRunnable):
 
     def run(self) -> None:
         try:
-            model = load_model(self.model_name, self.quant_type, self.device)
-            self.signals.model_loaded.emit(
-                model, self.model_name, self.quant_type, self.device
-            )
+            if self.host.load_auxiliary(self.model_name, self.quant_type, self.device) is None:
+                return
+            self.signals.model_loaded.emit(self.model_name, self.quant_type, self.device)
         except Exception as exc:
             self.signals.error_occurred.emit(str(exc))
 
 class ModelManager(QObject):
     model_loaded = Signal(str, str, str)  # name, quant, device
     model_error = Signal(str)
-    
-    def __init__(self):
+    model_unloaded = Signal(object, object)  # rss before, rss after
+    download_progress = Signal(object, object, float)  # done bytes, total bytes, bytes/s
+    auxiliary_loaded = Signal(str, str, str)  # name, quant, device
+    load_superseded = Signal(str)  # name of the abandoned model
+
+    def __init__(self, host: Optional[ModelHost] = None, idle_timeout_s: float = 0):
         super().__init__()
-        self._model = None
-        self._model_mutex = QMutex()
+        self.host = host or ModelHost(idle_timeout_s)
+        self.host.on_unloaded = self.model_unloaded.emit
         self._thread_pool = QThreadPool.globalInstance()
-        self._current_settings = {}
-    
+
+        # Scheduler callbacks run on its worker thread; these signals queue
+        # them onto the thread this manager lives in.
+        self._signals = _LoaderSignals()
+        self._signals.model_loaded.connect(self.model_loaded)
+        self._signals.error_occurred.connect(self.model_error)
+        self._signals.download_progress.connect(self.download_progress)
+        self._signals.superseded.connect(self.load_superseded)
+        self.scheduler = LoadScheduler(self.host)
+        self.scheduler.on_loaded = self._on_scheduler_loaded
+        self.scheduler.on_error = lambda _key, error: self._signals.error_occurred.emit(error)
+        self.scheduler.on_superseded = lambda key: self._signals.superseded.emit(key[0])
+        self.scheduler.progress_callback = self._signals.download_progress.emit
+        self.prefetcher: Optional[Prefetcher] = None
+
+    def _on_scheduler_loaded(self, key, _report) -> None:
+        # Runs on the scheduler's thread, once the new model is serving.
+        if self.prefetcher is not None:
+            self.prefetcher.loaded(key[:2])
+        self._signals.model_loaded.emit(*key)
+
+    @property
+    def is_loading(self) -> bool:
+        return self.host.is_loading
+
+    @property
+    def is_loaded(self) -> bool:
+        return self.host.is_loaded
+
+    @property
+    def memory_footprint(self) -> int:
+        return self.host.memory_footprint
+
+    @property
+    def current_key(self):
+        return self.host.current_key
+
+    @property
+    def last_swap(self):
+        """``SwapReport`` of the most recent load, including peak RSS during the swap."""
+        return self.scheduler.last_report
+
+    def set_idle_timeout(self, seconds: float) -> None:
+        """Unload the model after ``seconds`` without use; 0 keeps it resident."""
+        self.host.set_idle_timeout(seconds)
+
     def load_model(self, model_name: str, quant: str, device: str) -> None:
-        """Load a new model asynchronously."""
-        runnable = _ModelLoaderRunnable(model_name, quant, device)
-        runnable.signals.model_loaded.connect(self._on_model_loaded)
-        runnable.signals.error_occurred.connect(self._on_model_error)
+        """
+        Load a model in the background and swap it in once it is warm.
+
+        The current model keeps serving until then; a newer request replaces
+        one that has not finished.
+        """
+        if self.prefetcher is not None:
+            # The load needs the disk more than a guess does.
+            self.prefetcher.cancel()
+        self.scheduler.submit(model_name, quant, device)
+
+    def configure_prefetch(self, enabled: bool, max_mb: float = 2048, count: int = 2) -> None:
+        """Read ahead up to ``max_mb`` of the ``count`` models most likely to be loaded next."""
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+        self.prefetcher = Prefetcher(max_bytes=int(max_mb * 2**20), count=count) if enabled else None
+
+    def prefetch(self, model_name: str, quant: str) -> None:
+        """Read ahead one model, e.g. as soon as it is selected and before it is applied."""
+        current = self.current_key
+        if self.prefetcher is not None and (current is None or (model_name, quant) != tuple(current[:2])):
+            self.prefetcher.prefetch([(model_name, quant)])
+
+    def load_auxiliary(self, model_name: str, quant: str, device: str) -> None:
+        """Load an extra model that stays resident next to the current one."""
+        if not self.host.reserve_auxiliary((model_name, quant, device)):
+            return
+        runnable = _AuxiliaryLoaderRunnable(self.host, model_name, quant, device)
+        runnable.signals.model_loaded.connect(self.auxiliary_loaded)
+        runnable.signals.error_occurred.connect(
+            lambda error: logger.warning("Auxiliary model %s failed to load: %s", model_name, error)
+        )
         self._thread_pool.start(runnable)
-    
-    def get_model(self):
-        """Thread-safe model access."""
-        self._model_mutex.lock()
-        model = self._model
-        expected_id = id(model) if model else None
-        self._model_mutex.unlock()
-        return model, expected_id
-    
-    def _on_model_loaded(self, model, name: str, quant: str, device: str) -> None:
-        self._model_mutex.lock()
-        if self._model is not None:
-            del self._model
-            gc.collect()
-        self._model = model
-        self._model_mutex.unlock()
-        
-        self._current_settings = {
-            "model_name": name,
-            "quantization_type": quant, 
-            "device_type": device
-        }
-        self.model_loaded.emit(name, quant, device)
-    
-    def _on_model_error(self, error: str) -> None:
-        self.model_error.emit(error)
-    
+
+    def available_models(self) -> set:
+        """Keys of every model that can serve a transcription right now."""
+        return self.host.available_models()
+
+    def ensure_loaded(self) -> bool:
+        """Reload the last model if it was unloaded; returns True if a load started."""
+        settings = self.host.reload_settings()
+        if settings is None:
+            return False
+        logger.info("Reloading idle-unloaded model %s", settings["model_name"])
+        self.load_model(
+            settings["model_name"],
+            settings["quantization_type"],
+            settings["device_type"],
+        )
+        return True
+
+    def get_pool(self, key=None):
+        """Pool of the requested (default: current) model; lease a replica from it."""
+        return self.host.get_pool(key)
+
+    def configure_pool(self, size: int, mode: str = "workers") -> None:
+        self.host.configure_pool(size, mode)
+
+    def unload_model(self) -> None:
+        """Drop the resident model and record how much memory was returned."""
+        self.host.unload()
+
     def cleanup(self) -> None:
         """Clean up model resources."""
-        self._model_mutex.lock()
-        if self._model is not None:
-            del self._model
-            self._model = None
-        self._model_mutex.unlock()
\ No newline at end of file
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+        self.scheduler.close()
+        self.host.close()
@@ -0,0 +1,82 @@
+"""
+Pick a model per clip from its duration and a turnaround target.
+
+Candidates are listed from most to least preferred (usually most accurate
+first).  Each one keeps an exponentially weighted real-time factor measured
+on previous clips; the predicted turnaround of a clip is ``overhead +
+duration * rtf``.  The first candidate predicted to finish within the
+target wins, otherwise the one predicted to finish soonest.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from .lifecycle import ModelKey
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SelectionDecision:
+    key: ModelKey
+    duration: float
+    predicted: float
+    within_target: bool
+
+
+class ModelSelectionPolicy:
+
+    def __init__(
+        self,
+        candidates: Iterable[ModelKey],
+        latency_target: float,
+        default_rtf: float = 0.3,
+        overhead: float = 0.3,
+        smoothing: float = 0.3,
+    ) -> None:
+        self.candidates = [tuple(c) for c in candidates]
+        self.latency_target = latency_target
+        self.default_rtf = default_rtf
+        self.overhead = overhead
+        self.smoothing = smoothing
+        self._rtf: Dict[ModelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def rtf(self, key: ModelKey) -> float:
+        with self._lock:
+            return self._rtf.get(key, self.default_rtf)
+
+    def predict(self, key: ModelKey, duration: float) -> float:
+        return self.overhead + duration * self.rtf(key)
+
+    def choose(self, duration: float, available: Iterable[ModelKey]) -> Optional[SelectionDecision]:
+        available = set(available)
+        ranked = [key for key in self.candidates if key in available]
+        if not ranked:
+            return None
+
+        predictions = [(key, self.predict(key, duration)) for key in ranked]
+        for key, predicted in predictions:
+            if predicted <= self.latency_target:
+                return SelectionDecision(key, duration, predicted, True)
+        key, predicted = min(predictions, key=lambda item: item[1])
+        return SelectionDecision(key, duration, predicted, False)
+
+    def record(self, decision: SelectionDecision, elapsed: float) -> None:
+        """Fold the measured turnaround of a clip into that model's RTF."""
+        if decision.duration <= 0:
+            return
+        observed = max(0.0, elapsed - self.overhead) / decision.duration
+        with self._lock:
+            previous = self._rtf.get(decision.key)
+            self._rtf[decision.key] = (
+                observed if previous is None
+                else (1 - self.smoothing) * previous + self.smoothing * observed
+            )
+        logger.info(
+            "Model %s: %.1fs clip predicted %.2fs, actual %.2fs (RTF now %.3f)",
+            decision.key[0], decision.duration, decision.predicted, elapsed, self._rtf[decision.key],
+        )
@@ -0,0 +1,190 @@
+"""
+Model replica pool.
+
+A pool holds one or more loaded ``WhisperModel`` replicas, each able to run
+``capacity`` transcriptions at once.  Two layouts are supported:
+
+* ``workers`` - a single model created with ``num_workers=N``; ctranslate2
+  runs N decodes in parallel over one copy of the weights.
+* ``replicas`` - N independent models, for isolation between jobs; each
+  holds its own copy.
+
+ctranslate2 copies the weights into memory it allocates when it loads a
+model, whether from the model directory or from ``files=`` buffers, so
+neither a memory-mapped model file nor shared memory lets two models, or
+two processes, share them.  ``workers`` is how N decodes cost one copy;
+processes share it by sending their audio to the daemon that owns the pool
+(``core.daemon``).  Each replica records what its load added to the RSS.
+
+Either way the host's physical cores are split evenly between the N
+parallel slots.  Jobs take a lease on the least-loaded replica and hand it
+back when done; when every slot is busy ``acquire`` waits.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional
+
+from utils import format_bytes, get_process_rss
+from ..cpu import cpu_partition
+
+logger = logging.getLogger(__name__)
+
+POOL_MODES = ("workers", "replicas")
+
+
+@dataclass
+class Replica:
+    model: object
+    capacity: int = 1
+    index: int = 0
+    active: int = 0
+    served: int = 0
+    busy_seconds: float = 0.0
+    footprint: int = 0  # RSS added by loading it
+
+    @property
+    def load(self) -> float:
+        return self.active / self.capacity
+
+
+@dataclass
+class ModelLease:
+    pool: "ModelPool"
+    replica: Replica
+    acquired_at: float = field(default_factory=time.perf_counter)
+    released: bool = False
+
+    @property
+    def model(self):
+        return self.replica.model
+
+    def release(self) -> None:
+        if not self.released:
+            self.released = True
+            self.pool._release(self)
+
+    def __enter__(self):
+        return self.model
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+def split_threads(slots: int, total_threads: Optional[int] = None) -> int:
+    """CPU threads per parallel slot when ``total_threads`` are shared by ``slots``."""
+    total = total_threads or cpu_partition.decode_threads()
+    return max(1, total // max(1, slots))
+
+
+def _load_replica(factory: Callable[..., object], threads: int, workers: int, index: int) -> Replica:
+    rss_before = get_process_rss()
+    model = factory(cpu_threads=threads, num_workers=workers)
+    return Replica(model, capacity=workers, index=index, footprint=max(0, get_process_rss() - rss_before))
+
+
+class ModelPool:
+
+    def __init__(self, replicas: List[Replica]) -> None:
+        if not replicas:
+            raise ValueError("A model pool needs at least one replica")
+        self.replicas = replicas
+        self._cond = threading.Condition()
+        self.on_release: Optional[Callable[[], None]] = None  # called after every lease ends
+
+    @classmethod
+    def load(
+        cls,
+        factory: Callable[..., object],
+        size: int = 1,
+        mode: str = "workers",
+        total_threads: Optional[int] = None,
+    ) -> "ModelPool":
+        """
+        Build a pool with ``factory(cpu_threads=..., num_workers=...)``.
+
+        ``size`` is the number of transcriptions that can run at once.
+        """
+        size = max(1, size)
+        if mode not in POOL_MODES:
+            raise ValueError(f"Unknown pool mode {mode!r}, expected one of {POOL_MODES}")
+        threads = split_threads(size, total_threads)
+        if mode == "workers":
+            replicas = [_load_replica(factory, threads, size, 0)]
+        else:
+            replicas = [_load_replica(factory, threads, 1, i) for i in range(size)]
+        logger.info(
+            "Model pool ready: %d slot(s) as %s, %d thread(s) each, replica footprint %s",
+            size, mode, threads, ", ".join(format_bytes(r.footprint) for r in replicas),
+        )
+        return cls(replicas)
+
+    @classmethod
+    def single(cls, model) -> "ModelPool":
+        return cls([Replica(model)])
+
+    @property
+    def capacity(self) -> int:
+        return sum(r.capacity for r in self.replicas)
+
+    @property
+    def active(self) -> int:
+        with self._cond:
+            return sum(r.active for r in self.replicas)
+
+    @property
+    def primary(self):
+        """First replica's model, for read-only access to its attributes."""
+        return self.replicas[0].model
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[ModelLease]:
+        """Lease the least-loaded replica; None if ``timeout`` expires first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                free = [r for r in self.replicas if r.active < r.capacity]
+                if free:
+                    replica = min(free, key=lambda r: (r.load, r.served))
+                    replica.active += 1
+                    return ModelLease(self, replica)
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = None) -> Iterator[object]:
+        lease = self.acquire(timeout)
+        if lease is None:
+            raise TimeoutError("No model replica became free in time")
+        try:
+            yield lease.model
+        finally:
+            lease.release()
+
+    def _release(self, lease: ModelLease) -> None:
+        with self._cond:
+            replica = lease.replica
+            replica.active -= 1
+            replica.served += 1
+            replica.busy_seconds += time.perf_counter() - lease.acquired_at
+            self._cond.notify()
+        if self.on_release is not None:
+            self.on_release()
+
+    def stats(self) -> list[dict]:
+        with self._cond:
+            return [
+                {
+                    "replica": r.index,
+                    "capacity": r.capacity,
+                    "active": r.active,
+                    "served": r.served,
+                    "busy_seconds": round(r.busy_seconds, 3),
+                }
+                for r in self.replicas
+            ]
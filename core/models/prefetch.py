@@ -0,0 +1,208 @@
+"""
+Read-ahead of the model files likely to be loaded next.
+
+Switching models starts with a cold read of hundreds of megabytes to a few
+gigabytes before ``WhisperModel`` can initialise.  ``UsageLog`` records
+every load in ``usage.json`` next to the model store, and ``predict``
+ranks the other stored models by
+
+* recency-weighted frequency (each past load counts ``0.5 ** (age / 14 days)``),
+* how often each followed the current model in the log, and
+* loads at a similar time of day (within an hour either side).
+
+``Prefetcher`` reads the top candidates into the page cache on a background
+thread at idle IO and CPU priority (Linux; elsewhere it only reads in
+small chunks), up to a byte cap and never more than half the memory that
+is currently available, so read-ahead does not push out the pages of the
+running model.  A new load cancels a pass in progress.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .conversion import storage_quantization
+from .registry import LocalModelRegistry, get_default_registry
+
+logger = logging.getLogger(__name__)
+
+USAGE_FILE = "usage.json"
+_HALF_LIFE_S = 14 * 86_400
+_MAX_EVENTS = 500
+_CHUNK = 4 * 1024 * 1024
+
+ModelChoice = Tuple[str, str]  # model name, quantization
+
+
+class UsageLog:
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._events: Optional[List[list]] = None  # [timestamp, model name, quantization]
+
+    def _load(self) -> List[list]:
+        if self._events is None:
+            try:
+                self._events = json.loads(self.path.read_text()).get("loads", [])
+            except FileNotFoundError:
+                self._events = []
+            except (OSError, ValueError) as exc:
+                logger.warning("Ignoring unreadable model usage log %s: %s", self.path, exc)
+                self._events = []
+        return self._events
+
+    def record(self, model_name: str, quantization_type: str, when: Optional[float] = None) -> None:
+        with self._lock:
+            events = self._load()
+            events.append([when or time.time(), model_name, quantization_type])
+            del events[:-_MAX_EVENTS]
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_suffix(".tmp")
+                tmp.write_text(json.dumps({"loads": events}))
+                os.replace(tmp, self.path)
+            except OSError as exc:
+                logger.warning("Could not save model usage log: %s", exc)
+
+    def predict(self, current: Optional[ModelChoice] = None, limit: int = 2,
+                now: Optional[float] = None) -> List[ModelChoice]:
+        """The ``limit`` choices most likely to be loaded next, best first."""
+        now = now or time.time()
+        hour = time.localtime(now).tm_hour
+        scores: Dict[ModelChoice, float] = defaultdict(float)
+        with self._lock:
+            events = list(self._load())
+        previous = None
+        for when, name, quant in events:
+            choice = (name, quant)
+            weight = 0.5 ** (max(0.0, now - when) / _HALF_LIFE_S)
+            scores[choice] += weight
+            apart = abs(time.localtime(when).tm_hour - hour)
+            if min(apart, 24 - apart) <= 1:
+                scores[choice] += weight
+            if previous == current and current is not None:
+                scores[choice] += 2 * weight
+            previous = choice
+        scores.pop(current, None)
+        return sorted(scores, key=scores.get, reverse=True)[:limit]
+
+
+def lower_thread_priority() -> None:
+    """Idle IO class and lowest CPU priority for the calling thread (Linux only)."""
+    if not sys.platform.startswith("linux"):
+        return
+    tid = threading.get_native_id()
+    try:
+        os.setpriority(os.PRIO_PROCESS, tid, 19)
+    except (AttributeError, OSError):
+        pass
+    try:
+        import psutil
+        psutil.Process(tid).ionice(psutil.IOPRIO_CLASS_IDLE)
+    except Exception as exc:
+        logger.debug("Could not lower read-ahead IO priority: %s", exc)
+
+
+def read_ahead(files: Iterable[Path], max_bytes: int, cancel: Optional[threading.Event] = None) -> int:
+    """Read ``files`` into the page cache, stopping at ``max_bytes``; returns bytes read."""
+    buffer = bytearray(_CHUNK)
+    view = memoryview(buffer)
+    done = 0
+    for file in files:
+        try:
+            fd = os.open(file, os.O_RDONLY | getattr(os, "O_BINARY", 0))
+        except OSError:
+            continue
+        try:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+            with os.fdopen(fd, "rb", buffering=0, closefd=False) as f:
+                while done < max_bytes and not (cancel is not None and cancel.is_set()):
+                    n = f.readinto(view[: min(_CHUNK, max_bytes - done)])
+                    if not n:
+                        break
+                    done += n
+        finally:
+            os.close(fd)
+        if done >= max_bytes or (cancel is not None and cancel.is_set()):
+            break
+    return done
+
+
+class Prefetcher:
+
+    def __init__(self, registry: Optional[LocalModelRegistry] = None, usage: Optional[UsageLog] = None,
+                 max_bytes: int = 2 << 30, count: int = 2) -> None:
+        self.registry = registry or get_default_registry()
+        self.usage = usage or UsageLog(self.registry.root / USAGE_FILE)
+        self.max_bytes = max_bytes
+        self.count = count
+        self._cancel = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.last_pass: Optional[dict] = None
+
+    def files_of(self, choice: ModelChoice) -> List[Path]:
+        """Files of a stored model, or [] when it has not been downloaded."""
+        name, quant = choice
+        return self.registry.stored_files(name, storage_quantization(quant))
+
+    def loaded(self, choice: ModelChoice) -> None:
+        """Record that ``choice`` was loaded and read ahead the likeliest next ones."""
+        self.usage.record(*choice)
+        self.prefetch(self.usage.predict(choice, self.count), exclude=choice)
+
+    def prefetch(self, choices: Iterable[ModelChoice], exclude: Optional[ModelChoice] = None) -> None:
+        """Read ahead ``choices`` in order, replacing any pass in progress."""
+        self.cancel()
+        choices = list(choices)
+        skip = set(self.files_of(exclude)) if exclude else set()
+        files, seen = [], set(skip)
+        for choice in choices:
+            for file in self.files_of(choice):
+                if file not in seen:
+                    seen.add(file)
+                    files.append(file)
+        if not files:
+            return
+        budget = self._budget()
+        cancel = self._cancel = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, args=(choices, files, budget, cancel), name="model-prefetch", daemon=True
+        )
+        self._thread.start()
+
+    def _budget(self) -> int:
+        try:
+            import psutil
+            return int(min(self.max_bytes, psutil.virtual_memory().available / 2))
+        except Exception:
+            return self.max_bytes
+
+    def _run(self, choices, files: List[Path], budget: int, cancel: threading.Event) -> None:
+        lower_thread_priority()
+        started = time.perf_counter()
+        done = read_ahead(files, budget, cancel)
+        elapsed = time.perf_counter() - started
+        self.last_pass = {
+            "models": choices, "bytes": done, "seconds": elapsed, "cancelled": cancel.is_set(),
+        }
+        logger.info(
+            "Read ahead %.0f MB of %s in %.1fs%s", done / 1e6,
+            ", ".join(f"{n} ({q})" for n, q in choices), elapsed, " (cancelled)" if cancel.is_set() else "",
+        )
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def close(self) -> None:
+        self.cancel()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
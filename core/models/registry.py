@@ -0,0 +1,193 @@
+"""
+Local model store.
+
+A configured directory holding CTranslate2 Whisper models plus a
+``manifest.json`` that maps ``(model_name, quantization_type)`` to a
+directory and a checksum.  Resolution is a dictionary lookup and a few
+``stat`` calls; the checksum is only recomputed when the files on disk no
+longer match the sizes/mtimes recorded at the last verification.  A copy
+that fails it is dropped from the manifest and, inside the store, moved
+aside to ``<dir>.corrupt-<time>``, so the next fetch starts from scratch.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config.manager import config_manager
+from utils import get_resource_path
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK = 8 * 1024 * 1024
+
+
+def _model_files(path: Path) -> list[Path]:
+    """Files that make up a model, skipping hidden download bookkeeping."""
+    return sorted(
+        p for p in path.rglob("*")
+        if p.is_file() and not any(part.startswith(".") for part in p.relative_to(path).parts)
+    )
+
+
+def _file_stats(path: Path) -> Dict[str, list[int]]:
+    stats = {}
+    for file in _model_files(path):
+        st = file.stat()
+        stats[file.relative_to(path).as_posix()] = [st.st_size, st.st_mtime_ns]
+    return stats
+
+
+def compute_checksum(path: Path) -> str:
+    """sha256 over every file in ``path`` (relative name + contents, sorted)."""
+    digest = hashlib.sha256()
+    for file in _model_files(path):
+        digest.update(file.relative_to(path).as_posix().encode())
+        with file.open("rb") as f:
+            while chunk := f.read(_HASH_CHUNK):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class LocalModelRegistry:
+
+    MANIFEST_NAME = "manifest.json"
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+        self._manifest_path = self.root / self.MANIFEST_NAME
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+
+    @staticmethod
+    def _key(model_name: str, quantization_type: str) -> str:
+        return f"{model_name}/{quantization_type}"
+
+    def entry_dir(self, model_name: str, quantization_type: str) -> Path:
+        """Default location for a model that is added to the store."""
+        return self.root / f"{model_name}-ct2-{quantization_type}"
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {key: dict(entry) for key, entry in self._load().items()}
+
+    def resolve(self, model_name: str, quantization_type: str) -> Optional[Path]:
+        """Return the local directory for a model, or None if absent or corrupt."""
+        with self._lock:
+            key = self._key(model_name, quantization_type)
+            entry = self._load().get(key)
+            if entry is None:
+                return None
+
+            path = self._absolute(entry["path"])
+            if not path.is_dir():
+                logger.warning("Model store entry %s is missing on disk", key)
+                del self._entries[key]
+                self._save()
+                return None
+
+            stats = _file_stats(path)
+            if stats == entry.get("verified_stats"):
+                return path
+
+            logger.info("Verifying checksum of %s", path)
+            if compute_checksum(path) != entry["checksum"]:
+                logger.warning("Checksum mismatch for %s, discarding local copy", key)
+                del self._entries[key]
+                self._save()
+                self._quarantine(path)
+                return None
+            entry["verified_stats"] = stats
+            self._save()
+            return path
+
+    def stored_files(self, model_name: str, quantization_type: str) -> list[Path]:
+        """Files of a stored model without verifying them, or [] if it is not stored."""
+        with self._lock:
+            entry = self._load().get(self._key(model_name, quantization_type))
+        if entry is None:
+            return []
+        path = self._absolute(entry["path"])
+        return _model_files(path) if path.is_dir() else []
+
+    def register(self, model_name: str, quantization_type: str, path: str | Path) -> Path:
+        """Add (or replace) a model directory in the manifest."""
+        path = Path(path).resolve()
+        with self._lock:
+            self._load()[self._key(model_name, quantization_type)] = {
+                "model_name": model_name,
+                "quantization_type": quantization_type,
+                "path": self._relative(path),
+                "checksum": compute_checksum(path),
+                "verified_stats": _file_stats(path),
+            }
+            self._save()
+        return path
+
+    def record_load_time(self, model_name: str, quantization_type: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._load().get(self._key(model_name, quantization_type))
+            if entry is not None:
+                entry["load_seconds"] = round(seconds, 3)
+                self._save()
+
+    def _quarantine(self, path: Path) -> None:
+        """Move a corrupt model directory out of the way; directories outside the store are left alone."""
+        try:
+            path.resolve().relative_to(self.root.resolve())
+        except ValueError:
+            return
+        aside = path.with_name(f"{path.name}.corrupt-{int(time.time())}")
+        try:
+            os.replace(path, aside)
+            logger.warning("Moved corrupt model files to %s", aside)
+        except OSError as exc:
+            logger.error("Could not move corrupt model %s aside: %s", path, exc)
+
+    def _absolute(self, stored: str) -> Path:
+        path = Path(stored)
+        return path if path.is_absolute() else self.root / path
+
+    def _relative(self, path: Path) -> str:
+        try:
+            return path.relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return str(path)
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._entries is None:
+            try:
+                with self._manifest_path.open() as f:
+                    self._entries = json.load(f).get("models", {})
+            except FileNotFoundError:
+                self._entries = {}
+            except (OSError, ValueError) as e:
+                logger.error(f"Error reading model manifest: {e}")
+                self._entries = {}
+        return self._entries
+
+    def _save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self._manifest_path.with_suffix(".tmp")
+        with tmp.open("w") as f:
+            json.dump({"models": self._entries}, f, indent=2)
+        os.replace(tmp, self._manifest_path)
+
+
+_default_registry: Optional[LocalModelRegistry] = None
+
+
+def get_default_registry() -> LocalModelRegistry:
+    global _default_registry
+    if _default_registry is None:
+        root = Path(config_manager.get_value("model_store_dir", "models"))
+        if not root.is_absolute():
+            root = Path(get_resource_path(str(root)))
+        _default_registry = LocalModelRegistry(root)
+    return _default_registry
@@ -0,0 +1,200 @@
+"""
+Model load scheduler.
+
+Loads run one at a time on a dedicated thread.  Only the most recent
+request is kept: a request that arrives while another is waiting replaces
+it, and one that arrives while a load is running supersedes that load,
+which is abandoned at its next checkpoint (a download progress tick,
+after the weights are built, or after warm-up) instead of being swapped
+in.  The current model keeps serving transcriptions throughout; the new
+one is warmed up with a short decode and then installed atomically.  Peak
+RSS from the start of the load to the swap is recorded, since old and new
+weights are resident together for that window.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+
+from utils import format_bytes, get_process_rss, release_freed_memory
+from .lifecycle import ModelHost, ModelKey
+
+logger = logging.getLogger(__name__)
+
+
+class LoadSuperseded(Exception):
+    """A newer load request replaced the one in progress."""
+
+
+@dataclass
+class SwapReport:
+    key: ModelKey
+    rss_before: int
+    peak_rss: int
+    rss_after: int
+    load_seconds: float
+    warmup_seconds: float
+
+    @property
+    def peak_growth(self) -> int:
+        return max(0, self.peak_rss - self.rss_before)
+
+
+class _PeakSampler:
+
+    def __init__(self, interval: float = 0.05) -> None:
+        self.interval = interval
+        self.peak = get_process_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, get_process_rss())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, get_process_rss())
+
+
+def warm_up(pool, seconds: float = 1.0) -> None:
+    """Run one short decode so the first real transcription is not the slow one."""
+    silence = np.zeros(int(16_000 * seconds), dtype=np.float32)
+    with pool.lease() as model:
+        segments, _ = model.transcribe(silence, beam_size=1, without_timestamps=True)
+        for _segment in segments:
+            pass
+
+
+class LoadScheduler:
+
+    def __init__(self, host: ModelHost, warmup: bool = True) -> None:
+        self.host = host
+        self.warmup = warmup
+        self.on_loaded: Optional[Callable[[ModelKey, SwapReport], None]] = None
+        self.on_error: Optional[Callable[[ModelKey, str], None]] = None
+        self.on_superseded: Optional[Callable[[ModelKey], None]] = None
+        self.progress_callback: Optional[Callable[[int, int, float], None]] = None
+        self.last_report: Optional[SwapReport] = None
+        self._cond = threading.Condition()
+        self._pending: Optional[ModelKey] = None
+        self._active: Optional[ModelKey] = None
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @property
+    def busy(self) -> bool:
+        with self._cond:
+            return self._active is not None or self._pending is not None
+
+    def submit(self, model_name: str, quantization_type: str, device_type: str) -> None:
+        """Queue a load, replacing any request that has not finished yet."""
+        key = (model_name, quantization_type, device_type)
+        with self._cond:
+            if self._closed:
+                return
+            replaced = self._pending
+            # A request for the model already being loaded just rides along.
+            self._pending = None if key == self._active else key
+            self.host.begin_load()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="model-loader", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        if replaced is not None and replaced != key:
+            logger.info("Load of %s superseded before it started", replaced[0])
+            if self.on_superseded is not None:
+                self.on_superseded(replaced)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._pending = None
+            self._cond.notify()
+
+    def _superseded(self, key: ModelKey) -> bool:
+        with self._cond:
+            return self._closed or (self._pending is not None and self._pending != key)
+
+    def _checkpoint(self, key: ModelKey) -> None:
+        if self._superseded(key):
+            raise LoadSuperseded(key)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                key, self._pending = self._pending, None
+                self._active = key
+            try:
+                if key == self.host.current_key and self.host.is_loaded:
+                    report = self.last_report
+                else:
+                    report = self._load(key)
+            except LoadSuperseded:
+                logger.info("Load of %s superseded, discarding it", key[0])
+                release_freed_memory()
+                if self.on_superseded is not None:
+                    self.on_superseded(key)
+            except Exception as exc:
+                # A checkpoint inside the downloader surfaces as a DownloadError.
+                if self._superseded(key):
+                    logger.info("Load of %s superseded, discarding it", key[0])
+                    if self.on_superseded is not None:
+                        self.on_superseded(key)
+                else:
+                    logger.exception("Loading %s failed", key[0])
+                    if self.on_error is not None:
+                        self.on_error(key, str(exc))
+            else:
+                if self.on_loaded is not None:
+                    self.on_loaded(key, report)
+            finally:
+                with self._cond:
+                    self._active = None
+                    if self._pending is None:
+                        self.host.fail_load()
+
+    def _load(self, key: ModelKey) -> SwapReport:
+        def progress(done: int, total: int, rate: float) -> None:
+            self._checkpoint(key)
+            if self.progress_callback is not None:
+                self.progress_callback(done, total, rate)
+
+        rss_before = get_process_rss()
+        with _PeakSampler() as sampler:
+            started = time.perf_counter()
+            pool = self.host.build(*key, progress_callback=progress)
+            footprint = max(0, get_process_rss() - rss_before)
+            loaded = time.perf_counter()
+            self._checkpoint(key)
+            if self.warmup:
+                warm_up(pool)
+            warmed = time.perf_counter()
+            self._checkpoint(key)
+            self.host.install(key, pool, footprint)
+            del pool
+        report = SwapReport(
+            key, rss_before, sampler.peak, get_process_rss(),
+            loaded - started, warmed - loaded,
+        )
+        self.last_report = report
+        logger.info(
+            "Swapped in %s: load %.1fs, warm-up %.2fs, RSS %s -> peak %s -> %s",
+            key[0], report.load_seconds, report.warmup_seconds,
+            format_bytes(report.rss_before), format_bytes(report.peak_rss), format_bytes(report.rss_after),
+        )
+        return report
@@ -1,14 +1,21 @@
+import copy
 import ctranslate2
+import logging
 import platform
 import os
+import statistics
 import sys
+import time
 
 from config.manager import config_manager
 from utils import get_resource_path
 
+logger = logging.getLogger(__name__)
+
 class CheckQuantizationSupport:
 
-    excluded_types = ['int16', 'int8', 'int8_float32', 'int8_float16', 'int8_bfloat16']
+    # int16 has no speed advantage over int8 on any backend we ship for.
+    excluded_types = ['int16']
 
     def has_cuda_device(self):
         cuda_device_count = ctranslate2.get_cuda_device_count()
@@ -30,4 +37,74 @@ class CheckQuantizationSupport:
 
         if self.has_cuda_device():
             cuda_quantizations = self.get_supported_quantizations_cuda()
-            config_manager.set_supported_quantizations("cuda", cuda_quantizations)
\ No newline at end of file
+            config_manager.set_supported_quantizations("cuda", cuda_quantizations)
+
+
+def _benchmark_audio(seconds: float, audio_file: str | None = None):
+    import numpy as np
+    from faster_whisper import decode_audio
+
+    if audio_file:
+        return decode_audio(audio_file)
+    # A quiet chirp keeps the decoder busy without depending on a sample file.
+    t = np.arange(int(16_000 * seconds), dtype=np.float32) / 16_000
+    return (0.05 * np.sin(2 * np.pi * (200 + 40 * t) * t)).astype(np.float32)
+
+
+def benchmark_compute_types(
+    model_name: str,
+    device: str,
+    compute_types: list[str] | None = None,
+    runs: int = 3,
+    audio_file: str | None = None,
+    audio_seconds: float = 20.0,
+) -> dict[str, float]:
+    """Median transcription time per compute type for one model on this machine."""
+    from core.models.loader import load_model
+
+    if compute_types is None:
+        compute_types = config_manager.get_supported_quantizations().get(device, [])
+    audio = _benchmark_audio(audio_seconds, audio_file)
+
+    results: dict[str, float] = {}
+    for compute_type in compute_types:
+        try:
+            model = load_model(model_name, compute_type, device)
+        except RuntimeError as exc:
+            logger.warning("Skipping %s: %s", compute_type, exc)
+            continue
+
+        timings = []
+        for run in range(runs + 1):
+            start = time.perf_counter()
+            segments, _ = model.transcribe(audio, beam_size=1, condition_on_previous_text=False)
+            for _segment in segments:
+                pass
+            if run:  # the first run only warms up
+                timings.append(time.perf_counter() - start)
+        del model
+
+        results[compute_type] = statistics.median(timings)
+        logger.info("%s %s %s: %.3fs", model_name, device, compute_type, results[compute_type])
+    return results
+
+
+def recommend_compute_type(model_name: str, device: str, **kwargs) -> str | None:
+    """Benchmark a model and remember the fastest compute type for it."""
+    results = benchmark_compute_types(model_name, device, **kwargs)
+    if not results:
+        return None
+    fastest = min(results, key=results.get)
+
+    benchmarks = copy.deepcopy(config_manager.get_value("quantization_benchmarks", {}) or {})
+    benchmarks.setdefault(device, {})[model_name] = {
+        "recommended": fastest,
+        "seconds": {k: round(v, 4) for k, v in results.items()},
+    }
+    config_manager.set_value("quantization_benchmarks", benchmarks)
+    return fastest
+
+
+def get_recommended_compute_type(model_name: str, device: str) -> str | None:
+    benchmarks = config_manager.get_value("quantization_benchmarks", {}) or {}
+    return benchmarks.get(device, {}).get(model_name, {}).get("recommended")
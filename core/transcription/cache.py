@@ -0,0 +1,86 @@
+"""
+Bounded in-memory cache of recent recordings.
+
+Keeps the decoded 16 kHz mono audio of the last few recordings, and
+optionally their log-mel features per mel-bin count, so a recording can be
+transcribed again with a different model or setting without capturing,
+writing or decoding anything.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+import numpy as np
+
+from .features import compute_features, feature_size
+
+
+@dataclass
+class CachedRecording:
+    audio: np.ndarray
+    sampling_rate: int = 16_000
+    created: float = field(default_factory=time.time)
+    features: dict[int, np.ndarray] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return len(self.audio) / self.sampling_rate
+
+    @property
+    def nbytes(self) -> int:
+        return self.audio.nbytes + sum(f.nbytes for f in self.features.values())
+
+
+class RecordingCache:
+
+    def __init__(self, capacity: int = 3, keep_features: bool = False) -> None:
+        self.keep_features = keep_features
+        self._recordings: deque[CachedRecording] = deque(maxlen=max(0, capacity))
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self._recordings.maxlen or 0
+
+    def resize(self, capacity: int) -> None:
+        with self._lock:
+            self._recordings = deque(self._recordings, maxlen=max(0, capacity))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._recordings)
+
+    def add(self, audio: np.ndarray, sampling_rate: int = 16_000) -> Optional[CachedRecording]:
+        if not self.capacity:
+            return None
+        recording = CachedRecording(audio, sampling_rate)
+        with self._lock:
+            self._recordings.appendleft(recording)
+        return recording
+
+    def get(self, index: int = 0) -> Optional[CachedRecording]:
+        """Most recent recording first."""
+        with self._lock:
+            if 0 <= index < len(self._recordings):
+                return self._recordings[index]
+        return None
+
+    def features_for(self, recording: CachedRecording, model) -> Optional[np.ndarray]:
+        """Cached features for this model's mel size, computing them if enabled."""
+        if not self.keep_features or not hasattr(model.feature_extractor, "mel_filters"):
+            # Models served by the daemon compute their own features.
+            return None
+        n_mels = feature_size(model)
+        features = recording.features.get(n_mels)
+        if features is None:
+            features = compute_features(model, recording.audio)
+            recording.features[n_mels] = features
+        return features
+
+    def clear(self) -> None:
+        with self._lock:
+            self._recordings.clear()
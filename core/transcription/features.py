@@ -0,0 +1,159 @@
+"""
+Hand precomputed log-mel features to ``WhisperModel.transcribe``.
+
+faster-whisper always runs its feature extractor on the audio it is given.
+``precomputed_features`` installs (once per model) a thin wrapper around
+``model.feature_extractor`` that returns registered features when it is
+called with the very same array object, and defers to the real extractor
+for everything else, so concurrent transcriptions on the same model are
+unaffected.
+
+``IncrementalLogMel`` produces the same features as the batch extractor
+while the audio is still arriving.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+_install_lock = threading.Lock()
+
+
+class _PrecomputedFeatureExtractor:
+
+    def __init__(self, extractor) -> None:
+        self._extractor = extractor
+        self._entries: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, audio: np.ndarray, features: np.ndarray) -> None:
+        with self._lock:
+            self._entries[id(audio)] = (audio, features)
+
+    def remove(self, audio: np.ndarray) -> None:
+        with self._lock:
+            self._entries.pop(id(audio), None)
+
+    def __call__(self, waveform, *args, **kwargs):
+        if not args and kwargs.get("chunk_length") is None and "padding" not in kwargs:
+            with self._lock:
+                entry = self._entries.get(id(waveform))
+            if entry is not None and entry[0] is waveform:
+                return entry[1]
+        return self._extractor(waveform, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self._extractor, name)
+
+
+def feature_size(model) -> int:
+    """Number of mel bins the model expects (80, or 128 for large-v3)."""
+    return int(model.feature_extractor.mel_filters.shape[0])
+
+
+def compute_features(model, audio: np.ndarray) -> np.ndarray:
+    return model.feature_extractor(audio)
+
+
+@contextmanager
+def precomputed_features(model, audio: np.ndarray, features: np.ndarray) -> Iterator[None]:
+    with _install_lock:
+        extractor = model.feature_extractor
+        if not isinstance(extractor, _PrecomputedFeatureExtractor):
+            extractor = _PrecomputedFeatureExtractor(extractor)
+            model.feature_extractor = extractor
+    extractor.add(audio, features)
+    try:
+        yield
+    finally:
+        extractor.remove(audio)
+
+
+class IncrementalLogMel:
+    """
+    Log-mel spectrogram computed as audio arrives, matching the batch extractor.
+
+    faster-whisper's extractor appends ``padding`` zeros, reflect-pads
+    ``n_fft // 2`` samples at both ends, takes a Hann-windowed STFT, drops
+    the last frame, and finally clamps everything to 8 below the global
+    maximum.  Every frame that lies wholly inside audio already seen is
+    final, so ``feed`` computes those (vectorised over however many are
+    ready) and keeps only the overlap for the next call.  ``finish`` adds
+    the few frames that touch the padded end and applies the clamp, which
+    needs the maximum over the whole clip.
+    """
+
+    def __init__(self, mel_filters: np.ndarray, n_fft: int = 400, hop_length: int = 160,
+                 padding: int = 160) -> None:
+        self.mel_filters = mel_filters
+        self.n_fft = n_fft
+        self.hop_length = hop_length
+        self.padding = padding
+        self.window = np.hanning(n_fft + 1)[:-1].astype("float32")
+        self.samples = 0
+        self._edge = n_fft // 2
+        self._pending = np.zeros(0, dtype=np.float32)  # padded signal from the next frame start
+        self._started = False
+        self._chunks: list[np.ndarray] = []
+        self._max = -np.inf
+
+    @classmethod
+    def for_extractor(cls, extractor) -> "IncrementalLogMel":
+        return cls(extractor.mel_filters, extractor.n_fft, extractor.hop_length)
+
+    @property
+    def frames(self) -> int:
+        return sum(c.shape[1] for c in self._chunks)
+
+    def feed(self, audio: np.ndarray) -> None:
+        """Add 16 kHz mono float32 samples and compute every frame now complete."""
+        if not len(audio):
+            return
+        self.samples += len(audio)
+        self._pending = np.concatenate([self._pending, audio.astype(np.float32, copy=False)])
+        if not self._started:
+            if len(self._pending) <= self._edge:
+                return
+            # The leading reflection needs samples 1..n_fft//2.
+            head = self._pending[1:self._edge + 1][::-1]
+            self._pending = np.concatenate([head, self._pending])
+            self._started = True
+        self._pending = self._pending[self._compute(self._pending):]
+
+    def finish(self) -> np.ndarray:
+        """The complete ``(n_mels, frames)`` feature matrix."""
+        total = (self.samples + self.padding) // self.hop_length
+        if not self._started:
+            # Too short to have produced any frame; pad it the same way in one go.
+            signal = np.pad(np.pad(self._pending, (0, self.padding)), self._edge, mode="reflect")
+        else:
+            tail = np.concatenate([self._pending, np.zeros(self.padding, dtype=np.float32)])
+            signal = np.concatenate([tail, tail[-self._edge - 1:-1][::-1]])
+        self._compute(signal)
+        self._pending = np.zeros(0, dtype=np.float32)
+        log_spec = np.concatenate(self._chunks, axis=1)[:, :total] if self._chunks else (
+            np.zeros((self.mel_filters.shape[0], 0), dtype=np.float32)
+        )
+        log_spec = np.maximum(log_spec, self._max - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+    def _compute(self, signal: np.ndarray) -> int:
+        """Process every full frame at the start of ``signal``; returns samples consumed."""
+        if len(signal) < self.n_fft:
+            return 0
+        count = 1 + (len(signal) - self.n_fft) // self.hop_length
+        frames = np.lib.stride_tricks.as_strided(
+            signal,
+            (count, self.n_fft),
+            (self.hop_length * signal.strides[0], signal.strides[0]),
+            writeable=False,
+        )
+        stft = np.fft.rfft(frames * self.window, n=self.n_fft, axis=-1).astype("complex64")
+        magnitudes = np.abs(stft.T) ** 2
+        log_spec = np.log10(np.clip(self.mel_filters @ magnitudes, a_min=1e-10, a_max=None))
+        self._chunks.append(log_spec)
+        self._max = max(self._max, float(log_spec.max()))
+        return count * self.hop_length
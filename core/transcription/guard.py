@@ -0,0 +1,237 @@
+"""
+Runaway decode detection.
+
+``DecodeGuard`` sits between faster-whisper's segment generator and the
+caller and watches for decoding that has clearly gone off the rails:
+
+* repetition - a segment of at least ``min_repeat_words`` words is exactly
+  the previous one, or repeats an n-gram many times within itself.  Short
+  repeats ("yes", "thank you") are legitimate speech and always kept.
+* low confidence - ``avg_logprob`` stays below a threshold for several
+  segments in a row.
+* silence - ``no_speech_prob`` stays above a threshold for several segments
+  in a row.
+
+Suspicious segments are held back until the streak either breaks (they are
+released) or trips the guard, which discards them.  ``filter`` on its own
+only leaves segments out; decoding carries on underneath.  faster-whisper
+decodes lazily, so ``DecodeGuard.transcribe`` turns a trip into a real
+cut-off: it closes the segment generator, which stops the decode, asks
+Silero VAD for the next speech after the bad stretch and restarts decoding
+there through ``clip_timestamps``.  A runaway with no speech after it ends
+the transcription.  Speech after a noisy stretch is still transcribed; the
+stretch itself is not decoded any further.
+
+``transcribe`` also bounds temperature fallback: unless the caller sets
+them, a window whose text compresses too well (a loop) or decodes with low
+confidence is retried only at ``temperatures``, not at faster-whisper's six
+defaults.  The thresholds are deliberately conservative; accented or noisy
+speech often decodes around -1.0.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from collections import Counter
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Decoding restarts this far ahead of the speech VAD found, as faster-whisper pads its own chunks.
+_RESUME_PAD_S = 0.2
+
+
+class GuardStats:
+    """Thread-safe trigger counters shared by every guarded transcription."""
+
+    def __init__(self) -> None:
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def increment(self, key: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counts[key] += amount
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
+
+
+class DecodeGuard:
+
+    def __init__(
+        self,
+        stats: Optional[GuardStats] = None,
+        ngram_size: int = 3,
+        max_ngram_repeats: int = 4,
+        min_repeat_words: int = 4,
+        repetition_streak: int = 3,
+        min_avg_logprob: float = -1.5,
+        logprob_streak: int = 4,
+        no_speech_threshold: float = 0.9,
+        no_speech_streak: int = 3,
+        temperatures: Tuple[float, ...] = (0.0, 0.2, 0.4),
+        compression_ratio_threshold: float = 2.4,
+    ) -> None:
+        self.stats = stats or GuardStats()
+        self.ngram_size = ngram_size
+        self.max_ngram_repeats = max_ngram_repeats
+        self.min_repeat_words = min_repeat_words
+        self.repetition_streak = repetition_streak
+        self.min_avg_logprob = min_avg_logprob
+        self.logprob_streak = logprob_streak
+        self.no_speech_threshold = no_speech_threshold
+        self.no_speech_streak = no_speech_streak
+        self.temperatures = temperatures
+        self.compression_ratio_threshold = compression_ratio_threshold
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def _has_ngram_loop(self, words: list[str]) -> bool:
+        if len(words) < self.ngram_size * self.max_ngram_repeats:
+            return False
+        counts = Counter(
+            tuple(words[i:i + self.ngram_size])
+            for i in range(len(words) - self.ngram_size + 1)
+        )
+        return max(counts.values()) >= self.max_ngram_repeats
+
+    def _is_repetition(self, text: str, previous: Optional[str]) -> bool:
+        words = text.split()
+        if text == previous and len(words) >= self.min_repeat_words:
+            return True
+        return self._has_ngram_loop(words)
+
+    def transcribe(self, model, audio, **options):
+        """``model.transcribe`` with runaway stretches cut off rather than decoded and dropped."""
+        options.setdefault("temperature", self.temperatures)
+        options.setdefault("compression_ratio_threshold", self.compression_ratio_threshold)
+        segments, info = model.transcribe(audio, **options)
+        sampling_rate = model.feature_extractor.sampling_rate
+        duration = len(audio) / sampling_rate if isinstance(audio, np.ndarray) else None
+
+        def resume(after: float) -> Optional[Iterable]:
+            start = self._next_speech(audio, sampling_rate, after)
+            if start is None:
+                if duration is not None:
+                    self.stats.increment("skipped_ms", int(max(duration - after, 0.0) * 1000))
+                return None
+            self.stats.increment("skipped_ms", int((start - after) * 1000))
+            self.stats.increment("restarts")
+            # The prompt is what the runaway was conditioned on; start clean.
+            restart = dict(options, clip_timestamps=[start], initial_prompt=None)
+            return model.transcribe(audio, **restart)[0]
+
+        return self.filter(segments, resume), info
+
+    @staticmethod
+    def _next_speech(audio, sampling_rate: int, after: float) -> Optional[float]:
+        """Start of the first speech at or after ``after`` seconds, or None if there is none."""
+        if not isinstance(audio, np.ndarray):
+            return after
+        offset = int(after * sampling_rate)
+        if offset >= len(audio):
+            return None
+        try:
+            from faster_whisper.vad import get_speech_timestamps
+            chunks = get_speech_timestamps(audio[offset:], sampling_rate=sampling_rate)
+        except Exception as e:
+            logger.debug("VAD unavailable for the decode guard, resuming in place: %s", e)
+            return after
+        if not chunks:
+            return None
+        return after + max(chunks[0]["start"] / sampling_rate - _RESUME_PAD_S, 0.0)
+
+    def filter(self, segments: Iterable, resume: Optional[Callable[[float], Optional[Iterable]]] = None) -> Iterator:
+        """
+        Yield segments, leaving out repetitions and runaway low-confidence or silent stretches.
+
+        With ``resume``, a runaway stops the decode: ``segments`` is closed and
+        replaced by ``resume(end of the runaway)``, or ends if that returns None.
+        """
+        self.stats.increment("transcriptions")
+        held: list = []
+        previous: Optional[str] = None
+        low_logprob = no_speech = repeats = 0
+        tripped: Optional[str] = None
+
+        try:
+            while segments is not None:
+                restart_at: Optional[float] = None
+                for segment in segments:
+                    self.stats.increment("segments")
+                    if getattr(segment, "temperature", 0.0) > 0.0:
+                        self.stats.increment("fallbacks")
+                    text = self._normalize(segment.text)
+
+                    if text and self._is_repetition(text, previous):
+                        self.stats.increment("repetition")
+                        self.stats.increment("dropped")
+                        repeats += 1
+                        if resume is not None and repeats >= self.repetition_streak:
+                            self._discard("repetition", held)
+                            held, restart_at = [], segment.end
+                            break
+                        continue
+                    repeats = 0
+                    previous = text
+
+                    low_logprob = low_logprob + 1 if segment.avg_logprob < self.min_avg_logprob else 0
+                    no_speech = no_speech + 1 if segment.no_speech_prob > self.no_speech_threshold else 0
+
+                    if tripped is None:
+                        if low_logprob >= self.logprob_streak:
+                            tripped = "low_logprob"
+                        elif no_speech >= self.no_speech_streak:
+                            tripped = "no_speech"
+                        if tripped is not None:
+                            self.stats.increment(tripped)
+                            self._discard(tripped, held)
+                            held = []
+                            if resume is not None:
+                                self.stats.increment("dropped")
+                                restart_at = segment.end
+                                break
+
+                    if low_logprob or no_speech:
+                        if tripped is not None:
+                            self.stats.increment("dropped")
+                        else:
+                            held.append(segment)
+                        continue
+                    # A good segment ends any streak.
+                    tripped = None
+                    yield from held
+                    held.clear()
+                    yield segment
+
+                if restart_at is None:
+                    break
+                self._close(segments)
+                segments = resume(restart_at)
+                if segments is None:
+                    self.stats.increment("stopped")
+                    logger.info("Decode guard stopped decoding at %.1fs; no speech follows", restart_at)
+                else:
+                    logger.info("Decode guard skipped decoding past %.1fs", restart_at)
+                previous, tripped = None, None
+                low_logprob = no_speech = repeats = 0
+        finally:
+            self._close(segments)
+
+        yield from held
+
+    @staticmethod
+    def _close(segments) -> None:
+        close = getattr(segments, "close", None)
+        if close is not None:
+            close()
+
+    def _discard(self, reason: str, discarded: list) -> None:
+        self.stats.increment("runaways")
+        self.stats.increment("dropped", len(discarded))
+        logger.info("Decode guard cut a runaway stretch (%s) from %d segment(s) on", reason, len(discarded))
@@ -0,0 +1,132 @@
+"""
+Per-session cache of the detected spoken language.
+
+With a multilingual model and no language set, ``model.transcribe`` runs
+a language-detection pass (an encoder pass over the first 30 s plus a
+decoder step) before every clip.  Someone dictating in one language all
+day pays that on every recording.
+
+``LanguageCache`` remembers, per session (a capture source), the language
+detected with at least ``min_probability``.  Later clips are decoded with
+it pinned.  The pin is dropped, so the next clip detects again, when:
+
+* ``recheck_every`` clips have used it, or ``recheck_after_s`` have passed;
+* a pinned clip decodes badly (mean ``avg_logprob`` under
+  ``suspect_logprob``), the usual sign of decoding in the wrong language.
+
+Detections are timed, so each skipped detection is credited with the
+running mean of what one costs.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass
+class _Pin:
+    language: str
+    probability: float
+    checked: float
+    uses: int = 0
+
+
+@dataclass
+class LanguageStats:
+    detections: int = 0
+    skipped: int = 0
+    switches: int = 0
+    suspect: int = 0
+    detect_s: float = 0.0
+    saved_s: float = 0.0
+
+    @property
+    def mean_detect_s(self) -> float:
+        return self.detect_s / self.detections if self.detections else 0.0
+
+    def snapshot(self) -> dict:
+        return {
+            "detections": self.detections,
+            "skipped": self.skipped,
+            "switches": self.switches,
+            "suspect": self.suspect,
+            "mean_detect_ms": round(self.mean_detect_s * 1000, 1),
+            "saved_s": round(self.saved_s, 3),
+        }
+
+
+class LanguageCache:
+
+    def __init__(self, min_probability: float = 0.8, recheck_every: int = 10,
+                 recheck_after_s: float = 600.0, suspect_logprob: float = -1.0) -> None:
+        self.min_probability = min_probability
+        self.recheck_every = recheck_every
+        self.recheck_after_s = recheck_after_s
+        self.suspect_logprob = suspect_logprob
+        self.stats = LanguageStats()
+        self._pins: Dict[str, _Pin] = {}
+        self._lock = threading.Lock()
+
+    def language_for(self, session: str) -> Optional[str]:
+        """The pinned language for the next clip, or None if it should be detected."""
+        with self._lock:
+            pin = self._pins.get(session)
+            if pin is None:
+                return None
+            if pin.uses >= self.recheck_every or time.monotonic() - pin.checked >= self.recheck_after_s:
+                return None
+            pin.uses += 1
+            self.stats.skipped += 1
+            self.stats.saved_s += self.stats.mean_detect_s
+            return pin.language
+
+    def detected(self, session: str, language: str, probability: float, seconds: float) -> None:
+        """Record a detection; a confident one becomes the session's pin."""
+        with self._lock:
+            self.stats.detections += 1
+            self.stats.detect_s += seconds
+            previous = self._pins.pop(session, None)
+            if previous is not None and previous.language != language:
+                self.stats.switches += 1
+            if probability >= self.min_probability:
+                self._pins[session] = _Pin(language, probability, time.monotonic())
+
+    def check(self, session: str, segments) -> None:
+        """After a pinned clip: drop the pin if the decode looks like the wrong language."""
+        if not len(segments):
+            return
+        if float(segments.seg_logprob.mean()) < self.suspect_logprob:
+            with self._lock:
+                if self._pins.pop(session, None) is not None:
+                    self.stats.suspect += 1
+
+    def forget(self, session: Optional[str] = None) -> None:
+        with self._lock:
+            if session is None:
+                self._pins.clear()
+            else:
+                self._pins.pop(session, None)
+
+    def current(self, session: str) -> Optional[tuple[str, float]]:
+        with self._lock:
+            pin = self._pins.get(session)
+            return (pin.language, pin.probability) if pin else None
+
+    def summary(self) -> str:
+        s = self.stats
+        return (
+            f"language detection skipped {s.skipped}/{s.skipped + s.detections}, "
+            f"saved ~{s.saved_s:.1f}s ({s.mean_detect_s * 1000:.0f}ms each)"
+        )
+
+
+def detects_language(model) -> bool:
+    """True for an in-process multilingual model, where detection can be done (or skipped) here."""
+    inner = getattr(model, "model", None)
+    return (
+        getattr(inner, "is_multilingual", False) is True
+        and hasattr(model, "detect_language")
+        and hasattr(model.feature_extractor, "mel_filters")
+    )
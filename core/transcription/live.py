@@ -0,0 +1,133 @@
+"""
+Log-mel features computed while recording.
+
+Without this, feature extraction runs over the whole clip inside
+``model.transcribe`` after stop, so its cost grows with the recording and
+sits on the critical path.  A ``LiveFeatureSession`` receives the capture
+blocks, and a worker thread converts each batch of blocks to 16 kHz mono,
+resamples it with the filter state carried across batches, and feeds an
+``IncrementalLogMel``.  At stop only the last partial batch and the few
+end-padded frames are left to compute; the audio and its features are
+then handed to the model through ``precomputed_features``.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from core.audio.recording import StreamingResampler, to_whisper_audio
+from core.cpu import cpu_partition
+from .features import IncrementalLogMel
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class LiveFeatureSession:
+
+    def __init__(self, extractor, samplerate: int, dtype: str) -> None:
+        self.samplerate = samplerate
+        self.dtype = dtype
+        self.mel = IncrementalLogMel.for_extractor(extractor)
+        self.n_mels = int(extractor.mel_filters.shape[0])
+        self._resampler = StreamingResampler(samplerate) if samplerate != 16_000 else None
+        self._audio: List[np.ndarray] = []
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self.captured = 0
+        self._fed = 0
+        self._processed = 0
+        self._error: Optional[BaseException] = None
+        self._stopped_at: Optional[float] = None
+        self.frames_before_stop = 0
+        self.post_stop_s = 0.0
+        self._worker = threading.Thread(target=self._run, name="live-features", daemon=True)
+        self._worker.start()
+
+    @property
+    def duration_s(self) -> float:
+        return self.captured / self.samplerate
+
+    def feed(self, block: np.ndarray) -> None:
+        """Capture-thread hook; only queues the block."""
+        if not self._closed:
+            self.captured += len(block)
+            self._fed += 1
+            self._queue.put(block)
+
+    @property
+    def backlog(self) -> int:
+        """Blocks captured but not yet turned into features."""
+        return self._fed - self._processed
+
+    def close(self) -> None:
+        """The recording stopped; no more blocks will be fed."""
+        if not self._closed:
+            self._closed = True
+            self._stopped_at = time.perf_counter()
+            self.frames_before_stop = self.mel.frames
+            self._queue.put(_STOP)
+
+    def _run(self) -> None:
+        # Drains the capture callback, so it shares the capture core, below the callback's priority.
+        cpu_partition.claim_capture_thread(raise_priority=False)
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            done = batch[-1] is _STOP
+            blocks = [b for b in batch if b is not _STOP]
+            try:
+                if blocks and self._error is None:
+                    self._process(to_whisper_audio(blocks, self.dtype))
+            except Exception as exc:  # reported from finish()
+                self._error = exc
+            self._processed += len(blocks)
+            if done:
+                return
+
+    def _process(self, audio: np.ndarray) -> None:
+        if self._resampler is not None:
+            audio = self._resampler.process(audio)
+        self._append(audio)
+
+    def _append(self, audio: np.ndarray) -> None:
+        self._audio.append(audio)
+        self.mel.feed(audio)
+
+    def finish(self) -> Tuple[np.ndarray, np.ndarray]:
+        """16 kHz audio of the whole recording and its log-mel features."""
+        self.close()
+        self._worker.join()
+        if self._error is not None:
+            raise self._error
+        if self._resampler is not None:
+            self._append(self._resampler.flush())
+        features = self.mel.finish()
+        audio = np.concatenate(self._audio) if self._audio else np.zeros(0, dtype=np.float32)
+        self.post_stop_s = time.perf_counter() - self._stopped_at
+        logger.debug(
+            "Live features: %d of %d frames ready at stop, %.3fs after stop",
+            self.frames_before_stop, features.shape[1], self.post_stop_s,
+        )
+        return audio, features
+
+
+def begin_live_features(pool, samplerate: int, dtype: str) -> Optional[LiveFeatureSession]:
+    """A session for the pool's model, or None if it cannot take precomputed features."""
+    if pool is None:
+        return None
+    extractor = getattr(pool.primary, "feature_extractor", None)
+    if not hasattr(extractor, "mel_filters"):
+        # Models served by the daemon compute their own features.
+        return None
+    return LiveFeatureSession(extractor, samplerate, dtype)
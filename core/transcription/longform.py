@@ -0,0 +1,225 @@
+"""
+Chunked transcription of long audio files in bounded memory.
+
+``faster_whisper.decode_audio`` materialises the whole file as one float
+array, so memory grows with file length.  Here the file is decoded with
+PyAV a frame at a time and cut into fixed windows that overlap by a few
+seconds; at most two windows are held at once.  Each window is decoded
+with word timestamps, and the words are stitched back together at the
+middle of each overlap, with a token-alignment pass that drops words the
+previous window already emitted.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import re
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_PUNCTUATION = re.compile(r"[^\w']+")
+
+# Long-file segments are rebuilt from stitched words: one per sentence, capped.
+_SENTENCE_END = (".", "?", "!")
+_PHRASE_WORDS = 32
+
+_PIN_LANGUAGE_PROBABILITY = 0.8
+
+
+@dataclass(frozen=True)
+class StitchedWord:
+    start: float
+    end: float
+    word: str
+    probability: float = 1.0
+
+    @property
+    def token(self) -> str:
+        return _PUNCTUATION.sub("", self.word.lower())
+
+
+def audio_duration(path: str) -> float:
+    """Container duration in seconds without decoding, 0.0 if unknown."""
+    import av
+
+    try:
+        with av.open(path, metadata_errors="ignore") as container:
+            if container.duration is not None:
+                return container.duration / av.time_base
+            stream = container.streams.audio[0]
+            if stream.duration is not None and stream.time_base is not None:
+                return float(stream.duration * stream.time_base)
+    except (av.error.FFmpegError, IndexError):
+        pass
+    return 0.0
+
+
+def iter_decoded_audio(path: str, sampling_rate: int = 16_000) -> Iterator[np.ndarray]:
+    """Mono float32 blocks at ``sampling_rate``, one resampled frame at a time."""
+    import av
+
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+    with av.open(path, mode="r", metadata_errors="ignore") as container:
+        stream = container.streams.audio[0]
+        for frame in container.decode(stream):
+            for out in resampler.resample(frame):
+                yield out.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+        for out in resampler.resample(None):
+            yield out.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+
+
+def iter_windows(
+    blocks: Iterable[np.ndarray],
+    sampling_rate: int = 16_000,
+    window_s: float = 60.0,
+    overlap_s: float = 4.0,
+) -> Iterator[Tuple[float, np.ndarray, bool]]:
+    """
+    Cut a block stream into overlapping windows.
+
+    Yields ``(offset_seconds, audio, is_last)``; consecutive windows share
+    ``overlap_s`` seconds.  One window is held back to know which is last.
+    """
+    window = int(window_s * sampling_rate)
+    overlap = int(overlap_s * sampling_rate)
+    if not 0 <= overlap < window:
+        raise ValueError("overlap must be shorter than the window")
+    step = window - overlap
+
+    pieces: List[np.ndarray] = []
+    pending = 0
+    offset = 0
+    held: Optional[Tuple[float, np.ndarray]] = None
+
+    for block in blocks:
+        pieces.append(block)
+        pending += len(block)
+        while pending >= window:
+            buffer = np.concatenate(pieces)
+            if held is not None:
+                yield held[0], held[1], False
+            held = (offset / sampling_rate, buffer[:window].copy())
+            rest = buffer[step:]
+            pieces, pending = [rest], len(rest)
+            offset += step
+
+    tail = np.concatenate(pieces) if pieces else np.empty(0, dtype=np.float32)
+    if held is None or len(tail) > overlap:
+        if held is not None:
+            yield held[0], held[1], False
+        held = (offset / sampling_rate, tail)
+    if held is not None:
+        yield held[0], held[1], True
+
+
+class SeamStitcher:
+    """Joins word streams from overlapping windows into one transcript."""
+
+    def __init__(self, max_alignment: int = 8, tolerance_s: float = 1.0) -> None:
+        self.max_alignment = max_alignment
+        self.tolerance_s = tolerance_s
+        self._tail: deque[StitchedWord] = deque(maxlen=max_alignment)
+        self.dropped = 0
+
+    @property
+    def tail_text(self) -> str:
+        return "".join(w.word for w in self._tail).strip()
+
+    def add(self, words: List[StitchedWord], start_cut: float, end_cut: float) -> List[StitchedWord]:
+        """Accept the words centred in ``[start_cut, end_cut)`` that are not repeats."""
+        kept = [w for w in words if start_cut <= (w.start + w.end) / 2 < end_cut]
+        repeat = self._repeated_prefix(kept)
+        if repeat:
+            self.dropped += repeat
+            kept = kept[repeat:]
+        self._tail.extend(kept)
+        return kept
+
+    def _repeated_prefix(self, words: List[StitchedWord]) -> int:
+        # Timestamps drift a little between windows, so a word decoded near
+        # the seam can land on both sides of it.  Drop the longest prefix
+        # that repeats the end of what was already emitted.
+        tail = list(self._tail)
+        for k in range(min(len(tail), len(words)), 0, -1):
+            previous, current = tail[-k:], words[:k]
+            if [w.token for w in previous] != [w.token for w in current]:
+                continue
+            if abs(current[0].start - previous[0].start) <= self.tolerance_s:
+                return k
+        return 0
+
+
+def transcribe_long_file(
+    model,
+    audio_file: str,
+    window_s: float = 60.0,
+    overlap_s: float = 4.0,
+    segment_filter: Optional[Callable[[Iterable], Iterable]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    on_window: Optional[Callable[[float], None]] = None,
+    segments_out=None,
+    guard=None,
+    **transcribe_options,
+) -> Optional[str]:
+    """
+    Transcribe ``audio_file`` window by window; None if ``should_stop`` fired.
+
+    A ``DecodeGuard`` passed as ``guard`` decodes each window, cutting off
+    runaways; ``segment_filter`` wraps each window's segment stream after
+    it.  ``on_window`` receives the end of each finished window
+    in seconds.  A ``SegmentStoreBuilder`` passed as ``segments_out``
+    receives the stitched words, grouped into sentence-sized segments.
+    """
+    sampling_rate = model.feature_extractor.sampling_rate
+    transcribe_options["word_timestamps"] = True
+    user_prompt = transcribe_options.pop("initial_prompt", None)
+    stitcher = SeamStitcher()
+    parts: List[str] = []
+    phrase: List[StitchedWord] = []
+    half = overlap_s / 2
+
+    windows = iter_windows(iter_decoded_audio(audio_file, sampling_rate), sampling_rate, window_s, overlap_s)
+    for offset, audio, is_last in windows:
+        if should_stop is not None and should_stop():
+            return None
+        prompt = stitcher.tail_text or user_prompt
+        if guard is not None:
+            segments, info = guard.transcribe(model, audio, initial_prompt=prompt, **transcribe_options)
+        else:
+            segments, info = model.transcribe(audio, initial_prompt=prompt, **transcribe_options)
+        if (
+            "language" not in transcribe_options and info is not None
+            and info.language_probability >= _PIN_LANGUAGE_PROBABILITY
+        ):
+            # Detected once on the first window; the rest of the file skips detection.
+            transcribe_options["language"] = info.language
+        if segment_filter is not None:
+            segments = segment_filter(segments)
+        words = [
+            StitchedWord(offset + w.start, offset + w.end, w.word, getattr(w, "probability", 1.0))
+            for segment in segments
+            for w in (segment.words or [])
+        ]
+        start_cut = offset + half if offset > 0 else -math.inf
+        end_cut = math.inf if is_last else offset + len(audio) / sampling_rate - half
+        kept = stitcher.add(words, start_cut, end_cut)
+        parts.extend(w.word for w in kept)
+        if segments_out is not None:
+            for word in kept:
+                phrase.append(word)
+                if len(phrase) >= _PHRASE_WORDS or word.word.rstrip().endswith(_SENTENCE_END):
+                    segments_out.add_words(phrase)
+                    phrase = []
+        if on_window is not None:
+            on_window(offset + len(audio) / sampling_rate)
+
+    if segments_out is not None:
+        segments_out.add_words(phrase)
+    if stitcher.dropped:
+        logger.info("Long-file stitching dropped %d repeated word(s) at seams", stitcher.dropped)
+    return "".join(parts).strip()
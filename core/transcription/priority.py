@@ -0,0 +1,245 @@
+"""
+Priority classes for jobs sharing the loaded model.
+
+Dictation is interactive: someone is waiting for the text.  File and
+re-transcription jobs are batch work.  Every lease on a model pool goes
+through a ``PriorityScheduler``:
+
+* batch jobs do not start while an interactive job is waiting;
+* a running batch job calls ``checkpoint()`` between segments, where the
+  model is idle.  If an interactive job is waiting for the same pool and
+  that pool has no free slot, the batch job lends it its model and parks
+  until the interactive job hands it back, then carries on with the next
+  segment.  One scheduler serves every pool (current, auxiliary, and the
+  old one during a hot swap), so models are only ever lent within a pool;
+* batch jobs are throttled to ``batch_cpu_share`` of the CPU by idling
+  after each segment in proportion to the time it took.  ctranslate2 fixes
+  its thread count when the model is loaded, so a duty cycle is the share
+  that can be enforced without loading a second copy.
+
+Interactive jobs are tagged with their capture source.  When several wait
+for a pool at once it goes to the source that has been served least,
+oldest request first, so a chatty source cannot starve a quiet one.
+
+Time from submission to holding a model is recorded per class.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from core.audio.telemetry import Histogram
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Upper bounds in milliseconds.
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 2500, 5000, 10_000, 30_000, 60_000)
+
+_POLL_S = 0.05
+
+_held = threading.local()
+
+
+def current_priority() -> Optional[str]:
+    """Priority class of the lease the calling thread holds, or None outside one."""
+    job = getattr(_held, "job", None)
+    return job.priority if job is not None else None
+
+
+class _Job:
+
+    def __init__(self, priority: str, pool, model) -> None:
+        self.priority = priority
+        self.pool = pool
+        self.model = model
+        self.resumed = time.perf_counter()
+
+
+class PriorityScheduler:
+
+    def __init__(self, batch_cpu_share: float = 1.0) -> None:
+        self.batch_cpu_share = batch_cpu_share
+        self._cond = threading.Condition()
+        self._interactive_waiting = 0
+        # Per pool: waiting interactive jobs as (served, arrival, source), and the
+        # batch jobs whose models are on offer.  A job stays in ``_on_loan`` until
+        # its model comes back; jobs, not models, since "workers" mode leases one
+        # model object to several jobs.
+        self._tickets: Dict[object, List[Tuple[int, int, Optional[str]]]] = defaultdict(list)
+        self._served: Counter = Counter()
+        self._arrivals = count()
+        self._lent: Dict[object, List[_Job]] = defaultdict(list)
+        self._on_loan: set[_Job] = set()
+        self._local = threading.local()
+        self.waits = {p: Histogram(WAIT_BUCKETS_MS) for p in PRIORITIES}
+        self.preemptions = 0
+
+    @property
+    def batch_cpu_share(self) -> float:
+        return self._share
+
+    @batch_cpu_share.setter
+    def batch_cpu_share(self, share: float) -> None:
+        self._share = min(1.0, max(0.05, float(share)))
+
+    def view(self, pool, priority: str, source: Optional[str] = None) -> "PriorityPool":
+        return PriorityPool(self, pool, priority, source)
+
+    @contextmanager
+    def lease(self, pool, priority: str = INTERACTIVE, source: Optional[str] = None) -> Iterator[object]:
+        """Lease a model from ``pool`` as a job of the given priority class."""
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority {priority!r}, expected one of {PRIORITIES}")
+        submitted = time.perf_counter()
+        loan: Optional[_Job] = None
+        if priority == INTERACTIVE:
+            model, lease, loan = self._acquire_interactive(pool, source)
+        else:
+            with self._cond:
+                while self._interactive_waiting:
+                    self._cond.wait()
+            lease = pool.acquire()
+            model = lease.model
+        self._record_wait(priority, time.perf_counter() - submitted)
+
+        job = _Job(priority, pool, model)
+        previous, self._local.job = getattr(self._local, "job", None), job
+        held, _held.job = getattr(_held, "job", None), job
+        try:
+            yield model
+        finally:
+            self._local.job = previous
+            _held.job = held
+            if lease is not None:
+                lease.release()
+            else:
+                self._give_back(loan)
+
+    def checkpoint(self) -> None:
+        """
+        Call between segments.  A no-op for interactive jobs; a batch job
+        may idle here for throttling or park while its model is lent out.
+        """
+        job: Optional[_Job] = getattr(self._local, "job", None)
+        if job is None or job.priority != BATCH:
+            return
+        busy = time.perf_counter() - job.resumed
+        idle_until = time.perf_counter() + busy * (1 / self._share - 1)
+        with self._cond:
+            while True:
+                if self._tickets.get(job.pool) and not _has_free_slot(job.pool):
+                    self._lend(job)
+                    break
+                remaining = idle_until - time.perf_counter()
+                if remaining <= 0:
+                    break
+                # Woken early if an interactive job arrives.
+                self._cond.wait(remaining)
+        job.resumed = time.perf_counter()
+
+    def _acquire_interactive(self, pool, source: Optional[str]):
+        with self._cond:
+            ticket = (self._served[source], next(self._arrivals), source)
+            tickets = self._tickets[pool]
+            tickets.append(ticket)
+            self._interactive_waiting += 1
+            self._cond.notify_all()
+        try:
+            while True:
+                with self._cond:
+                    while min(tickets) != ticket:
+                        self._cond.wait()
+                    lent = self._lent.get(pool)
+                    if lent:
+                        loan = lent.pop()
+                        self._on_loan.add(loan)
+                        return loan.model, None, loan
+                lease = pool.acquire(timeout=0)
+                if lease is not None:
+                    return lease.model, lease, None
+                with self._cond:
+                    # Pool releases do not notify this condition, hence the poll.
+                    self._cond.wait(_POLL_S)
+        finally:
+            with self._cond:
+                tickets.remove(ticket)
+                if not tickets:
+                    del self._tickets[pool]
+                self._served[source] += 1
+                self._interactive_waiting -= 1
+                self._cond.notify_all()
+
+    def _lend(self, job: _Job) -> None:
+        """Park the calling batch job while interactive work on its pool uses its model (lock held)."""
+        pool = job.pool
+        self.preemptions += 1
+        self._lent[pool].append(job)
+        self._cond.notify_all()
+        logger.debug("Batch job yielded its model to interactive work")
+        while job in self._on_loan or (self._tickets.get(pool) and job in self._lent.get(pool, ())):
+            self._cond.wait()
+        remaining = [j for j in self._lent.pop(pool, ()) if j is not job]
+        if remaining:
+            self._lent[pool] = remaining
+
+    def _give_back(self, loan: _Job) -> None:
+        with self._cond:
+            self._on_loan.discard(loan)
+            self._cond.notify_all()
+
+    def _record_wait(self, priority: str, seconds: float) -> None:
+        with self._cond:
+            self.waits[priority].add(seconds * 1000)
+
+    def metrics(self) -> dict:
+        """Queue wait (ms) per priority class and how often batch work yielded."""
+        with self._cond:
+            return {
+                "queue_wait_ms": {p: h.snapshot() for p, h in self.waits.items()},
+                "preemptions": self.preemptions,
+                "batch_cpu_share": self._share,
+            }
+
+    def summary(self) -> str:
+        with self._cond:
+            parts = [
+                f"{p} wait p50 {min(h.percentile(50), h.max):.0f}ms max {h.max:.0f}ms ({h.count})"
+                for p, h in self.waits.items() if h.count
+            ]
+            if self.preemptions:
+                parts.append(f"{self.preemptions} preemption(s)")
+        return ", ".join(parts)
+
+
+def _has_free_slot(pool) -> bool:
+    """True if ``pool.acquire(timeout=0)`` would succeed right now."""
+    return pool.active < pool.capacity
+
+
+class PriorityPool:
+    """A pool as seen by one source's jobs of one priority class; leases go through the scheduler."""
+
+    def __init__(self, scheduler: PriorityScheduler, pool, priority: str, source: Optional[str] = None) -> None:
+        self.scheduler = scheduler
+        self.pool = pool
+        self.priority = priority
+        self.source = source
+
+    @property
+    def primary(self):
+        return self.pool.primary
+
+    def lease(self):
+        return self.scheduler.lease(self.pool, self.priority, self.source)
+
+    def checkpoint(self) -> None:
+        self.scheduler.checkpoint()
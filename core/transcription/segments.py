@@ -0,0 +1,343 @@
+"""
+Columnar storage for transcription results.
+
+A ``Segment`` from faster-whisper is a Python object with a list of token
+ints and a list of ``Word`` objects, each with its own string and floats;
+a long session costs a few hundred bytes per word.  ``SegmentStore`` keeps
+the same information in a handful of NumPy arrays:
+
+* per segment: start, end, avg_logprob, no_speech_prob (float32) and
+  offsets into the text buffer, the token array and the word arrays;
+* per word: start, end, probability (float32) and an id into an interned
+  vocabulary, since the same words recur throughout a session;
+* all segment text as one UTF-8 buffer.
+
+Stores are immutable; ``SegmentStoreBuilder`` appends segments or words as
+they are decoded.  ``slice`` selects a time range by binary search,
+``save``/``load`` use a flat binary file that can be memory-mapped, and the
+SRT/VTT/JSON exporters are generators that format one segment at a time.
+"""
+from __future__ import annotations
+
+import json
+import struct
+from array import array
+from pathlib import Path
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+
+_MAGIC = b"WTSEG\x00\x01\x00"
+_ALIGN = 8
+
+_COLUMNS = (
+    "seg_start", "seg_end", "seg_logprob", "seg_no_speech",
+    "text_offsets", "token_offsets", "word_offsets",
+    "tokens", "word_start", "word_end", "word_prob", "word_id",
+    "vocab_offsets", "text", "vocab",
+)
+
+
+class WordView(NamedTuple):
+    start: float
+    end: float
+    word: str
+    probability: float
+
+
+class SegmentView(NamedTuple):
+    id: int
+    start: float
+    end: float
+    text: str
+    avg_logprob: float
+    no_speech_prob: float
+    tokens: np.ndarray
+    words: List[WordView]
+
+
+class SegmentStoreBuilder:
+    """Accumulates a result in compact arrays; ``build()`` freezes it."""
+
+    def __init__(self) -> None:
+        self._seg = {name: array("f") for name in ("seg_start", "seg_end", "seg_logprob", "seg_no_speech")}
+        self._word = {name: array("f") for name in ("word_start", "word_end", "word_prob")}
+        self._word_id = array("i")
+        self._tokens = array("i")
+        self._text = bytearray()
+        self._offsets = {name: array("q", [0]) for name in ("text_offsets", "token_offsets", "word_offsets")}
+        self._vocab: dict[str, int] = {}
+        self._vocab_text = bytearray()
+        self._vocab_offsets = array("q", [0])
+
+    def __len__(self) -> int:
+        return len(self._seg["seg_start"])
+
+    def add_segment(self, segment, offset: float = 0.0) -> None:
+        """Append a faster-whisper ``Segment`` (or anything shaped like one)."""
+        words = getattr(segment, "words", None) or ()
+        self._append_segment(
+            segment.start + offset,
+            segment.end + offset,
+            segment.text,
+            getattr(segment, "avg_logprob", 0.0),
+            getattr(segment, "no_speech_prob", 0.0),
+            getattr(segment, "tokens", None) or (),
+        )
+        for word in words:
+            self._append_word(word.start + offset, word.end + offset, word.word, getattr(word, "probability", 1.0))
+        self._offsets["word_offsets"].append(len(self._word_id))
+
+    def add_words(self, words: Iterable) -> None:
+        """Append one segment made of ``words`` (objects with start, end, word)."""
+        words = list(words)
+        if not words:
+            return
+        self._append_segment(words[0].start, words[-1].end, "".join(w.word for w in words), 0.0, 0.0, ())
+        for word in words:
+            self._append_word(word.start, word.end, word.word, getattr(word, "probability", 1.0))
+        self._offsets["word_offsets"].append(len(self._word_id))
+
+    def _append_segment(self, start, end, text, logprob, no_speech, tokens) -> None:
+        for name, value in zip(self._seg, (start, end, logprob, no_speech)):
+            self._seg[name].append(value)
+        self._text += text.encode("utf-8")
+        self._offsets["text_offsets"].append(len(self._text))
+        self._tokens.extend(tokens)
+        self._offsets["token_offsets"].append(len(self._tokens))
+
+    def _append_word(self, start, end, word: str, probability) -> None:
+        word_id = self._vocab.get(word)
+        if word_id is None:
+            word_id = self._vocab[word] = len(self._vocab)
+            self._vocab_text += word.encode("utf-8")
+            self._vocab_offsets.append(len(self._vocab_text))
+        self._word_id.append(word_id)
+        for name, value in zip(self._word, (start, end, probability)):
+            self._word[name].append(value)
+
+    def build(self) -> "SegmentStore":
+        columns = {name: np.frombuffer(values, dtype=np.float32).copy() for name, values in self._seg.items()}
+        columns.update({name: np.frombuffer(values, dtype=np.float32).copy() for name, values in self._word.items()})
+        columns.update({name: np.frombuffer(values, dtype=np.int64).copy() for name, values in self._offsets.items()})
+        columns["tokens"] = np.frombuffer(self._tokens, dtype=np.int32).copy()
+        columns["word_id"] = np.frombuffer(self._word_id, dtype=np.int32).copy()
+        columns["vocab_offsets"] = np.frombuffer(self._vocab_offsets, dtype=np.int64).copy()
+        columns["text"] = np.frombuffer(bytes(self._text), dtype=np.uint8)
+        columns["vocab"] = np.frombuffer(bytes(self._vocab_text), dtype=np.uint8)
+        return SegmentStore(columns)
+
+
+class SegmentStore:
+    """A transcription result as columns; see the module docstring for the layout."""
+
+    def __init__(self, columns: dict) -> None:
+        missing = set(_COLUMNS) - set(columns)
+        if missing:
+            raise ValueError(f"Segment store is missing column(s): {sorted(missing)}")
+        self.columns = columns
+        for name in _COLUMNS:
+            setattr(self, name, columns[name])
+        self._vocab_cache: Optional[List[str]] = None
+
+    @classmethod
+    def from_segments(cls, segments: Iterable, offset: float = 0.0) -> "SegmentStore":
+        builder = SegmentStoreBuilder()
+        for segment in segments:
+            builder.add_segment(segment, offset)
+        return builder.build()
+
+    @classmethod
+    def empty(cls) -> "SegmentStore":
+        return SegmentStoreBuilder().build()
+
+    def __len__(self) -> int:
+        return len(self.seg_start)
+
+    @property
+    def word_count(self) -> int:
+        return len(self.word_id)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.columns.values())
+
+    @property
+    def duration(self) -> float:
+        return float(self.seg_end.max()) if len(self) else 0.0
+
+    # -- access ---------------------------------------------------------
+
+    def text_of(self, i: int) -> str:
+        return bytes(self.text[self.text_offsets[i]:self.text_offsets[i + 1]]).decode("utf-8")
+
+    def joined_text(self, separator: str = "\n") -> str:
+        """Segment texts joined, as the transcript string has always been built."""
+        return separator.join(self.text_of(i) for i in range(len(self)))
+
+    def _words_vocab(self) -> List[str]:
+        if self._vocab_cache is None:
+            raw = bytes(self.vocab)
+            offsets = self.vocab_offsets
+            self._vocab_cache = [raw[offsets[k]:offsets[k + 1]].decode("utf-8") for k in range(len(offsets) - 1)]
+        return self._vocab_cache
+
+    def words_of(self, i: int) -> List[WordView]:
+        lo, hi = self.word_offsets[i], self.word_offsets[i + 1]
+        vocab = self._words_vocab()
+        return [
+            WordView(float(self.word_start[k]), float(self.word_end[k]), vocab[self.word_id[k]], float(self.word_prob[k]))
+            for k in range(lo, hi)
+        ]
+
+    def segment(self, i: int) -> SegmentView:
+        return SegmentView(
+            i,
+            float(self.seg_start[i]),
+            float(self.seg_end[i]),
+            self.text_of(i),
+            float(self.seg_logprob[i]),
+            float(self.seg_no_speech[i]),
+            self.tokens[self.token_offsets[i]:self.token_offsets[i + 1]],
+            self.words_of(i),
+        )
+
+    def __iter__(self) -> Iterator[SegmentView]:
+        return (self.segment(i) for i in range(len(self)))
+
+    # -- slicing --------------------------------------------------------
+
+    def span(self, start: float, end: float) -> tuple[int, int]:
+        """Index range of the segments that overlap ``[start, end)``."""
+        # Starts are non-decreasing; ends may dip, so search their running maximum.
+        lo = int(np.searchsorted(np.maximum.accumulate(self.seg_end), start, side="right"))
+        hi = int(np.searchsorted(self.seg_start, end, side="left"))
+        return lo, max(lo, hi)
+
+    def slice(self, start: float, end: float) -> "SegmentStore":
+        """The segments overlapping ``[start, end)``, as a new store sharing no state."""
+        return self.take(*self.span(start, end))
+
+    def take(self, lo: int, hi: int) -> "SegmentStore":
+        text_lo, text_hi = self.text_offsets[lo], self.text_offsets[hi]
+        tok_lo, tok_hi = self.token_offsets[lo], self.token_offsets[hi]
+        word_lo, word_hi = self.word_offsets[lo], self.word_offsets[hi]
+        columns = {
+            "seg_start": self.seg_start[lo:hi].copy(),
+            "seg_end": self.seg_end[lo:hi].copy(),
+            "seg_logprob": self.seg_logprob[lo:hi].copy(),
+            "seg_no_speech": self.seg_no_speech[lo:hi].copy(),
+            "text_offsets": self.text_offsets[lo:hi + 1] - text_lo,
+            "token_offsets": self.token_offsets[lo:hi + 1] - tok_lo,
+            "word_offsets": self.word_offsets[lo:hi + 1] - word_lo,
+            "tokens": self.tokens[tok_lo:tok_hi].copy(),
+            "word_start": self.word_start[word_lo:word_hi].copy(),
+            "word_end": self.word_end[word_lo:word_hi].copy(),
+            "word_prob": self.word_prob[word_lo:word_hi].copy(),
+            "word_id": self.word_id[word_lo:word_hi].copy(),
+            # The vocabulary is shared; unused entries cost a few bytes each.
+            "vocab_offsets": np.array(self.vocab_offsets),
+            "text": self.text[text_lo:text_hi].copy(),
+            "vocab": np.array(self.vocab),
+        }
+        return SegmentStore(columns)
+
+    # -- binary file ----------------------------------------------------
+
+    def save(self, path: str | Path) -> Path:
+        """Write a flat binary file: magic, JSON header, 8-byte aligned columns."""
+        path = Path(path)
+        header, offset = {}, 0
+        for name in _COLUMNS:
+            column = np.ascontiguousarray(self.columns[name])
+            header[name] = [column.dtype.str, len(column), offset]
+            offset += -(-column.nbytes // _ALIGN) * _ALIGN
+        meta = json.dumps(header).encode("utf-8")
+        meta += b" " * (-(len(_MAGIC) + 4 + len(meta)) % _ALIGN)
+        with path.open("wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("<I", len(meta)))
+            f.write(meta)
+            for name in _COLUMNS:
+                data = np.ascontiguousarray(self.columns[name]).tobytes()
+                f.write(data)
+                f.write(b"\0" * (-len(data) % _ALIGN))
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path, mmap: bool = True) -> "SegmentStore":
+        """Read a file written by ``save``; with ``mmap`` the columns are mapped, not read."""
+        path = Path(path)
+        with path.open("rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"{path} is not a segment store file")
+            (size,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(size))
+        base = len(_MAGIC) + 4 + size
+        columns = {}
+        for name, (dtype, count, offset) in header.items():
+            dtype = np.dtype(dtype)
+            if not count:
+                columns[name] = np.zeros(0, dtype=dtype)
+            elif mmap:
+                columns[name] = np.memmap(path, dtype=dtype, mode="r", offset=base + offset, shape=(count,))
+            else:
+                columns[name] = np.fromfile(path, dtype=dtype, count=count, offset=base + offset)
+        return cls(columns)
+
+    # -- export ---------------------------------------------------------
+
+    def iter_srt(self) -> Iterator[str]:
+        for n, i in enumerate(range(len(self)), start=1):
+            yield (
+                f"{n}\n{_timestamp(self.seg_start[i], ',')} --> {_timestamp(self.seg_end[i], ',')}\n"
+                f"{self.text_of(i).strip()}\n\n"
+            )
+
+    def iter_vtt(self) -> Iterator[str]:
+        yield "WEBVTT\n\n"
+        for i in range(len(self)):
+            yield (
+                f"{_timestamp(self.seg_start[i], '.')} --> {_timestamp(self.seg_end[i], '.')}\n"
+                f"{self.text_of(i).strip()}\n\n"
+            )
+
+    def iter_json(self, words: bool = True) -> Iterator[str]:
+        """A JSON document ``{"segments": [...]}``, one segment per chunk."""
+        yield '{"segments": ['
+        for i in range(len(self)):
+            item = {
+                "id": i,
+                "start": round(float(self.seg_start[i]), 3),
+                "end": round(float(self.seg_end[i]), 3),
+                "text": self.text_of(i),
+                "avg_logprob": round(float(self.seg_logprob[i]), 4),
+                "no_speech_prob": round(float(self.seg_no_speech[i]), 4),
+            }
+            if words:
+                item["words"] = [
+                    {"start": round(w.start, 3), "end": round(w.end, 3), "word": w.word,
+                     "probability": round(w.probability, 4)}
+                    for w in self.words_of(i)
+                ]
+            yield ("," if i else "") + "\n" + json.dumps(item, ensure_ascii=False)
+        yield "\n]}\n"
+
+    def export(self, path: str | Path, fmt: Optional[str] = None) -> Path:
+        """Write SRT, VTT or JSON, chosen by ``fmt`` or the file extension."""
+        path = Path(path)
+        fmt = (fmt or path.suffix.lstrip(".")).lower()
+        chunks = {"srt": self.iter_srt, "vtt": self.iter_vtt, "json": self.iter_json}.get(fmt)
+        if chunks is None:
+            raise ValueError(f"Unknown export format {fmt!r}, expected srt, vtt or json")
+        with path.open("w", encoding="utf-8", newline="\n") as f:
+            f.writelines(chunks())
+        return path
+
+
+def _timestamp(seconds: float, decimal: str) -> str:
+    millis = int(round(max(0.0, float(seconds)) * 1000))
+    hours, millis = divmod(millis, 3_600_000)
+    minutes, millis = divmod(millis, 60_000)
+    secs, millis = divmod(millis, 1000)
+    return f"{hours:02d}:{minutes:02d}:{secs:02d}{decimal}{millis:03d}"
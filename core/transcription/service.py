@@ -3,73 +3,238 @@ from typing import Optional
 from pathlib import Path
 from PySide6.QtCore import QObject, Signal, QThread
 import logging
+import time
+from .cache import CachedRecording
+from .language import LanguageCache
+from .longform import audio_duration
+from .priority import BATCH, INTERACTIVE, PriorityScheduler
+from .transcriber import Transcriber
 
 logger = logging.getLogger(__name__)
 
 class _TranscriptionThread(QThread):
-    transcription_done = Signal(str)
-    error_occurred = Signal(str)
+    transcription_done = Signal(object, str)
+    segments_done = Signal(object, object)
+    decode_started = Signal(object, float)
+    error_occurred = Signal(object, str)
 
-    def __init__(self, model, expected_id: int, audio_file: str | Path) -> None:
+    def __init__(
+        self,
+        transcriber: Transcriber,
+        pool,
+        audio_file: Optional[str | Path] = None,
+        recording: Optional[CachedRecording] = None,
+        long_form: bool = False,
+        keep_file: bool = False,
+        live=None,
+        job=None,
+    ) -> None:
         super().__init__()
-        self.model = model
-        self.expected_id = expected_id
-        self.audio_file = str(audio_file)
+        self.transcriber = transcriber
+        self.pool = pool  # PriorityPool
+        self.job = job
+        self.audio_file = str(audio_file) if audio_file else None
+        self.recording = recording
+        self.long_form = long_form
+        self.keep_file = keep_file
+        self.live = live
 
     def run(self) -> None:
         try:
-            if id(self.model) != self.expected_id or self.isInterruptionRequested():
-                return
-            segments, _ = self.model.transcribe(self.audio_file)
             if self.isInterruptionRequested():
                 return
-            self.transcription_done.emit("\n".join(s.text for s in segments))
+            audio = features = None
+            if self.live is not None:
+                audio, features = self.live.finish()
+            # Dictation from one source keeps its language; files may be in any.
+            language_session = str(self.pool.source or "default") if self.pool.priority == INTERACTIVE else None
+            with self.pool.lease() as model:
+                self.decode_started.emit(self.job, time.perf_counter())
+                if self.long_form:
+                    result = self.transcriber.transcribe_long_segments(
+                        model,
+                        self.audio_file,
+                        should_stop=self.isInterruptionRequested,
+                        on_segment=self.pool.checkpoint,
+                    )
+                else:
+                    result = self.transcriber.transcribe_segments(
+                        model,
+                        audio_file=self.audio_file,
+                        audio=audio,
+                        recording=self.recording,
+                        should_stop=self.isInterruptionRequested,
+                        features=features,
+                        on_segment=self.pool.checkpoint,
+                        language_session=language_session,
+                    )
+            if result is not None:
+                self.segments_done.emit(self.job, result)
+                text = result.joined_text("").strip() if self.long_form else result.joined_text()
+                self.transcription_done.emit(self.job, text)
         except Exception as exc:
-            self.error_occurred.emit(f"Transcription failed: {exc}")
+            self.error_occurred.emit(self.job, f"Transcription failed: {exc}")
         finally:
-            try:
-                Path(self.audio_file).unlink(missing_ok=True)
-            except OSError:
-                pass
+            if self.audio_file and not self.keep_file:
+                try:
+                    Path(self.audio_file).unlink(missing_ok=True)
+                except OSError:
+                    pass
+
+class _SpeculationThread(QThread):
+    transcription_done = Signal(object, str)
+    error_occurred = Signal(object, str)
+
+    def __init__(self, session, job=None) -> None:
+        super().__init__()
+        self.session = session
+        self.job = job
+
+    def run(self) -> None:
+        try:
+            text = self.session.finish(should_stop=self.isInterruptionRequested)
+            if text is not None:
+                self.transcription_done.emit(self.job, text)
+        except Exception as exc:
+            self.error_occurred.emit(self.job, f"Transcription failed: {exc}")
 
 class TranscriptionService(QObject):
-    transcription_started = Signal()
-    transcription_completed = Signal(str)
-    transcription_error = Signal(str)
+    """
+    Runs transcription jobs on worker threads.
 
-    def __init__(self, curate_text_enabled: bool = False):
+    Each job carries an opaque ``job`` tag that is passed back with its
+    signals, and a priority class: recordings are interactive, files and
+    re-transcriptions batch.  Jobs of both classes may run at once; the
+    ``PriorityScheduler`` decides who holds the model.
+    """
+    transcription_started = Signal(object)  # job
+    decode_started = Signal(object, float)  # job, perf_counter() once it holds a model
+    transcription_completed = Signal(object, str)  # job, text
+    transcription_error = Signal(object, str)  # job, message
+    segments_ready = Signal(object, object)  # job, SegmentStore (not sent for speculative jobs)
+
+    def __init__(self, curate_text_enabled: bool = False, transcriber: Optional[Transcriber] = None):
         super().__init__()
-        self.curate_enabled = curate_text_enabled
-        self._transcription_thread: Optional[_TranscriptionThread] = None
+        self.transcriber = transcriber or Transcriber(curate_text_enabled)
+        self.scheduler = PriorityScheduler()
+        self._threads: list[QThread] = []
+        self.long_file_threshold_s = 600.0
+
+    @property
+    def curate_enabled(self) -> bool:
+        return self.transcriber.curate_enabled
+
+    @property
+    def is_busy(self) -> bool:
+        return any(thread.isRunning() for thread in self._threads)
+
+    def interactive_pool(self, pool, source: Optional[str] = None):
+        """``pool`` as seen by interactive work outside the service, e.g. speculation."""
+        return self.scheduler.view(pool, INTERACTIVE, source) if pool else None
 
-    def transcribe_file(self, model, expected_id: int, audio_file: str | Path) -> None:
-        if not model:
-            self.transcription_error.emit("No model available")
+    @property
+    def guard_stats(self):
+        return self.transcriber.guard_stats
+
+    @property
+    def recording_cache(self):
+        return self.transcriber.recording_cache
+
+    def transcribe_file(self, pool, audio_file: str | Path, keep_file: bool = False,
+                        priority: str = INTERACTIVE, job=None, source: Optional[str] = None) -> None:
+        """Transcribe a file; files over the long-file threshold are decoded in windows."""
+        if not pool:
+            self.transcription_error.emit(job, "No model available")
             return
+        long_form = (
+            self.long_file_threshold_s > 0
+            and audio_duration(str(audio_file)) >= self.long_file_threshold_s
+        )
+        self._start(
+            pool, priority, job, source,
+            audio_file=str(audio_file), long_form=long_form, keep_file=keep_file,
+        )
+
+    def retranscribe(self, pool, index: int = 0, job=None) -> bool:
+        """Transcribe a cached recording again, e.g. after switching models."""
+        recording = self.recording_cache.get(index)
+        if recording is None:
+            return False
+        if not pool:
+            self.transcription_error.emit(job, "No model available")
+            return True
+        self._start(pool, BATCH, job, recording=recording)
+        return True
+
+    def transcribe_live(self, pool, session, job=None, source: Optional[str] = None) -> None:
+        """Transcribe a recording whose features were computed while it was captured."""
+        if not pool:
+            session.close()
+            self.transcription_error.emit(job, "No model available")
+            return
+        self._start(pool, INTERACTIVE, job, source, live=session)
 
-        self._transcription_thread = _TranscriptionThread(
-            model, expected_id, str(audio_file)
+    def finish_speculation(self, session, job=None) -> None:
+        """Complete a recording that was partly transcribed while it was captured."""
+        self._launch_thread(_SpeculationThread(session, job), job)
+
+    def _start(self, pool, priority: str, job, source: Optional[str] = None,
+               audio_file: Optional[str] = None,
+               recording: Optional[CachedRecording] = None,
+               long_form: bool = False, keep_file: bool = False, live=None) -> None:
+        thread = _TranscriptionThread(
+            self.transcriber, self.scheduler.view(pool, priority, source),
+            audio_file, recording, long_form, keep_file, live, job,
         )
-        self._transcription_thread.transcription_done.connect(self._on_transcription_done)
-        self._transcription_thread.error_occurred.connect(self.transcription_error)
-        self._transcription_thread.start()
-        self.transcription_started.emit()
-
-    def _on_transcription_done(self, text: str) -> None:
-        if self.curate_enabled:
-            try:
-                from core.text.curation import curate_text
-                text = curate_text(text)
-            except Exception as exc:
-                logger.warning("Curate failed: %s", exc)
-
-        text = "\n".join(line.lstrip() for line in text.splitlines())
-        self.transcription_completed.emit(text)
+        thread.segments_done.connect(self.segments_ready)
+        thread.decode_started.connect(self.decode_started)
+        self._launch_thread(thread, job)
+
+    def _launch_thread(self, thread: QThread, job) -> None:
+        self._threads = [t for t in self._threads if t.isRunning()]
+        self._threads.append(thread)
+        thread.transcription_done.connect(self._on_transcription_done)
+        thread.error_occurred.connect(self.transcription_error)
+        thread.start()
+        self.transcription_started.emit(job)
+
+    def _on_transcription_done(self, job, text: str) -> None:
+        self.transcription_completed.emit(job, self.transcriber.postprocess(text))
 
     def set_curation_enabled(self, enabled: bool) -> None:
-        self.curate_enabled = enabled
+        self.transcriber.curate_enabled = enabled
+
+    def set_guard_enabled(self, enabled: bool) -> None:
+        self.transcriber.guard_enabled = enabled
+
+    def configure_long_files(self, threshold_s: float, window_s: float, overlap_s: float) -> None:
+        """Files at least ``threshold_s`` long (0 disables) are transcribed in windows."""
+        self.long_file_threshold_s = float(threshold_s or 0)
+        self.transcriber.long_window_s = float(window_s)
+        self.transcriber.long_overlap_s = float(overlap_s)
+
+    def configure_recording_cache(self, capacity: int, keep_features: bool) -> None:
+        self.recording_cache.resize(capacity)
+        self.recording_cache.keep_features = keep_features
+
+    def configure_language_cache(self, enabled: bool, min_probability: float = 0.8,
+                                 recheck_every: int = 10, recheck_after_s: float = 600.0) -> None:
+        """Reuse the language detected for a source on its later recordings."""
+        self.transcriber.language_cache = (
+            LanguageCache(min_probability, recheck_every, recheck_after_s) if enabled else None
+        )
+
+    @property
+    def language_cache(self) -> Optional[LanguageCache]:
+        return self.transcriber.language_cache
+
+    def set_batch_cpu_share(self, share: float) -> None:
+        """Fraction of CPU time batch jobs may use (1.0 = unthrottled)."""
+        self.scheduler.batch_cpu_share = share
 
     def cleanup(self) -> None:
-        if self._transcription_thread and self._transcription_thread.isRunning():
-            self._transcription_thread.requestInterruption()
-            self._transcription_thread.wait()
\ No newline at end of file
+        for thread in self._threads:
+            if thread.isRunning():
+                thread.requestInterruption()
+        for thread in self._threads:
+            thread.wait()
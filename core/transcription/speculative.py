@@ -0,0 +1,259 @@
+"""
+Speculative transcription during trailing silence.
+
+People usually finish a sentence, pause, and only then click stop.  A
+``SpeculativeSession`` watches the capture stream with an energy VAD; once
+the speaker has been silent for ``min_silence_s`` it decodes everything
+captured up to the silence on a worker thread.  The capture callback only
+queues each block; a watcher thread runs the VAD and starts the decodes.  If they carry on talking,
+the next pause decodes only the new audio since the last cut.  When the
+recording stops, the speculative parts are joined and only the tail after
+the last cut is decoded, or nothing at all if the tail is silent.
+
+Outcomes per recording:
+
+* hit - the tail was silent; the transcript was ready (or in flight) at stop.
+* partial - some audio was decoded early, the speech after it at stop.
+* miss - no pause long enough to speculate; the whole clip decoded at stop.
+
+``saved_s`` counts decode work that finished (or ran) before stop, i.e.
+latency taken off the critical path.
+"""
+from __future__ import annotations
+
+import logging
+import queue
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from core.audio.recording import to_whisper_audio
+from core.audio.vad import EnergyVAD
+from .transcriber import Transcriber
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class SpeculationStats:
+    """Thread-safe outcome counters shared across recordings."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.sessions = 0
+        self.hits = 0
+        self.partial = 0
+        self.misses = 0
+        self.saved_s = 0.0
+        self.post_stop_s = 0.0
+
+    def record(self, outcome: str, saved_s: float, post_stop_s: float) -> None:
+        with self._lock:
+            self.sessions += 1
+            setattr(self, outcome, getattr(self, outcome) + 1)
+            self.saved_s += saved_s
+            self.post_stop_s += post_stop_s
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            n = self.sessions or 1
+            return {
+                "sessions": self.sessions,
+                "hits": self.hits,
+                "partial": self.partial,
+                "misses": self.misses,
+                "hit_rate": self.hits / n,
+                "mean_saved_s": self.saved_s / n,
+                "mean_post_stop_s": self.post_stop_s / n,
+            }
+
+
+@dataclass
+class _Part:
+    start: int
+    end: int
+    started: float = field(default_factory=time.perf_counter)
+    finished: Optional[float] = None
+    audio: Optional[np.ndarray] = None
+    text: str = ""
+    error: Optional[BaseException] = None
+
+
+class SpeculativeSession:
+
+    def __init__(
+        self,
+        transcriber: Transcriber,
+        pool,
+        stats: SpeculationStats,
+        samplerate: int,
+        dtype: str,
+        min_silence_s: float = 0.7,
+        padding_s: float = 0.2,
+        min_speech_s: float = 0.3,
+    ) -> None:
+        self.transcriber = transcriber
+        self.pool = pool
+        self.stats = stats
+        self.samplerate = samplerate
+        self.dtype = dtype
+        self.min_silence_s = min_silence_s
+        self.padding = int(padding_s * samplerate)
+        self.min_speech = int(min_speech_s * samplerate)
+        self.vad = EnergyVAD(samplerate, dtype)
+        self._queue: queue.Queue = queue.Queue()
+        self._closed = False
+        self._lock = threading.Lock()
+        self._blocks: List[np.ndarray] = []
+        self._offsets: List[int] = []
+        self._committed = 0
+        self._speech_since_commit = 0
+        self._parts: List[_Part] = []
+        self._worker: Optional[threading.Thread] = None
+        self._stopped_at: Optional[float] = None
+        self.outcome: Optional[str] = None
+        self.saved_s = 0.0
+        self._watcher = threading.Thread(target=self._run, name="speculation", daemon=True)
+        self._watcher.start()
+
+    @property
+    def frames(self) -> int:
+        return self.vad.frames
+
+    @property
+    def duration_s(self) -> float:
+        return self.frames / self.samplerate
+
+    def feed(self, block: np.ndarray) -> None:
+        """Capture-thread hook; only queues the block."""
+        if not self._closed:
+            self._queue.put(block)
+
+    def close(self) -> None:
+        """The recording stopped; no more blocks will be fed."""
+        if not self._closed:
+            self._closed = True
+            self._stopped_at = time.perf_counter()
+            self._queue.put(_STOP)
+
+    def _run(self) -> None:
+        while True:
+            block = self._queue.get()
+            if block is _STOP:
+                return
+            self._add(block, speculate=not self._closed)
+
+    def _add(self, block: np.ndarray, speculate: bool) -> None:
+        """Record a block and, after a long enough pause, decode up to it."""
+        with self._lock:
+            self._offsets.append(self.vad.frames)
+            self._blocks.append(block)
+            if self.vad.feed(block):
+                self._speech_since_commit += len(block)
+            if (
+                speculate
+                and self._speech_since_commit >= self.min_speech
+                and self.vad.trailing_silence_s >= self.min_silence_s
+                and (self._worker is None or not self._worker.is_alive())
+            ):
+                cut = min(self.vad.frames, self.vad.last_speech_end + self.padding)
+                self._start_part(self._committed, cut)
+                self._committed = cut
+                self._speech_since_commit = 0
+
+    def _slice(self, start: int, end: int) -> List[np.ndarray]:
+        if start >= end:
+            return []
+        first = max(0, bisect_right(self._offsets, start) - 1)
+        last = bisect_right(self._offsets, end)
+        blocks = self._blocks[first:last]
+        if not blocks:
+            return []
+        base = self._offsets[first]
+        audio = np.concatenate(blocks)
+        return [audio[start - base:end - base]]
+
+    def _start_part(self, start: int, end: int) -> None:
+        part = _Part(start, end)
+        prompt = " ".join(p.text for p in self._parts if p.text)[-200:] or None
+        self._parts.append(part)
+        self._worker = threading.Thread(target=self._decode, args=(part, prompt), daemon=True)
+        self._worker.start()
+
+    def _decode(self, part: _Part, prompt: Optional[str]) -> None:
+        try:
+            with self._lock:
+                blocks = self._slice(part.start, part.end)
+            part.audio = to_whisper_audio(blocks, self.dtype, self.samplerate)
+            with self.pool.lease() as model:
+                options = {"initial_prompt": prompt} if prompt else {}
+                part.text = self.transcriber.transcribe(
+                    model, audio=part.audio, cache=False,
+                    language_session=str(getattr(self.pool, "source", None) or "default"), **options,
+                ) or ""
+        except BaseException as exc:  # reported from finish()
+            part.error = exc
+        finally:
+            part.finished = time.perf_counter()
+
+    def finish(self, should_stop: Optional[Callable[[], bool]] = None) -> Optional[str]:
+        """Join the speculative parts and decode whatever remains; None if stopped."""
+        self.close()
+        stopped = self._stopped_at
+        # Blocks still queued at stop belong to the tail; no new part starts for them.
+        self._watcher.join()
+        if self._worker is not None:
+            self._worker.join()
+
+        parts = list(self._parts)
+        if any(p.error is not None for p in parts):
+            logger.warning("Speculative decode failed, transcribing the whole recording")
+            parts = []
+        committed = parts[-1].end if parts else 0
+        # Decode work done before the stop click is off the critical path.
+        saved = sum(min(p.finished, stopped) - p.started for p in parts if p.started < stopped)
+        if should_stop is not None and should_stop():
+            return None
+
+        tail_has_speech = not parts or self._speech_since_commit > 0
+        tail = _Part(committed, self.frames)
+        if tail_has_speech:
+            prompt = " ".join(p.text for p in parts if p.text)[-200:] or None
+            self._decode(tail, prompt)
+            if tail.error is not None:
+                raise tail.error
+        else:
+            # Not decoded, but kept so a re-transcription sees the whole clip.
+            tail.audio = to_whisper_audio(self._slice(committed, self.frames), self.dtype, self.samplerate)
+        parts.append(tail)
+
+        if not committed:
+            self.outcome = "misses"
+        else:
+            self.outcome = "partial" if tail_has_speech else "hits"
+        self.saved_s = saved
+        self.stats.record(self.outcome, saved, time.perf_counter() - stopped)
+
+        audio = [p.audio for p in parts if p.audio is not None and len(p.audio)]
+        if audio:
+            self.transcriber.recording_cache.add(np.concatenate(audio), 16_000)
+        return "\n".join(p.text.strip() for p in parts if p.text.strip())
+
+
+class SpeculativeTranscriber:
+    """Creates a ``SpeculativeSession`` per recording and keeps their stats."""
+
+    def __init__(self, transcriber: Transcriber, min_silence_s: float = 0.7) -> None:
+        self.transcriber = transcriber
+        self.min_silence_s = min_silence_s
+        self.stats = SpeculationStats()
+
+    def begin(self, pool, samplerate: int, dtype: str) -> SpeculativeSession:
+        return SpeculativeSession(
+            self.transcriber, pool, self.stats, samplerate, dtype, self.min_silence_s
+        )
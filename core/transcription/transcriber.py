@@ -0,0 +1,210 @@
+"""
+Qt-free transcription: audio preparation, decoding and post-processing.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+
+from .cache import CachedRecording, RecordingCache
+from .features import compute_features, feature_size, precomputed_features
+from .guard import DecodeGuard, GuardStats
+from .language import LanguageCache, detects_language
+from .longform import transcribe_long_file
+from .segments import SegmentStore, SegmentStoreBuilder
+
+logger = logging.getLogger(__name__)
+
+
+def postprocess_text(text: str, curate: bool = False) -> str:
+    if curate:
+        try:
+            from core.text.curation import curate_text
+            text = curate_text(text)
+        except Exception as exc:
+            logger.warning("Curate failed: %s", exc)
+
+    return "\n".join(line.lstrip() for line in text.splitlines())
+
+
+def _between_segments(segments: Iterable, callback: Callable[[], None]) -> Iterator:
+    """Call ``callback`` after each segment, while the model is idle."""
+    for segment in segments:
+        yield segment
+        callback()
+
+
+class Transcriber:
+
+    def __init__(self, curate: bool = False, guard_enabled: bool = True,
+                 recording_cache: Optional[RecordingCache] = None) -> None:
+        self.curate_enabled = curate
+        self.guard_enabled = guard_enabled
+        self.guard_stats = GuardStats()
+        self.recording_cache = recording_cache or RecordingCache()
+        self.long_window_s = 60.0
+        self.long_overlap_s = 4.0
+        self.language_cache: Optional[LanguageCache] = None
+
+    def prepare(
+        self,
+        model,
+        audio_file: Optional[str | Path] = None,
+        audio=None,
+        recording: Optional[CachedRecording] = None,
+        cache: bool = True,
+        features=None,
+    ):
+        """
+        Return 16 kHz mono float32 audio and, when cached, its features.
+
+        ``features`` computed elsewhere (e.g. while recording) are used and
+        cached if they match the model's mel size.
+        """
+        sampling_rate = model.feature_extractor.sampling_rate
+        if features is not None and (
+            not hasattr(model.feature_extractor, "mel_filters")
+            or features.shape[0] != feature_size(model)
+        ):
+            features = None
+        if recording is None:
+            if audio is None:
+                from faster_whisper import decode_audio
+                audio = decode_audio(str(audio_file), sampling_rate=sampling_rate)
+            if not cache:
+                return audio, features
+            recording = self.recording_cache.add(audio, sampling_rate)
+            if recording is None:
+                return audio, features
+            if features is not None:
+                if self.recording_cache.keep_features:
+                    recording.features[features.shape[0]] = features
+                return recording.audio, features
+        return recording.audio, self.recording_cache.features_for(recording, model)
+
+    def transcribe(
+        self,
+        model,
+        audio_file: Optional[str | Path] = None,
+        audio=None,
+        recording: Optional[CachedRecording] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        cache: bool = True,
+        features=None,
+        on_segment: Optional[Callable[[], None]] = None,
+        language_session: Optional[str] = None,
+        **transcribe_options,
+    ) -> Optional[str]:
+        """Raw transcript, or None if ``should_stop`` asked to abandon it."""
+        result = self.transcribe_segments(
+            model, audio_file, audio, recording, should_stop, cache, features, on_segment,
+            language_session, **transcribe_options,
+        )
+        return None if result is None else result.joined_text()
+
+    def transcribe_segments(
+        self,
+        model,
+        audio_file: Optional[str | Path] = None,
+        audio=None,
+        recording: Optional[CachedRecording] = None,
+        should_stop: Optional[Callable[[], bool]] = None,
+        cache: bool = True,
+        features=None,
+        on_segment: Optional[Callable[[], None]] = None,
+        language_session: Optional[str] = None,
+        **transcribe_options,
+    ) -> Optional[SegmentStore]:
+        """
+        Segments with their timestamps, or None if ``should_stop`` fired.
+
+        ``cache=False`` keeps the audio out of the recording cache, e.g. for
+        fragments of a longer recording.  ``features`` are log-mel features
+        of ``audio`` that were already computed.  ``on_segment`` runs
+        between decoded segments.  Clips with the same ``language_session``
+        share a cached language (see ``LanguageCache``).
+        """
+        audio, features = self.prepare(model, audio_file, audio, recording, cache, features)
+        languages = self.language_cache
+        if (
+            languages is None or language_session is None or transcribe_options.get("language")
+            or transcribe_options.get("vad_filter") or not detects_language(model)
+        ):
+            languages = None
+        pinned = languages.language_for(language_session) if languages is not None else None
+        if languages is not None and pinned is None and features is None:
+            # Detection and decoding then share one feature pass, as they
+            # would inside model.transcribe.
+            features = compute_features(model, audio)
+        scope = (
+            precomputed_features(model, audio, features)
+            if features is not None else nullcontext()
+        )
+        with scope:
+            if pinned is not None:
+                transcribe_options["language"] = pinned
+            elif languages is not None:
+                started = time.perf_counter()
+                language, probability, _ = model.detect_language(features=features)
+                languages.detected(language_session, language, probability, time.perf_counter() - started)
+                transcribe_options["language"] = language
+            if self.guard_enabled:
+                segments, _ = DecodeGuard(self.guard_stats).transcribe(model, audio, **transcribe_options)
+            else:
+                segments, _ = model.transcribe(audio, **transcribe_options)
+            if on_segment is not None:
+                segments = _between_segments(segments, on_segment)
+            if should_stop is not None and should_stop():
+                return None
+            result = SegmentStore.from_segments(segments)
+        if pinned is not None:
+            languages.check(language_session, result)
+        return result
+
+    def transcribe_long(
+        self,
+        model,
+        audio_file: str | Path,
+        should_stop: Optional[Callable[[], bool]] = None,
+        on_segment: Optional[Callable[[], None]] = None,
+        **transcribe_options,
+    ) -> Optional[str]:
+        """Raw transcript of a long file, decoded in overlapping windows."""
+        return self._transcribe_long(model, audio_file, should_stop, on_segment, None, **transcribe_options)
+
+    def transcribe_long_segments(
+        self,
+        model,
+        audio_file: str | Path,
+        should_stop: Optional[Callable[[], bool]] = None,
+        on_segment: Optional[Callable[[], None]] = None,
+        **transcribe_options,
+    ) -> Optional[SegmentStore]:
+        """``transcribe_long`` with word timestamps, one segment per sentence."""
+        builder = SegmentStoreBuilder()
+        text = self._transcribe_long(model, audio_file, should_stop, on_segment, builder, **transcribe_options)
+        return None if text is None else builder.build()
+
+    def _transcribe_long(self, model, audio_file, should_stop, on_segment, segments_out, **transcribe_options):
+        segment_filter = None
+        if on_segment is not None:
+            def segment_filter(segments):
+                return _between_segments(segments, on_segment)
+
+        return transcribe_long_file(
+            model,
+            str(audio_file),
+            self.long_window_s,
+            self.long_overlap_s,
+            segment_filter=segment_filter,
+            guard=DecodeGuard(self.guard_stats) if self.guard_enabled else None,
+            should_stop=should_stop,
+            segments_out=segments_out,
+            **transcribe_options,
+        )
+
+    def postprocess(self, text: str) -> str:
+        return postprocess_text(text, self.curate_enabled)
@@ -1,21 +1,28 @@
 """
-Clipboard window for displaying transcription results.
+Clipboard window for displaying transcription results and searchable history.
 """
 from __future__ import annotations
 
-from PySide6.QtCore import Qt
+from typing import Optional
+
+from PySide6.QtCore import Qt, QModelIndex, QTimer
 from PySide6.QtWidgets import (
     QWidget,
     QVBoxLayout,
     QPushButton,
     QTextEdit,
     QApplication,
+    QLineEdit,
+    QListView,
 )
 
+from core.history import HistoryEntry, HistoryStore
+from gui.history_model import HistoryListModel
+
 
 class ClipboardWindow(QWidget):
 
-    def __init__(self, main_window: QWidget | None = None):
+    def __init__(self, main_window: QWidget | None = None, history: Optional[HistoryStore] = None):
         super().__init__()
         self.main_window = main_window
         self.setWindowTitle("Current Transcription")
@@ -28,6 +35,32 @@ class ClipboardWindow(QWidget):
         self.copy_button.clicked.connect(self._copy_to_clipboard)
         layout.addWidget(self.copy_button)
 
+        self.history_model: Optional[HistoryListModel] = None
+        if history is not None:
+            self.search_box = QLineEdit()
+            self.search_box.setPlaceholderText("Search history...")
+            self.search_box.setClearButtonEnabled(True)
+            layout.addWidget(self.search_box)
+
+            self.history_model = HistoryListModel(history, parent=self)
+            self.history_view = QListView()
+            self.history_view.setModel(self.history_model)
+            self.history_view.setUniformItemSizes(True)
+            self.history_view.setToolTip("Click to show, double-click to copy")
+            self.history_view.clicked.connect(self._on_history_clicked)
+            self.history_view.doubleClicked.connect(self._on_history_double_clicked)
+            layout.addWidget(self.history_view, 1)
+
+            # Debounce so typing does not query on every keystroke.
+            self._search_timer = QTimer(self)
+            self._search_timer.setSingleShot(True)
+            self._search_timer.setInterval(150)
+            self._search_timer.timeout.connect(
+                lambda: self.history_model.set_query(self.search_box.text())
+            )
+            self.search_box.textChanged.connect(self._search_timer.start)
+            self.history_model.fetchMore()
+
         self.setWindowFlags(Qt.Window | Qt.WindowStaysOnTopHint)
         self.resize(300, self.main_window.height() if main_window else 250)
         self.hide()
@@ -35,9 +68,9 @@ class ClipboardWindow(QWidget):
     def update_text(self, text: str) -> None:
         self.text_display.setText(text)
 
-    def update_history(self, text: str) -> None:
-        current = self.text_display.toPlainText()
-        self.text_display.setText(f"{text}\n\n{current}" if current else text)
+    def update_history(self, entry: HistoryEntry) -> None:
+        if self.history_model is not None:
+            self.history_model.prepend(entry)
 
     def showEvent(self, event):
         if self.main_window:
@@ -50,8 +83,19 @@ class ClipboardWindow(QWidget):
             )
         super().showEvent(event)
 
+    def _on_history_clicked(self, index: QModelIndex) -> None:
+        entry = self.history_model.entry(index.row())
+        if entry is not None:
+            self.text_display.setText(entry.text)
+
+    def _on_history_double_clicked(self, index: QModelIndex) -> None:
+        entry = self.history_model.entry(index.row())
+        app = QApplication.instance()
+        if entry is not None and app:
+            app.clipboard().setText(entry.text)
+
     def _copy_to_clipboard(self) -> None:
         app = QApplication.instance()
         if app:
             text = self.text_display.toPlainText()
-            app.clipboard().setText(text)
\ No newline at end of file
+            app.clipboard().setText(text)
@@ -0,0 +1,84 @@
+"""
+Lazily paged list model over the transcription history store.
+"""
+from __future__ import annotations
+
+import time
+from typing import List, Optional
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+
+from core.history import HistoryEntry, HistoryStore
+
+EntryRole = Qt.UserRole + 1
+
+
+class HistoryListModel(QAbstractListModel):
+    """Newest-first history rows, fetched a page at a time as the view scrolls."""
+
+    def __init__(self, store: HistoryStore, page_size: int = 200, parent=None) -> None:
+        super().__init__(parent)
+        self.store = store
+        self.page_size = page_size
+        self.query = ""
+        self._entries: List[HistoryEntry] = []
+        self._exhausted = False
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:  # noqa: N802
+        return 0 if parent.isValid() else len(self._entries)
+
+    def canFetchMore(self, parent: QModelIndex = QModelIndex()) -> bool:  # noqa: N802
+        return not parent.isValid() and not self._exhausted
+
+    def fetchMore(self, parent: QModelIndex = QModelIndex()) -> None:  # noqa: N802
+        if parent.isValid() or self._exhausted:
+            return
+        before = self._entries[-1].id if self._entries else None
+        page = self.store.page(self.page_size, before_id=before, query=self.query)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        start = len(self._entries)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._entries.extend(page)
+        self.endInsertRows()
+
+    def data(self, index: QModelIndex, role: int = Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._entries):
+            return None
+        entry = self._entries[index.row()]
+        if role == Qt.DisplayRole:
+            stamp = time.strftime("%Y-%m-%d %H:%M", time.localtime(entry.created))
+            first_line = entry.text.strip().splitlines()[0] if entry.text.strip() else ""
+            return f"{stamp}  {first_line[:120]}"
+        if role == Qt.ToolTipRole:
+            details = [entry.model_name or "", entry.quantization_type or ""]
+            if entry.audio_seconds:
+                details.append(f"{entry.audio_seconds:.1f}s audio")
+            if entry.transcribe_seconds:
+                details.append(f"{entry.transcribe_seconds:.1f}s to transcribe")
+            return f"{' | '.join(d for d in details if d)}\n\n{entry.text[:2000]}"
+        if role == EntryRole:
+            return entry
+        return None
+
+    def entry(self, row: int) -> Optional[HistoryEntry]:
+        return self._entries[row] if 0 <= row < len(self._entries) else None
+
+    def set_query(self, query: str) -> None:
+        """Show only entries matching ``query``; an empty query shows everything."""
+        self.beginResetModel()
+        self.query = query.strip()
+        self._entries = []
+        self._exhausted = False
+        self.endResetModel()
+        self.fetchMore()
+
+    def prepend(self, entry: HistoryEntry) -> None:
+        """Show a newly stored entry at the top if it passes the current filter."""
+        if self.query and not self.store.matches(entry.id, self.query):
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._entries.insert(0, entry)
+        self.endInsertRows()
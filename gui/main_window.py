@@ -13,9 +13,11 @@ from PySide6.QtWidgets import (
     QHBoxLayout,
     QGroupBox,
     QCheckBox,
+    QFileDialog,
 )
 
-from core.quantization import CheckQuantizationSupport
+from core.models.conversion import INT8_TYPES
+from core.quantization import CheckQuantizationSupport, get_recommended_compute_type
 from core.controller import TranscriberController
 from config.manager import config_manager
 from gui.styles import apply_recording_button_style, apply_update_button_style
@@ -51,7 +53,7 @@ class MainWindow(QWidget):
 
         layout = QVBoxLayout(self)
 
-        self.clipboard_window = ClipboardWindow(self)
+        self.clipboard_window = ClipboardWindow(self, self.controller.history)
 
         self.status_label = QLabel("")
         layout.addWidget(self.status_label)
@@ -98,19 +100,45 @@ class MainWindow(QWidget):
 
         settings_layout.addLayout(row)
 
+        button_row = QHBoxLayout()
         self.update_model_btn = QPushButton("Update Settings")
         self.update_model_btn.clicked.connect(self.update_model)
-        settings_layout.addWidget(self.update_model_btn)
+        button_row.addWidget(self.update_model_btn, 1)
+
+        self.retranscribe_btn = QPushButton("Re-transcribe")
+        self.retranscribe_btn.setToolTip(
+            "Transcribe the last recording again with the currently loaded model"
+        )
+        self.retranscribe_btn.clicked.connect(self.controller.retranscribe_last)
+        button_row.addWidget(self.retranscribe_btn)
+
+        self.transcribe_file_btn = QPushButton("Transcribe File...")
+        self.transcribe_file_btn.setToolTip(
+            "Transcribe an audio or video file; long files are processed in chunks"
+        )
+        self.transcribe_file_btn.clicked.connect(self.choose_file_to_transcribe)
+        button_row.addWidget(self.transcribe_file_btn)
+
+        self.export_btn = QPushButton("Export...")
+        self.export_btn.setToolTip("Save the last transcription's timestamps as SRT, VTT or JSON")
+        self.export_btn.clicked.connect(self.choose_export_file)
+        button_row.addWidget(self.export_btn)
+        settings_layout.addLayout(button_row)
 
         settings_group.setLayout(settings_layout)
         layout.addWidget(settings_group)
 
-        self.setFixedSize(425, 275)
+        self.setFixedSize(480, 275)
         self.setWindowFlag(Qt.WindowStaysOnTopHint)
 
         self._load_config()
 
-        if not self.supported_quantizations.get("cpu") or not self.supported_quantizations.get("cuda"):
+        cpu_quantizations = self.supported_quantizations.get("cpu") or []
+        if (
+            not cpu_quantizations
+            or not self.supported_quantizations.get("cuda")
+            or not any(q in INT8_TYPES for q in cpu_quantizations)
+        ):
             quantization_checker = CheckQuantizationSupport()
             quantization_checker.update_supported_quantizations()
             self._load_config()
@@ -127,6 +155,7 @@ class MainWindow(QWidget):
         self.controller.update_status_signal.connect(self.update_status)
         self.controller.enable_widgets_signal.connect(self.set_widgets_enabled)
         self.controller.text_ready_signal.connect(self.update_clipboard)
+        self.controller.history_added_signal.connect(self.clipboard_window.update_history)
         self.controller.model_loaded_signal.connect(self._on_model_loaded_success)
 
     def _load_config(self) -> None:
@@ -157,6 +186,10 @@ class MainWindow(QWidget):
     @Slot()
     def _on_dropdown_changed(self) -> None:
         self._update_button_state()
+        model = self.model_dropdown.currentText()
+        quant = self.quantization_dropdown.currentText()
+        if model and quant:
+            self.controller.prefetch_model(model, quant)
 
     def _update_button_state(self) -> None:
         current_selections = {
@@ -217,11 +250,18 @@ class MainWindow(QWidget):
             "distil-whisper-large-v3": ["float16", "bfloat16", "float32"],
         }
 
-        options = distil.get(model, self.supported_quantizations.get(device, []))
+        supported = self.supported_quantizations.get(device, [])
+        options = distil.get(model, supported)
+        if model in distil:
+            options = options + [opt for opt in supported if opt in INT8_TYPES]
 
         if device == "cpu":
             options = [opt for opt in options if opt not in ["float16", "bfloat16"]]
 
+        recommended = get_recommended_compute_type(model, device)
+        if recommended in options:
+            options = [recommended] + [opt for opt in options if opt != recommended]
+
         return options
 
     @Slot()
@@ -242,6 +282,11 @@ class MainWindow(QWidget):
 
         self.quantization_dropdown.blockSignals(False)
 
+        recommended = get_recommended_compute_type(model, device)
+        self.quantization_dropdown.setToolTip(
+            f"Fastest measured on this machine: {recommended}" if recommended in opts else ""
+        )
+
         self._update_button_state()
 
     def update_model(self) -> None:
@@ -257,6 +302,28 @@ class MainWindow(QWidget):
         self.controller.curate = curate_enabled
         config_manager.set_value("curate_transcription", curate_enabled)
 
+    @Slot()
+    def choose_file_to_transcribe(self) -> None:
+        audio_file, _ = QFileDialog.getOpenFileName(
+            self,
+            "Transcribe File",
+            "",
+            "Audio/Video (*.wav *.mp3 *.m4a *.flac *.ogg *.opus *.mp4 *.mkv *.webm);;All files (*)",
+        )
+        if audio_file:
+            self.controller.transcribe_file(audio_file)
+
+    @Slot()
+    def choose_export_file(self) -> None:
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Export Timestamps",
+            "transcript.srt",
+            "SubRip (*.srt);;WebVTT (*.vtt);;JSON (*.json);;Segment store (*.wseg)",
+        )
+        if path:
+            self.controller.export_segments(path)
+
     @Slot(str)
     def update_status(self, text: str) -> None:
         self.status_label.setText(text)
@@ -268,6 +335,8 @@ class MainWindow(QWidget):
         self.quantization_dropdown.setEnabled(enabled)
         self.device_dropdown.setEnabled(enabled)
         self.update_model_btn.setEnabled(enabled)
+        self.retranscribe_btn.setEnabled(enabled)
+        self.transcribe_file_btn.setEnabled(enabled)
 
         if not enabled and self.is_recording:
             self.is_recording = False
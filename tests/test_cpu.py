@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+from core import cpu
+from core.cpu import CpuPartition
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="per-thread affinity is Linux only")
+
+
+@pytest.fixture
+def partition(monkeypatch):
+    """A partition of a 4-core, 8-thread machine; affinity and priority calls are recorded, not made."""
+    calls = {"affinity": [], "nice": []}
+    monkeypatch.setattr(cpu, "physical_cores", lambda: 4)
+    monkeypatch.setattr(cpu, "core_groups", lambda: [frozenset({i, i + 4}) for i in range(4)])
+    monkeypatch.setattr(os, "sched_setaffinity", lambda tid, cpus: calls["affinity"].append((tid, set(cpus))))
+    monkeypatch.setattr(os, "sched_setscheduler", lambda *args: (_ for _ in ()).throw(PermissionError()))
+    monkeypatch.setattr(os, "setpriority", lambda which, tid, value: calls["nice"].append((tid, value)))
+    partition = CpuPartition()
+    partition.configure(True, 1)
+    calls["affinity"].clear()
+    yield partition, calls
+    partition.configure(False)
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_only_the_callback_thread_is_claimed(partition):
+    partition, calls = partition
+    ids, stop = {}, threading.Event()
+
+    def callback_thread(probe):
+        ids["callback"] = threading.get_native_id()
+        probe.report()
+        stop.wait(2)
+
+    def unrelated_thread():
+        ids["other"] = threading.get_native_id()
+        stop.wait(2)
+
+    with partition.capture_stream() as probe:
+        # Started while the stream opens, as a model load's workers could be.
+        threads = [threading.Thread(target=unrelated_thread), threading.Thread(target=callback_thread, args=(probe,))]
+        for thread in threads:
+            thread.start()
+    _wait_for(lambda: calls["nice"])
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    assert calls["affinity"] == [(ids["callback"], {3, 7})]
+    assert calls["nice"] == [(ids["callback"], cpu._CAPTURE_NICE)]
+    assert partition.capture_priority == "nice"
+    assert partition.decode_threads() == 3
+
+
+def test_no_probe_without_partition():
+    partition = CpuPartition()
+    with partition.capture_stream() as probe:
+        assert probe is None
+    assert partition.decode_threads() == cpu.physical_cores()
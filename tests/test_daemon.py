@@ -0,0 +1,191 @@
+import threading
+import time
+import wave
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core.daemon import DaemonClient, RemoteModel, RemoteModelFactory, TranscriptionDaemon
+from core.engine import TranscriptionEngine
+from core.jobqueue import JobQueue, QueueWorker
+from core.models.pool import ModelPool, Replica
+from core.transcription.priority import BATCH
+from core.transcription.transcriber import Transcriber
+
+SAMPLING_RATE = 16_000
+
+
+class _WordModel:
+    """One segment per second of audio, each holding a single word."""
+
+    feature_extractor = SimpleNamespace(sampling_rate=SAMPLING_RATE)
+
+    def __init__(self, delay_s=0.0):
+        self.delay_s = delay_s
+        self.decoded = 0
+
+    def transcribe(self, audio, **options):
+        info = SimpleNamespace(language="en", language_probability=0.99, duration=len(audio) / SAMPLING_RATE)
+        return self._segments(audio), info
+
+    def _word(self, audio, t):
+        return f" w{t}"
+
+    def _segments(self, audio):
+        for t in range(len(audio) // SAMPLING_RATE):
+            time.sleep(self.delay_s)
+            self.decoded += 1
+            word = SimpleNamespace(start=t + 0.1, end=t + 0.6, word=self._word(audio, t), probability=0.9)
+            yield SimpleNamespace(
+                start=float(t), end=t + 1.0, text=word.word, avg_logprob=-0.1, no_speech_prob=0.01,
+                compression_ratio=1.2, temperature=0.0, tokens=[t], words=[word],
+            )
+
+
+class _TimeCodedModel(_WordModel):
+    """Names each word after the value its second of audio holds, i.e. its time in the file."""
+
+    def _word(self, audio, t):
+        return f" w{round(audio[t * SAMPLING_RATE + SAMPLING_RATE // 2] * 32768 / 100)}"
+
+
+class _Engine:
+
+    def __init__(self, model):
+        pool = ModelPool([Replica(model)])
+        self.models = SimpleNamespace(
+            get_pool=lambda: pool, ensure_loaded=lambda: pool, is_loaded=True, is_loading=False,
+            current_settings={}, memory_footprint=0,
+        )
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def serve(tmp_path):
+    started = []
+
+    def start(model=None, engine=None):
+        daemon = TranscriptionDaemon(engine or _Engine(model), str(tmp_path / "d.sock"), b"test-key")
+        thread = threading.Thread(target=daemon.serve_forever, daemon=True)
+        thread.start()
+        deadline = time.monotonic() + 5
+        while True:
+            try:
+                client = DaemonClient(daemon.address, b"test-key")
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                time.sleep(0.01)
+        started.append((daemon, thread, client))
+        return daemon, client
+
+    yield start
+    for daemon, thread, client in started:
+        client.close()
+        daemon.shutdown()
+        thread.join(5)
+
+
+def test_segments_stream_with_words_and_info(serve):
+    _, client = serve(_WordModel())
+    segments, info = RemoteModel(client).transcribe(np.zeros(3 * SAMPLING_RATE, dtype=np.float32))
+    assert (info.language, info.duration) == ("en", 3.0)
+    segments = list(segments)
+    assert [s.text for s in segments] == [" w0", " w1", " w2"]
+    assert [(w.start, w.end, w.word, w.probability) for w in segments[1].words] == [(1.1, 1.6, " w1", 0.9)]
+    assert segments[2].tokens == (2,)
+
+
+def test_segments_arrive_before_decoding_ends(serve):
+    _, client = serve(_WordModel(delay_s=0.2))
+    started = time.perf_counter()
+    segments, _ = client.segments(np.zeros(5 * SAMPLING_RATE, dtype=np.float32))
+    next(segments)
+    assert time.perf_counter() - started < 0.8
+    segments.close()
+
+
+def test_closing_a_stream_stops_the_decode(serve):
+    model = _WordModel(delay_s=0.05)
+    _, client = serve(model)
+    segments, _ = client.segments(np.zeros(60 * SAMPLING_RATE, dtype=np.float32))
+    next(segments)
+    segments.close()
+    assert model.decoded < 10
+    # The connection is clean for the next stream.
+    segments, _ = client.segments(np.zeros(2 * SAMPLING_RATE, dtype=np.float32))
+    assert [s.text for s in segments] == [" w0", " w1"]
+
+
+def test_interactive_stream_borrows_the_model_from_a_batch_stream(serve):
+    daemon, client = serve(_WordModel(delay_s=0.05))
+    batch, _ = client.segments(np.zeros(60 * SAMPLING_RATE, dtype=np.float32), priority=BATCH)
+    next(batch)
+
+    started = time.perf_counter()
+    segments, _ = client.segments(np.zeros(2 * SAMPLING_RATE, dtype=np.float32))
+    assert [s.text for s in segments] == [" w0", " w1"]
+    assert time.perf_counter() - started < 1.5
+    assert daemon.scheduler.preemptions == 1
+    batch.close()
+
+
+def _write_time_coded(path, seconds):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLING_RATE)
+        wf.writeframes(np.repeat(np.arange(seconds, dtype=np.int16) * 100, SAMPLING_RATE).tobytes())
+
+
+def test_long_file_through_remote_model(serve, tmp_path):
+    _, client = serve(_TimeCodedModel())
+    path = tmp_path / "long.wav"
+    _write_time_coded(path, 25)
+
+    transcriber = Transcriber(guard_enabled=False)
+    transcriber.long_window_s, transcriber.long_overlap_s = 10.0, 2.0
+    store = transcriber.transcribe_long_segments(RemoteModel(client), path)
+
+    # Overlapping windows at 0, 8 and 16 s; each word is kept once, at its place in the file.
+    words = [w for i in range(len(store)) for w in store.words_of(i)]
+    assert [w.word for w in words] == [f" w{t}" for t in range(25)]
+    assert [w.start for w in words] == pytest.approx([t + 0.1 for t in range(25)])
+
+
+def test_queue_workers_share_the_daemon_model(serve, tmp_path):
+    loads = []
+
+    def load(*args, **kwargs):
+        loads.append(args)
+        return _TimeCodedModel(delay_s=0.01)
+
+    daemon, _ = serve(engine=TranscriptionEngine(guard_enabled=False, pool_size=2, model_factory=load))
+    queue = JobQueue(tmp_path / "queue")
+    for i in range(4):
+        _write_time_coded(queue.root / f"clip{i}.wav", 3)
+    queue.submit(sorted(queue.root.glob("*.wav")))
+
+    # Two workers, as two processes would be: each with its own client and engine, no model of its own.
+    clients = [DaemonClient(daemon.address, b"test-key") for _ in range(2)]
+    workers = []
+    for i, client in enumerate(clients):
+        engine = TranscriptionEngine(guard_enabled=False, model_factory=RemoteModelFactory(client, BATCH))
+        engine.load_model("base.en", "float32", "cpu")
+        workers.append(QueueWorker(queue, engine, f"worker{i}"))
+    threads = [threading.Thread(target=w.run, kwargs={"exit_when_empty": True, "poll_s": 0.05}) for w in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(30)
+    for client in clients:
+        client.close()
+
+    assert len(loads) == 1
+    results = [queue.result(p.stem) for p in (queue.root / "jobs").glob("*.json")]
+    assert sorted(r["text"] for r in results) == ["w0\nw1\nw2"] * 4
+    assert daemon.scheduler.waits[BATCH].count == 4
@@ -0,0 +1,49 @@
+import hashlib
+
+import pytest
+
+from core.models import downloader as downloader_module
+from core.models.downloader import DownloadError, ModelDownloader, RemoteFile
+
+MODEL_BYTES = b"weights" * 100
+
+
+class _OfflineDownloader(ModelDownloader):
+    """Serves ``MODEL_BYTES`` as model.bin and counts the ranges fetched."""
+
+    def __init__(self):
+        super().__init__(max_workers=1)
+        self.fetched = 0
+
+    def list_files(self, repo_id):
+        return [RemoteFile("model.bin", len(MODEL_BYTES), sha256=hashlib.sha256(MODEL_BYTES).hexdigest())]
+
+    def _fetch_range(self, repo_id, output_dir, remote, index, start, end, states, progress):
+        part, state = self._part_paths(output_dir / remote.path)
+        with part.open("r+b") as f:
+            f.seek(start)
+            f.write(MODEL_BYTES[start:end + 1])
+        self.fetched += 1
+        states[remote.path].add(index)
+
+
+def test_download_skips_existing_file_with_matching_hash(tmp_path):
+    (tmp_path / "model.bin").write_bytes(MODEL_BYTES)
+    downloader = _OfflineDownloader()
+    downloader.download("repo", tmp_path)
+    assert downloader.fetched == 0
+
+
+def test_download_refetches_same_size_file_with_wrong_hash(tmp_path):
+    (tmp_path / "model.bin").write_bytes(b"x" * len(MODEL_BYTES))
+    downloader = _OfflineDownloader()
+    downloader.download("repo", tmp_path)
+    assert downloader.fetched == 1
+    assert (tmp_path / "model.bin").read_bytes() == MODEL_BYTES
+
+
+def test_download_rejects_corrupt_transfer(tmp_path, monkeypatch):
+    monkeypatch.setattr(downloader_module, "_file_digest_matches", lambda path, remote: False)
+    with pytest.raises(DownloadError):
+        _OfflineDownloader().download("repo", tmp_path)
+    assert not (tmp_path / "model.bin").exists()
@@ -0,0 +1,123 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core.transcription.guard import DecodeGuard
+
+
+def _segment(text, avg_logprob=-0.2, no_speech_prob=0.1):
+    return SimpleNamespace(text=text, avg_logprob=avg_logprob, no_speech_prob=no_speech_prob)
+
+
+def _texts(segments):
+    return [segment.text for segment in segments]
+
+
+def test_keeps_short_legitimate_repeats():
+    guard = DecodeGuard()
+    segments = [_segment("yes"), _segment("yes"), _segment("thank you")]
+    assert _texts(guard.filter(segments)) == ["yes", "yes", "thank you"]
+    assert guard.stats.snapshot().get("dropped", 0) == 0
+
+
+def test_drops_repeated_sentence():
+    guard = DecodeGuard()
+    segments = [_segment("the cat sat down"), _segment("the cat sat down")]
+    assert _texts(guard.filter(segments)) == ["the cat sat down"]
+    assert guard.stats.snapshot()["repetition"] == 1
+
+
+def test_drops_ngram_loop_within_a_segment():
+    guard = DecodeGuard()
+    looping = " ".join(["over and over"] * 6)
+    assert _texts(guard.filter([_segment("fine"), _segment(looping)])) == ["fine"]
+
+
+def test_low_logprob_streak_dropped_and_speech_after_it_kept():
+    guard = DecodeGuard()
+    segments = [_segment(c, avg_logprob=-2.0) for c in "abcde"]
+    segments += [_segment("good"), _segment("f", avg_logprob=-2.0), _segment("more")]
+    assert _texts(guard.filter(segments)) == ["good", "f", "more"]
+    stats = guard.stats.snapshot()
+    assert stats["runaways"] == 1
+    assert stats["dropped"] == 5
+
+
+def test_no_speech_streak_dropped():
+    guard = DecodeGuard()
+    segments = [_segment(c, no_speech_prob=0.95) for c in "abc"] + [_segment("hello")]
+    assert _texts(guard.filter(segments)) == ["hello"]
+
+
+class _LoopingModel:
+    """One segment per second from the clip start; seconds in ``bad`` decode as a low-confidence loop."""
+
+    feature_extractor = SimpleNamespace(sampling_rate=16_000)
+
+    def __init__(self, bad=(), text="s{}"):
+        self.bad = bad
+        self.text = text
+        self.decoded = []
+        self.calls = []
+
+    def transcribe(self, audio, **options):
+        self.calls.append(options)
+        start = int(options.get("clip_timestamps", [0])[0])
+        return self._segments(start, len(audio) // 16_000), None
+
+    def _segments(self, start, end):
+        for t in range(start, end):
+            self.decoded.append(t)
+            logprob = -2.0 if t in self.bad else -0.2
+            yield SimpleNamespace(text=self.text.format(t), start=float(t), end=t + 1.0, avg_logprob=logprob, no_speech_prob=0.1)
+
+
+def _speech_from(monkeypatch, seconds):
+    """Make VAD report speech from ``seconds`` into the file onward, or none."""
+    import faster_whisper.vad
+
+    def speech(audio, sampling_rate=16_000, **_):
+        offset = 60 * sampling_rate - len(audio)
+        if seconds is None or offset >= seconds * sampling_rate:
+            return []
+        return [{"start": seconds * sampling_rate - offset, "end": len(audio)}]
+
+    monkeypatch.setattr(faster_whisper.vad, "get_speech_timestamps", speech)
+
+
+def test_trailing_runaway_stops_the_decode(monkeypatch):
+    _speech_from(monkeypatch, None)
+    model = _LoopingModel(bad=set(range(2, 60)))
+    guard = DecodeGuard()
+    segments, _ = guard.transcribe(model, np.zeros(60 * 16_000, dtype=np.float32))
+    assert _texts(segments) == ["s0", "s1"]
+    assert model.decoded == [0, 1, 2, 3, 4, 5]
+    stats = guard.stats.snapshot()
+    assert stats["stopped"] == 1
+    assert stats["skipped_ms"] == 54_000
+
+
+def test_runaway_restarts_at_the_next_speech(monkeypatch):
+    _speech_from(monkeypatch, 30)
+    model = _LoopingModel(bad=set(range(2, 30)))
+    guard = DecodeGuard()
+    segments, _ = guard.transcribe(model, np.zeros(60 * 16_000, dtype=np.float32), initial_prompt="hi")
+    assert _texts(segments) == ["s0", "s1"] + [f"s{t}" for t in range(29, 60)]
+    assert 6 not in model.decoded
+    first, restart = model.calls
+    assert first["temperature"] == (0.0, 0.2, 0.4)
+    assert first["compression_ratio_threshold"] == 2.4
+    assert restart["clip_timestamps"] == [pytest.approx(29.8)]
+    assert restart["initial_prompt"] is None
+    assert guard.stats.snapshot()["restarts"] == 1
+
+
+def test_repetition_loop_stops_the_decode(monkeypatch):
+    _speech_from(monkeypatch, None)
+    model = _LoopingModel(text="the cat sat down")
+    guard = DecodeGuard()
+    segments, _ = guard.transcribe(model, np.zeros(60 * 16_000, dtype=np.float32))
+    assert _texts(segments) == ["the cat sat down"]
+    assert len(model.decoded) == 4
+    assert guard.stats.snapshot()["repetition"] == 3
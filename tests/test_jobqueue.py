@@ -0,0 +1,68 @@
+import time
+
+import pytest
+
+from core.jobqueue import JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(tmp_path / "queue", lease_s=60, max_attempts=2)
+
+
+def _submit(queue, *names):
+    return queue.submit([queue.root / name for name in names])
+
+
+def test_submit_is_idempotent(queue):
+    assert len(_submit(queue, "a.wav")) == 1
+    assert _submit(queue, "a.wav") == []
+
+
+def test_claim_oldest_first_and_exclusive(queue):
+    first, = _submit(queue, "a.wav")
+    time.sleep(0.01)
+    second, = _submit(queue, "b.wav")
+
+    lease = queue.claim("w1")
+    assert lease.job.id == first
+    assert queue.claim("w2").job.id == second
+    assert queue.claim("w3") is None
+
+
+def test_complete_stores_result_and_releases(queue):
+    job_id, = _submit(queue, "a.wav")
+    lease = queue.claim("w1")
+    assert queue.complete(lease, "hello", audio_s=1.0)
+    assert queue.is_done(job_id)
+    assert queue.result(job_id)["text"] == "hello"
+    assert not lease.path.exists()
+    assert queue.claim("w2") is None
+    assert queue.status()["done"] == 1
+
+
+def test_expired_lease_is_reclaimed_and_charged(queue):
+    queue.lease_s = 0.05
+    job_id, = _submit(queue, "a.wav")
+    stale = queue.claim("w1")
+    time.sleep(0.1)
+
+    lease = queue.claim("w2")
+    assert lease is not None and lease.worker == "w2"
+    assert queue.attempts(job_id) == 1
+    # The old holder can neither finish nor fail the job any more.
+    assert not queue.complete(stale, "late")
+    assert not queue.fail(stale, "boom")
+    assert stale.lost.is_set()
+    assert queue.attempts(job_id) == 1
+    assert queue.complete(lease, "hello")
+
+
+def test_failed_job_given_up_after_max_attempts(queue):
+    job_id, = _submit(queue, "a.wav")
+    for _ in range(queue.max_attempts):
+        lease = queue.claim("w1")
+        assert queue.fail(lease, "boom")
+    assert queue.attempts(job_id) == queue.max_attempts
+    assert queue.claim("w1") is None
+    assert queue.status()["failed"] == 1
@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+import pytest
+from faster_whisper.feature_extractor import FeatureExtractor
+
+from core.transcription.features import IncrementalLogMel
+
+TOLERANCE = 1e-5
+
+
+def _blocks(seconds, samplerate, block, seed=0):
+    """Voiced bursts over low noise, as int16 capture blocks."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * samplerate)
+    t = np.arange(n) / samplerate
+    envelope = (np.sin(2 * np.pi * 0.4 * t) > 0).astype(np.float32)
+    voice = np.sin(2 * np.pi * 140 * t) + 0.5 * np.sin(2 * np.pi * 280 * t + 1.0)
+    audio = 0.3 * envelope * voice + 0.01 * rng.standard_normal(n)
+    samples = (np.clip(audio, -1, 1) * 32767).astype(np.int16).reshape(-1, 1)
+    return [samples[i:i + block] for i in range(0, n, block)]
+
+
+@pytest.mark.parametrize("n_mels", [80, 128])
+@pytest.mark.parametrize("seconds", [0.005, 0.01, 1.0, 7.3])
+@pytest.mark.parametrize("block", [1, 160, 1000])
+def test_incremental_log_mel_matches_batch_extractor(n_mels, seconds, block):
+    extractor = FeatureExtractor(feature_size=n_mels)
+    audio = np.random.default_rng(1).uniform(-0.5, 0.5, int(seconds * 16_000)).astype(np.float32)
+    reference = extractor(audio)
+
+    incremental = IncrementalLogMel.for_extractor(extractor)
+    for i in range(0, len(audio), block):
+        incremental.feed(audio[i:i + block])
+    features = incremental.finish()
+
+    assert features.shape == reference.shape
+    assert np.abs(features - reference).max() <= TOLERANCE
+
+
+@pytest.mark.parametrize("samplerate", [16_000, 44_100])
+@pytest.mark.parametrize("block", [160, 1024])
+def test_live_session_matches_batch_path(samplerate, block):
+    try:
+        from core.audio.recording import to_whisper_audio
+        from core.transcription.live import LiveFeatureSession
+    except OSError as exc:  # sounddevice raises this without PortAudio
+        pytest.skip(f"audio capture unavailable: {exc}")
+    extractor = FeatureExtractor()
+    blocks = _blocks(3.0, samplerate, block)
+    audio = to_whisper_audio(blocks, "int16", samplerate)
+    reference = extractor(audio)
+
+    session = LiveFeatureSession(extractor, samplerate, "int16")
+    for b in blocks:
+        session.feed(b)
+    deadline = time.monotonic() + 10
+    while session.backlog and time.monotonic() < deadline:
+        time.sleep(0.001)
+    live_audio, features = session.finish()
+
+    np.testing.assert_array_equal(live_audio, audio)
+    assert features.shape == reference.shape
+    assert np.abs(features - reference).max() <= TOLERANCE
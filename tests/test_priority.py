@@ -0,0 +1,91 @@
+import threading
+import time
+
+from core.models.pool import ModelPool, Replica
+from core.transcription.priority import BATCH, INTERACTIVE, PriorityScheduler
+
+
+def _run_batch(scheduler, pool, started, stop):
+    with scheduler.lease(pool, BATCH):
+        started.set()
+        while not stop.is_set():
+            time.sleep(0.01)
+            scheduler.checkpoint()
+
+
+def _interactive_while_batch_runs(scheduler, batch_pool, interactive_pool):
+    started, stop = threading.Event(), threading.Event()
+    batch = threading.Thread(target=_run_batch, args=(scheduler, batch_pool, started, stop))
+    batch.start()
+    try:
+        assert started.wait(5)
+        with scheduler.lease(interactive_pool, INTERACTIVE) as model:
+            return model
+    finally:
+        stop.set()
+        batch.join(5)
+
+
+def test_batch_lends_its_model_to_interactive_job_on_same_pool():
+    scheduler = PriorityScheduler()
+    pool = ModelPool([Replica("A")])
+    assert _interactive_while_batch_runs(scheduler, pool, pool) == "A"
+    assert scheduler.preemptions == 1
+
+
+def test_no_lending_across_pools():
+    scheduler = PriorityScheduler()
+    busy, free = ModelPool([Replica("A")]), ModelPool([Replica("B")])
+    assert _interactive_while_batch_runs(scheduler, busy, free) == "B"
+    assert scheduler.preemptions == 0
+
+
+def test_no_lending_while_pool_has_a_free_slot():
+    scheduler = PriorityScheduler()
+    pool = ModelPool([Replica("C", capacity=2)])
+    assert _interactive_while_batch_runs(scheduler, pool, pool) == "C"
+    assert scheduler.preemptions == 0
+
+
+def test_two_batch_jobs_sharing_a_model_each_get_their_own_loan_back():
+    scheduler = PriorityScheduler()
+    pool = ModelPool([Replica("M", capacity=2)])
+    lock = threading.Lock()
+    users, peak = [0], [0]
+
+    def use(seconds):
+        with lock:
+            users[0] += 1
+            peak[0] = max(peak[0], users[0])
+        time.sleep(seconds)
+        with lock:
+            users[0] -= 1
+
+    stop = threading.Event()
+
+    def batch():
+        with scheduler.lease(pool, BATCH):
+            while not stop.is_set():
+                use(0.005)
+                scheduler.checkpoint()
+
+    def interactive(seconds):
+        with scheduler.lease(pool, INTERACTIVE):
+            use(seconds)
+
+    batches = [threading.Thread(target=batch) for _ in range(2)]
+    for thread in batches:
+        thread.start()
+    while pool.active < 2:
+        time.sleep(0.001)
+    interactives = [threading.Thread(target=interactive, args=(s,)) for s in (0.1, 0.3)]
+    for thread in interactives:
+        thread.start()
+    for thread in interactives:
+        thread.join(5)
+    stop.set()
+    for thread in batches:
+        thread.join(5)
+
+    assert scheduler.preemptions == 2
+    assert peak[0] <= pool.capacity
@@ -0,0 +1,51 @@
+import os
+
+import pytest
+
+from core.models.registry import LocalModelRegistry
+
+MODEL_BYTES = b"weights" * 100
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return LocalModelRegistry(tmp_path / "store")
+
+
+def _store_model(registry):
+    path = registry.entry_dir("tiny", "int8")
+    path.mkdir(parents=True)
+    (path / "model.bin").write_bytes(MODEL_BYTES)
+    return registry.register("tiny", "int8", path)
+
+
+def test_resolve_returns_intact_model(registry):
+    path = _store_model(registry)
+    assert registry.resolve("tiny", "int8") == path
+    assert LocalModelRegistry(registry.root).resolve("tiny", "int8") == path
+
+
+def test_corrupt_model_is_dropped_and_moved_aside(registry):
+    path = _store_model(registry)
+    (path / "model.bin").write_bytes(b"x" * len(MODEL_BYTES))
+    os.utime(path / "model.bin", (1, 1))
+
+    assert registry.resolve("tiny", "int8") is None
+    assert not path.exists()
+    aside, = [p for p in registry.root.iterdir() if p.is_dir()]
+    assert aside.name.startswith("tiny-ct2-int8.corrupt-")
+    assert (aside / "model.bin").exists()
+    # The manifest on disk forgets it too.
+    assert LocalModelRegistry(registry.root).entries() == {}
+
+
+def test_corrupt_model_outside_store_is_left_in_place(registry, tmp_path):
+    outside = tmp_path / "elsewhere"
+    outside.mkdir()
+    (outside / "model.bin").write_bytes(MODEL_BYTES)
+    registry.register("tiny", "float32", outside)
+    (outside / "model.bin").write_bytes(b"x" * len(MODEL_BYTES))
+    os.utime(outside / "model.bin", (1, 1))
+
+    assert registry.resolve("tiny", "float32") is None
+    assert (outside / "model.bin").exists()
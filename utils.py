@@ -1,8 +1,13 @@
 """
 Low-level utility functions.
 """
+import ctypes
+import gc
 import os
 import sys
+from typing import Dict, Optional
+
+import psutil
 
 
 def get_resource_path(relative_path: str) -> str:
@@ -11,4 +16,46 @@ def get_resource_path(relative_path: str) -> str:
         return os.path.join(os.path.dirname(sys.executable), relative_path)
     elif hasattr(sys, '_MEIPASS'):
         return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath("."), relative_path)
\ No newline at end of file
+    return os.path.join(os.path.abspath("."), relative_path)
+
+
+def get_process_rss() -> int:
+    """Resident set size of the current process in bytes."""
+    return psutil.Process().memory_info().rss
+
+
+def get_process_memory(pid: Optional[int] = None) -> Dict[str, int]:
+    """
+    RSS, PSS and USS of a process in bytes (PSS and USS are 0 where unavailable).
+
+    RSS counts every shared page in full in each process that maps it; PSS
+    divides shared pages between those processes, so summed over processes
+    it is their real footprint; USS is what only this process holds.
+    """
+    process = psutil.Process(pid)
+    try:
+        info = process.memory_full_info()
+    except (psutil.AccessDenied, NotImplementedError):
+        return {"rss": process.memory_info().rss, "pss": 0, "uss": 0}
+    return {"rss": info.rss, "pss": getattr(info, "pss", 0), "uss": getattr(info, "uss", 0)}
+
+
+def release_freed_memory() -> None:
+    """Collect garbage and, on glibc, hand freed heap pages back to the OS."""
+    gc.collect()
+    if sys.platform.startswith("linux"):
+        try:
+            ctypes.CDLL("libc.so.6").malloc_trim(0)
+        except (OSError, AttributeError):
+            pass
+
+
+def format_bytes(num_bytes: float) -> str:
+    """Human readable size, e.g. ``1.4 GB``."""
+    if abs(num_bytes) < 1024:
+        return f"{int(num_bytes)} B"
+    for unit in ("KB", "MB"):
+        num_bytes /= 1024
+        if abs(num_bytes) < 1024:
+            return f"{num_bytes:.1f} {unit}"
+    return f"{num_bytes / 1024:.1f} GB"